@@ -0,0 +1,254 @@
+"""
+End-to-end API benchmarks.
+
+Scenarios drive real endpoints in-process: HTTP ones through the Django
+test client with a JWT for a seeded user (see ``api.seeding``), chat
+through a Channels ``WebsocketCommunicator`` against the websocket
+application. Every request records wall time and the number of SQL
+queries it ran; a scenario reports p50/p95/p99 latency, query counts and
+sequential throughput. ``run()`` returns a JSON-serializable report that
+``compare()`` can diff against a report from another commit.
+"""
+import asyncio
+import copy
+import json
+import logging
+import random
+import statistics
+import subprocess
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment
+)
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chat.models import ChatRoom
+from posts.models import Post
+from .seeding import DEFAULT_PREFIX, WORDS
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+class Scenario:
+    """A named endpoint; ``path(context)`` picks the URL for one request"""
+
+    def __init__(self, name, path, method='get', data=None):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+
+
+HTTP_SCENARIOS = [
+    Scenario('feed', lambda ctx: '/api/posts/feed/'),
+    Scenario('trending', lambda ctx: '/api/posts/trending/'),
+    Scenario('post_detail', lambda ctx: f'/api/posts/{ctx.rng.choice(ctx.post_ids)}/'),
+    Scenario('post_comments', lambda ctx: f'/api/posts/{ctx.rng.choice(ctx.post_ids)}/comments/'),
+    Scenario('saved_posts', lambda ctx: '/api/posts/interactions/saved_posts/'),
+    Scenario('search', lambda ctx: f'/api/search/?q={ctx.rng.choice(WORDS)}'),
+    Scenario('profile', lambda ctx: f'/api/users/profile/{ctx.rng.choice(ctx.user_ids)}/'),
+    Scenario('notifications', lambda ctx: '/api/users/notifications/'),
+    Scenario('chat_rooms', lambda ctx: '/api/chat/rooms/'),
+    Scenario('chat_messages', lambda ctx: f'/api/chat/rooms/{ctx.room_for(ctx.user)}/messages/'),
+]
+
+
+class Context:
+    """Seeded ids the scenarios pick from, and the acting user"""
+
+    def __init__(self, prefix=DEFAULT_PREFIX, users=20, random_seed=None):
+        self.rng = random.Random(random_seed)
+        self.prefix = prefix
+        User = get_user_model()
+        seeded = User.objects.filter(username__startswith=prefix)
+        self.user_ids = list(seeded.values_list('pk', flat=True)[:5000])
+        if not self.user_ids:
+            raise ValueError(f'No seeded users with prefix {prefix!r}; run seed_scale first')
+        self.post_ids = list(
+            Post.objects.filter(author__username__startswith=prefix)
+                .order_by('-created_at').values_list('pk', flat=True)[:5000]
+        )
+        # Act as the users that have chat rooms so chat scenarios have data
+        rooms = ChatRoom.participants.through.objects\
+            .filter(user__username__startswith=prefix)\
+            .values_list('user_id', 'chatroom_id')[:users * 10]
+        self.rooms = {}
+        for user_id, room_id in rooms:
+            self.rooms.setdefault(user_id, room_id)
+        actors = list(self.rooms)[:users] or self.user_ids[:users]
+        self._act_as(list(User.objects.filter(pk__in=actors)))
+
+    def _act_as(self, users):
+        self.users = users
+        self.tokens = {user.pk: str(AccessToken.for_user(user)) for user in users}
+        self.user = users[0]
+
+    def narrowed(self, user_ids):
+        """A copy of this context acting only as the users ``user_ids``"""
+        context = copy.copy(self)
+        context._act_as(list(get_user_model().objects.filter(pk__in=user_ids)))
+        return context
+
+    def next_user(self):
+        self.user = self.rng.choice(self.users)
+        return self.user
+
+    def room_for(self, user):
+        return self.rooms.get(user.pk) or ChatRoom.objects.values_list('pk', flat=True).first()
+
+
+def summarize(latencies, queries, errors, elapsed):
+    """Percentiles, query counts and throughput for one scenario"""
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+    }
+    if latencies:
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        for percentile in PERCENTILES:
+            result[f'p{percentile}_ms'] = round(cuts[percentile - 1] * 1000, 2)
+        result['mean_ms'] = round(statistics.fmean(latencies) * 1000, 2)
+    if queries:
+        result['queries_mean'] = round(statistics.fmean(queries), 2)
+        result['queries_max'] = max(queries)
+    return result
+
+
+def measure_request(client, context, scenario):
+    """Run one request; returns ``(seconds, queries, status_code)``"""
+    user = context.next_user()
+    path = scenario.path(context)
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {context.tokens[user.pk]}'}
+    send = getattr(client, scenario.method)
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        response = send(path, data=scenario.data, **headers)
+        elapsed = time.perf_counter() - started
+    return elapsed, len(captured), response.status_code
+
+
+def run_http(scenario, context, requests, warmup):
+    client = Client()
+    for _ in range(warmup):
+        measure_request(client, context, scenario)
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        elapsed, count, status_code = measure_request(client, context, scenario)
+        latencies.append(elapsed)
+        queries.append(count)
+        if status_code >= 400:
+            errors += 1
+    return summarize(latencies, queries, errors, time.perf_counter() - started)
+
+
+async def _chat_round_trips(context, messages):
+    from channels.testing import WebsocketCommunicator
+    from core.routing import application
+
+    user = context.user
+    room_id = context.room_for(user)
+    communicator = WebsocketCommunicator(
+        application,
+        f'/ws/chat/{room_id}/?token={context.tokens[user.pk]}',
+        headers=[(b'origin', b'http://testserver'), (b'host', b'testserver')]
+    )
+    connected, _ = await communicator.connect()
+    if not connected:
+        raise RuntimeError('Websocket connection was refused')
+    latencies, errors = [], 0
+    try:
+        # Drain the presence broadcast sent on connect
+        await communicator.receive_nothing(timeout=0.2)
+        for n in range(messages):
+            started = time.perf_counter()
+            await communicator.send_json_to({'type': 'chat_message', 'content': f'benchmark {n}'})
+            try:
+                while True:
+                    event = await communicator.receive_json_from(timeout=5)
+                    if event.get('type') == 'chat_message':
+                        break
+            except asyncio.TimeoutError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+    finally:
+        await communicator.disconnect()
+    return latencies, errors
+
+
+def run_chat(context, messages):
+    """Websocket send -> broadcast round trips for one participant"""
+    started = time.perf_counter()
+    latencies, errors = async_to_sync(_chat_round_trips)(context, messages)
+    return summarize(latencies, [], errors, time.perf_counter() - started)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scenarios=None, requests=200, warmup=10, chat_messages=100,
+        prefix=DEFAULT_PREFIX, users=20, random_seed=None):
+    """Run the selected scenarios (all by default) and return the report"""
+    context = Context(prefix, users, random_seed)
+    selected = [s for s in HTTP_SCENARIOS if not scenarios or s.name in scenarios]
+    results = {}
+    # Allows the test client's "testserver" host
+    setup_test_environment()
+    try:
+        for scenario in selected:
+            results[scenario.name] = run_http(scenario, context, requests, warmup)
+            logger.info("Benchmarked %s: %s", scenario.name, results[scenario.name])
+        if chat_messages and (not scenarios or 'chat_ws' in scenarios):
+            results['chat_ws'] = run_chat(context, chat_messages)
+    finally:
+        teardown_test_environment()
+    return {
+        'revision': _git_revision(),
+        'created_at': timezone.now().isoformat(),
+        'settings': {
+            'requests': requests, 'warmup': warmup, 'chat_messages': chat_messages,
+            'users': len(context.users), 'posts': len(context.post_ids),
+        },
+        'scenarios': results,
+    }
+
+
+def compare(report, baseline):
+    """Per-scenario changes of the latency and query metrics against a baseline"""
+    metrics = [f'p{percentile}_ms' for percentile in PERCENTILES] + ['queries_mean', 'throughput_rps']
+    changes = {}
+    for name, result in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            metric: {
+                'before': previous[metric],
+                'after': result[metric],
+                'change_pct': round((result[metric] - previous[metric]) / previous[metric] * 100, 1)
+                if previous[metric] else None,
+            }
+            for metric in metrics if metric in result and metric in previous
+        }
+    return changes
+
+
+def load(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
@@ -0,0 +1,274 @@
+"""
+Per-route query and latency budgets.
+
+Each ``Budget`` names an API route, the most SQL queries one request may
+run and a latency ceiling for its median. ``check()`` requests every route
+against seeded data (see ``api.seeding``) at a small and a large page size.
+A route fails if any of these holds:
+
+* it exceeds its query budget;
+* its query count grows with the page size, which is the N+1 signature;
+* a paginated route returns fewer than ``LARGE_PAGE`` rows, so that growth
+  could not be measured;
+* its median latency exceeds its latency budget.
+
+Routes listing a user's own rows (followers, saves, notifications, chat
+rooms) act as the seeded users with at least ``LARGE_PAGE`` of them, and
+``comments`` reads the posts with that many top-level comments.
+
+Every query is captured with the stack frames of project code that issued
+it. Failures list the statements that ran more than once per request,
+normalized so the per-row repeats of an N+1 collapse into one entry, with
+the line responsible. Budgets can be overridden per route with the
+``QUERY_BUDGETS`` setting, e.g. ``{'feed': {'queries': 6, 'ms': 120}}``.
+"""
+import functools
+import os
+import re
+import statistics
+import time
+import traceback
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from chat.models import ChatRoom
+from posts.models import Comment, PostInteraction
+from users.models import Notification
+from .benchmarks import Context
+
+SMALL_PAGE = 5
+LARGE_PAGE = 25
+
+PROJECT_ROOT = str(settings.BASE_DIR)
+# Frames from these files are never blamed for a query
+IGNORED_PATHS = (os.sep + 'site-packages' + os.sep, __file__)
+
+
+class Budget:
+    """Query and latency ceilings for one route"""
+
+    def __init__(self, name, path, queries, ms, paginated=True, actors=None):
+        self.name = name
+        self.path = path
+        self.queries = queries
+        self.ms = ms
+        # Whether the route honours ?page_size=, so growth can be measured
+        self.paginated = paginated
+        # ``actors(prefix)`` returns the ids of the users to request the route as
+        self.actors = actors
+
+
+def _busiest(queryset, column):
+    """Values of ``column`` appearing in at least ``LARGE_PAGE`` rows of ``queryset``"""
+    return list(
+        queryset.order_by().values(column)
+            .annotate(rows=Count('pk'))
+            .filter(rows__gte=LARGE_PAGE)
+            .order_by('-rows')
+            .values_list(column, flat=True)[:20]
+    )
+
+
+def most_followed(prefix):
+    Follow = get_user_model().following.through
+    return _busiest(Follow.objects.filter(to_user__username__startswith=prefix), 'to_user')
+
+
+def most_notified(prefix):
+    return _busiest(Notification.objects.filter(recipient__username__startswith=prefix),
+                    'recipient')
+
+
+def most_saves(prefix):
+    return _busiest(PostInteraction.objects.filter(
+        user__username__startswith=prefix, interaction_type='SAVE'
+    ), 'user')
+
+
+def most_rooms(prefix):
+    Membership = ChatRoom.participants.through
+    return _busiest(Membership.objects.filter(user__username__startswith=prefix), 'user')
+
+
+@functools.lru_cache
+def most_commented(prefix):
+    return _busiest(Comment.objects.filter(
+        post__author__username__startswith=prefix, parent__isnull=True
+    ), 'post')
+
+
+def _commented_post(ctx):
+    return ctx.rng.choice(most_commented(ctx.prefix) or ctx.post_ids)
+
+
+BUDGETS = [
+    Budget('feed', lambda ctx: '/api/posts/feed/', queries=8, ms=150),
+    Budget('trending', lambda ctx: '/api/posts/trending/', queries=6, ms=100, paginated=False),
+    Budget('comments', lambda ctx: f'/api/posts/{_commented_post(ctx)}/comments/',
+           queries=8, ms=100),
+    Budget('saved_posts', lambda ctx: '/api/posts/interactions/saved_posts/', queries=6, ms=100,
+           actors=most_saves),
+    Budget('followers', lambda ctx: '/api/users/followers/', queries=6, ms=100,
+           actors=most_followed),
+    Budget('notifications', lambda ctx: '/api/users/notifications/', queries=6, ms=100,
+           actors=most_notified),
+    Budget('chat_rooms', lambda ctx: '/api/chat/rooms/', queries=8, ms=150,
+           actors=most_rooms),
+    Budget('search', lambda ctx: '/api/search/?q=music', queries=10, ms=250, paginated=False),
+]
+
+
+def register(budget):
+    """Add or replace the budget of a route"""
+    BUDGETS[:] = [existing for existing in BUDGETS if existing.name != budget.name]
+    BUDGETS.append(budget)
+
+
+def _configured(budget):
+    override = getattr(settings, 'QUERY_BUDGETS', {}).get(budget.name, {})
+    return override.get('queries', budget.queries), override.get('ms', budget.ms)
+
+
+NUMBER_RE = re.compile(r'\b\d+(\.\d+)?\b')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+IN_LIST_RE = re.compile(r'\bIN \([^)]*\)', re.IGNORECASE)
+
+
+def normalize(sql):
+    """Collapse literals so repeats of one statement with different ids match"""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that keeps each statement with its project stack"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        frames = [
+            f'{os.path.relpath(frame.filename, PROJECT_ROOT)}:{frame.lineno} in {frame.name}'
+            for frame in traceback.extract_stack()[:-1]
+            if frame.filename.startswith(PROJECT_ROOT)
+            and not any(ignored in frame.filename for ignored in IGNORED_PATHS)
+        ]
+        self.queries.append({'sql': sql, 'stack': frames[-3:]})
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """Statements issued more than once, most repeated first"""
+        counts = Counter(normalize(query['sql']) for query in self.queries)
+        stacks = defaultdict(list)
+        for query in self.queries:
+            stacks[normalize(query['sql'])].append(query['stack'])
+        return [
+            {'sql': sql, 'count': count, 'stack': stacks[sql][0]}
+            for sql, count in counts.most_common() if count > 1
+        ]
+
+
+def _request(client, context, budget, page_size):
+    user = context.next_user()
+    path = budget.path(context)
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        started = time.perf_counter()
+        response = client.get(
+            path,
+            {'page_size': page_size},
+            HTTP_AUTHORIZATION=f'Bearer {context.tokens[user.pk]}'
+        )
+        elapsed = time.perf_counter() - started
+    return elapsed, recorder, response.status_code, _page_rows(response)
+
+
+def _page_rows(response):
+    """Rows on a paginated page, or None when the body has no ``results``"""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if isinstance(body, dict) and isinstance(body.get('data'), dict):
+        body = body['data']
+    results = body.get('results') if isinstance(body, dict) else None
+    return len(results) if isinstance(results, list) else None
+
+
+def _failed(budget, failure):
+    max_queries, max_ms = _configured(budget)
+    return {
+        'route': budget.name,
+        'queries': {'small_page': None, 'large_page': None, 'budget': max_queries},
+        'median_ms': None,
+        'ms_budget': max_ms,
+        'passed': False,
+        'failures': [failure],
+        'repeated_queries': [],
+    }
+
+
+def check_route(budget, context, repeat=5):
+    """Measure one route and return its result with any failures"""
+    if budget.actors:
+        actors = budget.actors(context.prefix)
+        if not actors:
+            return _failed(budget, f'no seeded user has {LARGE_PAGE} rows to list')
+        context = context.narrowed(actors)
+    max_queries, max_ms = _configured(budget)
+    client = Client()
+    # Warm caches and connections so the first sample is not an outlier
+    _request(client, context, budget, LARGE_PAGE)
+
+    small = _request(client, context, budget, SMALL_PAGE)[1]
+    samples = [_request(client, context, budget, LARGE_PAGE) for _ in range(repeat)]
+    large = max((sample[1] for sample in samples), key=lambda r: len(r.queries))
+    median_ms = statistics.median(sample[0] for sample in samples) * 1000
+    statuses = sorted({sample[2] for sample in samples})
+    rows = [sample[3] for sample in samples if sample[3] is not None]
+
+    failures = []
+    if any(status_code >= 400 for status_code in statuses):
+        failures.append(f'returned HTTP {statuses}')
+    if budget.paginated and rows and min(rows) < LARGE_PAGE:
+        failures.append(
+            f'returned {min(rows)} rows at page size {LARGE_PAGE}, too few to measure growth'
+        )
+    if len(large.queries) > max_queries:
+        failures.append(f'{len(large.queries)} queries exceed the budget of {max_queries}')
+    if budget.paginated and len(large.queries) > len(small.queries):
+        failures.append(
+            f'query count grows with page size: {len(small.queries)} at '
+            f'{SMALL_PAGE} rows, {len(large.queries)} at {LARGE_PAGE} rows'
+        )
+    if median_ms > max_ms:
+        failures.append(f'median {median_ms:.1f}ms exceeds the budget of {max_ms}ms')
+
+    return {
+        'route': budget.name,
+        'queries': {'small_page': len(small.queries), 'large_page': len(large.queries),
+                    'budget': max_queries},
+        'median_ms': round(median_ms, 2),
+        'ms_budget': max_ms,
+        'passed': not failures,
+        'failures': failures,
+        'repeated_queries': large.repeated() if failures else [],
+    }
+
+
+def check(routes=None, prefix=None, repeat=5):
+    """Check every registered route (or only ``routes``); returns the results"""
+    context = Context(prefix) if prefix else Context()
+    selected = [budget for budget in BUDGETS if not routes or budget.name in routes]
+    setup_test_environment()
+    try:
+        return [check_route(budget, context, repeat) for budget in selected]
+    finally:
+        teardown_test_environment()
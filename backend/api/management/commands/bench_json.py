@@ -0,0 +1,147 @@
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core import fastjson
+from core.renderers import FastJSONRenderer
+
+
+def sample_feed_page(posts=10):
+    """A feed page shaped like PostSerializer output, with nested author and trending data"""
+    now = timezone.now()
+    srcset = {
+        'webp': ', '.join(f'https://cdn.example.com/p/a_{w}.webp {w}w' for w in (320, 640, 1080)),
+        'jpeg': ', '.join(f'https://cdn.example.com/p/a_{w}.jpg {w}w' for w in (320, 640, 1080)),
+        'placeholder': 'data:image/webp;base64,' + 'A' * 120,
+        'width': 1600,
+        'height': 900,
+    }
+    results = []
+    for n in range(posts):
+        created = now - timedelta(hours=n)
+        results.append({
+            'id': str(uuid.uuid4()),
+            'type': 'NEWS',
+            'title': f'Headline number {n} about the city council budget',
+            'description': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 8,
+            'image': f'posts/images/{uuid.uuid4().hex}.jpg',
+            'image_url': f'https://cdn.example.com/posts/images/{n}.jpg',
+            'cover_image_url': None,
+            'image_srcset': srcset,
+            'audio_file': None,
+            'audio_url': None,
+            'audio_info': None,
+            'author': {
+                'id': str(uuid.uuid4()),
+                'username': f'author{n}',
+                'first_name': 'Alex',
+                'last_name': 'Doe',
+                'email': f'author{n}@example.com',
+                'bio': 'Reporter covering local politics and transport. ' * 2,
+                'avatar': f'https://cdn.example.com/avatars/{n}.jpg',
+                'avatar_srcset': srcset,
+                'is_followed': n % 2 == 0,
+                'posts_count': 120 + n,
+                'followers_count': 5400 + n,
+                'following_count': 310,
+            },
+            'created_at': created.isoformat(),
+            'updated_at': created.isoformat(),
+            'comments_count': 12 * n,
+            'likes_count': 150 * n,
+            'shares_count': 3 * n,
+            'is_liked': n % 3 == 0,
+            'is_saved': False,
+            'trending_data': {
+                'score': 12.5 * n, 'view_count': 900 * n, 'like_count': 150 * n,
+                'comment_count': 12 * n, 'share_count': 3 * n,
+            },
+        })
+    return {'next': 'https://api.example.com/api/posts/feed/?cursor=abc', 'previous': None,
+            'results': results}
+
+
+def sample_events(count=10):
+    """Websocket events with native UUIDs and datetimes, as consumers send them"""
+    now = timezone.now()
+    return [
+        {
+            'type': 'chat_message',
+            'message': {
+                'id': uuid.uuid4(), 'content': f'Message {n}', 'created_at': now,
+                'sender': {'id': uuid.uuid4(), 'username': f'user{n}', 'avatar': None},
+                'is_read': False,
+            },
+        }
+        for n in range(count)
+    ]
+
+
+def _time(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+class Command(BaseCommand):
+    help = 'Compare response encode/decode time of the stock and the fast JSON layers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=10, help='Posts per feed page')
+        parser.add_argument('--output', help='Write the results to this file as JSON')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        page = sample_feed_page(options['posts'])
+        events = sample_events()
+        encoded = JSONRenderer().render(page)
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+
+        cases = {
+            'render_feed_page': (
+                lambda: stock.render(page),
+                lambda: fast.render(page),
+            ),
+            'parse_feed_page': (
+                lambda: json.loads(encoded),
+                lambda: fastjson.loads(encoded),
+            ),
+            'encode_ws_events': (
+                lambda: [json.dumps(event, cls=fastjson.JSONEncoder) for event in events],
+                lambda: [fastjson.dumps_str(event) for event in events],
+            ),
+        }
+        results = {
+            'backend': 'orjson' if fastjson.orjson else 'stdlib',
+            'payload_bytes': len(encoded),
+            'iterations': iterations,
+            'cases': {},
+        }
+        for name, (baseline, candidate) in cases.items():
+            baseline()
+            candidate()
+            before = _time(baseline, iterations)
+            after = _time(candidate, iterations)
+            results['cases'][name] = {
+                'stock_us': round(before, 2),
+                'fast_us': round(after, 2),
+                'speedup': round(before / after, 2) if after else None,
+            }
+            self.stdout.write(
+                f'{name:18} stock {before:9.2f}us  fast {after:9.2f}us  '
+                f'x{results["cases"][name]["speedup"]}'
+            )
+
+        self.stdout.write(
+            f"backend: {results['backend']}, feed page {results['payload_bytes']} bytes"
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmarks
+from api.seeding import DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'Benchmark feed, trending, search, profile and chat endpoints against seeded data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Scenario to run (repeatable); one of: '
+                 + ', '.join([s.name for s in benchmarks.HTTP_SCENARIOS] + ['chat_ws'])
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+        parser.add_argument('--chat-messages', type=int, default=100)
+        parser.add_argument('--users', type=int, default=20, help='Seeded users to act as')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Baseline JSON report to compare against')
+
+    def handle(self, *args, **options):
+        try:
+            report = benchmarks.run(
+                scenarios=options['scenarios'],
+                requests=options['requests'],
+                warmup=options['warmup'],
+                chat_messages=options['chat_messages'],
+                prefix=options['prefix'],
+                users=options['users'],
+                random_seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['compare']:
+            report['comparison'] = benchmarks.compare(report, benchmarks.load(options['compare']))
+
+        for name, result in report['scenarios'].items():
+            self.stdout.write(
+                f"{name:16} p50 {result.get('p50_ms')}ms  p95 {result.get('p95_ms')}ms  "
+                f"p99 {result.get('p99_ms')}ms  queries {result.get('queries_mean', '-')}  "
+                f"{result['throughput_rps']} req/s  errors {result['errors']}"
+            )
+            for metric, change in report.get('comparison', {}).get(name, {}).items():
+                self.stdout.write(
+                    f"    {metric}: {change['before']} -> {change['after']} ({change['change_pct']}%)"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote report to {options['output']}"))
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import budgets
+from api.seeding import DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'Check API routes against their query and latency budgets using seeded data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--route',
+            action='append',
+            dest='routes',
+            help='Route to check (repeatable); one of: '
+                 + ', '.join(budget.name for budget in budgets.BUDGETS)
+        )
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per route')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        try:
+            results = budgets.check(options['routes'], options['prefix'], options['repeat'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for result in results:
+            queries = result['queries']
+            line = (
+                f"{result['route']:14} queries {queries['small_page']}/{queries['large_page']} "
+                f"(budget {queries['budget']})  median {result['median_ms']}ms "
+                f"(budget {result['ms_budget']}ms)"
+            )
+            if result['passed']:
+                self.stdout.write(self.style.SUCCESS(f'PASS {line}'))
+                continue
+            self.stdout.write(self.style.ERROR(f'FAIL {line}'))
+            for failure in result['failures']:
+                self.stdout.write(f'    {failure}')
+            for query in result['repeated_queries']:
+                self.stdout.write(f"    {query['count']}x {query['sql'][:200]}")
+                for frame in query['stack']:
+                    self.stdout.write(f'        at {frame}')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+
+        failed = [result['route'] for result in results if not result['passed']]
+        if failed:
+            raise CommandError(f"Over budget: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} routes within budget'))
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api import seeding
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic production-scale dataset with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--follows', type=int, default=30,
+            help='Average number of accounts each user follows'
+        )
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--likes', type=int, default=50000)
+        parser.add_argument('--saves', type=int, default=40, help='Saved posts per user')
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--notifications', type=int, default=20000)
+        parser.add_argument('--rooms', type=int, default=500)
+        parser.add_argument('--messages', type=int, default=20000)
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Spread creation times over this many days'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Power-law exponent of follow, post and like popularity'
+        )
+        parser.add_argument('--prefix', default=seeding.DEFAULT_PREFIX)
+        parser.add_argument('--seed', type=int, help='Random seed for a reproducible dataset')
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Delete the dataset with this prefix before seeding'
+        )
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            removed = seeding.flush(options['prefix'])
+            self.stdout.write(f'Removed {removed} seeded users and their data')
+
+        report = seeding.seed(
+            users=options['users'],
+            follows=options['follows'],
+            posts=options['posts'],
+            likes=options['likes'],
+            saves=options['saves'],
+            comments=options['comments'],
+            notifications=options['notifications'],
+            rooms=options['rooms'],
+            messages=options['messages'],
+            days=options['days'],
+            alpha=options['alpha'],
+            prefix=options['prefix'],
+            random_seed=options['seed'],
+        )
+        for stage, result in report.items():
+            self.stdout.write(f"{stage}: {result['rows']} rows in {result['seconds']}s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded dataset {options['prefix']!r}; users log in with password "
+            f"{seeding.DEFAULT_PASSWORD!r}"
+        ))
+        self.stdout.write(json.dumps(report))
@@ -0,0 +1,283 @@
+"""
+Synthetic production-scale dataset.
+
+``seed()`` fills the database with users, follow edges, posts, likes,
+saves, comments, notifications and chat rooms/messages using bulk inserts only.
+Popularity follows a power law: a few accounts attract most follows and
+chat rooms and a few posts most likes and comments, like the real workload. Every seeded
+user's username starts with ``prefix`` so ``flush()`` can remove a dataset
+again (everything else cascades from the users).
+
+Rows inserted with ``bulk_create`` skip ``save()`` and signals, so the
+work those would do (user profiles, comment paths, denormalized counters,
+trending scores) is done here in bulk as well.
+"""
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from chat.models import ChatRoom, Message
+from posts.counters import actual_counts
+from posts.models import Comment, Post, PostInteraction, TrendingScore
+from posts.threads import assign_path
+from posts.trending import recompute_scores
+from users.models import Notification, UserProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFIX = 'seed_'
+DEFAULT_PASSWORD = 'benchmark'
+BATCH_SIZE = 5000
+
+WORDS = (
+    'market', 'city', 'music', 'release', 'update', 'league', 'weather', 'album',
+    'report', 'science', 'launch', 'festival', 'policy', 'season', 'review',
+    'travel', 'studio', 'energy', 'health', 'design', 'startup', 'podcast',
+)
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _power_law_weights(count, alpha):
+    """Zipf-like weights: item ``i`` is drawn with probability ~ 1 / (i + 1)^alpha"""
+    return [1.0 / (rank + 1) ** alpha for rank in range(count)]
+
+
+def _bulk(model, rows, **kwargs):
+    for start in range(0, len(rows), BATCH_SIZE):
+        model.objects.bulk_create(rows[start:start + BATCH_SIZE], **kwargs)
+
+
+def _spread(now, rng, days):
+    return now - timedelta(seconds=rng.uniform(0, days * 86400))
+
+
+def _seed_users(rng, count, prefix, now, days):
+    User = get_user_model()
+    password = make_password(DEFAULT_PASSWORD)
+    start = User.objects.filter(username__startswith=prefix).count()
+    users = [
+        User(
+            username=f'{prefix}{start + n}',
+            email=f'{prefix}{start + n}@example.com',
+            password=password,
+            first_name=rng.choice(WORDS).title(),
+            bio=_sentence(rng, 8),
+        )
+        for n in range(count)
+    ]
+    _bulk(User, users)
+    # date_joined is auto_now_add, so spread it out afterwards
+    for user in users:
+        user.date_joined = _spread(now, rng, days)
+    User.objects.bulk_update(users, ['date_joined'], batch_size=BATCH_SIZE)
+    # The post_save signal that creates profiles does not fire for bulk_create
+    _bulk(UserProfile, [UserProfile(user=user) for user in users])
+    return users
+
+
+def _seed_follows(rng, users, average, alpha):
+    User = get_user_model()
+    weights = _power_law_weights(len(users), alpha)
+    edges = set()
+    for follower in users:
+        degree = min(len(users) - 1, max(0, int(rng.expovariate(1 / average)) if average else 0))
+        for followed in rng.choices(users, weights=weights, k=degree):
+            if followed.pk != follower.pk:
+                edges.add((follower.pk, followed.pk))
+    Through = User.following.through
+    _bulk(Through, [
+        Through(from_user_id=follower, to_user_id=followed) for follower, followed in edges
+    ], ignore_conflicts=True)
+    return len(edges)
+
+
+def _seed_posts(rng, users, count, alpha, now, days):
+    weights = _power_law_weights(len(users), alpha)
+    authors = rng.choices(users, weights=weights, k=count)
+    posts = [
+        Post(
+            author=author,
+            type='NEWS',
+            title=_sentence(rng, 6),
+            description=_sentence(rng, 40),
+        )
+        for author in authors
+    ]
+    _bulk(Post, posts)
+    for post in posts:
+        post.created_at = _spread(now, rng, days)
+    Post.objects.bulk_update(posts, ['created_at'], batch_size=BATCH_SIZE)
+    _bulk(TrendingScore, [TrendingScore(post=post) for post in posts])
+    return posts
+
+
+def _seed_likes(rng, users, posts, count, alpha):
+    weights = _power_law_weights(len(posts), alpha)
+    pairs = {
+        (rng.choice(users).pk, post.pk)
+        for post in rng.choices(posts, weights=weights, k=count)
+    }
+    Through = Post.likes.through
+    _bulk(Through, [Through(user_id=user, post_id=post) for user, post in pairs], ignore_conflicts=True)
+    return len(pairs)
+
+
+def _seed_saves(rng, users, posts, per_user, alpha):
+    weights = _power_law_weights(len(posts), alpha)
+    pairs = {
+        (user.pk, post.pk)
+        for user in users
+        for post in rng.choices(posts, weights=weights, k=per_user)
+    }
+    _bulk(PostInteraction, [
+        PostInteraction(user_id=user, post_id=post, interaction_type='SAVE')
+        for user, post in pairs
+    ], ignore_conflicts=True)
+    return len(pairs)
+
+
+def _seed_comments(rng, users, posts, count, alpha, reply_ratio):
+    weights = _power_law_weights(len(posts), alpha)
+    roots = []
+    for post in rng.choices(posts, weights=weights, k=count - int(count * reply_ratio)):
+        comment = Comment(post=post, author=rng.choice(users), content=_sentence(rng, 12))
+        assign_path(comment)
+        roots.append(comment)
+    replies = []
+    for _ in range(int(count * reply_ratio) if roots else 0):
+        parent = rng.choice(roots)
+        comment = Comment(
+            post_id=parent.post_id, parent=parent,
+            author=rng.choice(users), content=_sentence(rng, 10)
+        )
+        assign_path(comment)
+        replies.append(comment)
+    # save() normally fills in the thread path; bulk_create bypasses it
+    _bulk(Comment, roots)
+    _bulk(Comment, replies)
+    return len(roots) + len(replies)
+
+
+def _seed_notifications(rng, users, count):
+    _bulk(Notification, [
+        Notification(
+            recipient=rng.choice(users),
+            sender=rng.choice(users),
+            notification_type=rng.choice(('LIKE', 'COMMENT', 'FOLLOW')),
+            message=_sentence(rng, 6),
+            is_read=rng.random() < 0.5,
+        )
+        for _ in range(count)
+    ])
+    return count
+
+
+def _seed_rooms(rng, users, count, alpha):
+    """One-to-one rooms; one side is drawn by popularity, so a few users have many rooms"""
+    if len(users) < 2:
+        return []
+    rooms = [ChatRoom() for _ in range(count)]
+    _bulk(ChatRoom, rooms)
+    Through = ChatRoom.participants.through
+    weights = _power_law_weights(len(users), alpha)
+    rows = []
+    for room in rooms:
+        popular = rng.choices(users, weights=weights)[0]
+        other = rng.choice(users)
+        while other.pk == popular.pk:
+            other = rng.choice(users)
+        room.members = [popular, other]
+        rows.extend(Through(chatroom_id=room.pk, user_id=user.pk) for user in room.members)
+    _bulk(Through, rows)
+    return rooms
+
+
+def _seed_messages(rng, rooms, count):
+    if not rooms:
+        return 0
+    _bulk(Message, [
+        Message(room=room, sender=rng.choice(room.members), content=_sentence(rng, 10))
+        for room in rng.choices(rooms, k=count)
+    ])
+    return count
+
+
+def _refresh_counters(users, posts):
+    """Recompute post and profile counters that bulk inserts left at zero"""
+    User = get_user_model()
+    post_ids = [post.pk for post in posts]
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        Post.objects.filter(pk__in=post_ids[start:start + BATCH_SIZE]).update(**actual_counts())
+
+    def count_of(queryset, column):
+        return Coalesce(
+            Subquery(
+                queryset.order_by().values(column).annotate(total=Count('*')).values('total')
+            ),
+            Value(0)
+        )
+
+    Through = User.following.through
+    user_ids = [user.pk for user in users]
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        UserProfile.objects.filter(user_id__in=user_ids[start:start + BATCH_SIZE]).update(
+            post_count=count_of(Post.objects.filter(author_id=OuterRef('user_id')), 'author_id'),
+            follower_count=count_of(Through.objects.filter(to_user_id=OuterRef('user_id')), 'to_user_id'),
+            following_count=count_of(Through.objects.filter(from_user_id=OuterRef('user_id')), 'from_user_id'),
+        )
+    return len(post_ids) + len(user_ids)
+
+
+def seed(users=1000, follows=30, posts=10000, likes=50000, saves=40, comments=20000,
+         notifications=20000, rooms=500, messages=20000, days=30, alpha=1.1,
+         reply_ratio=0.3, prefix=DEFAULT_PREFIX, random_seed=None):
+    """Insert a synthetic dataset and return per-stage counts and timings"""
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    report = {}
+
+    def stage(name, build):
+        started = time.monotonic()
+        with transaction.atomic():
+            result = build()
+        report[name] = {'rows': result if isinstance(result, int) else len(result),
+                        'seconds': round(time.monotonic() - started, 3)}
+        logger.info("Seeded %s %s in %ss", report[name]['rows'], name, report[name]['seconds'])
+        return result
+
+    seeded_users = stage('users', lambda: _seed_users(rng, users, prefix, now, days))
+    stage('follows', lambda: _seed_follows(rng, seeded_users, follows, alpha))
+    seeded_posts = stage('posts', lambda: _seed_posts(rng, seeded_users, posts, alpha, now, days))
+    if seeded_posts:
+        stage('likes', lambda: _seed_likes(rng, seeded_users, seeded_posts, likes, alpha))
+        stage('saves', lambda: _seed_saves(rng, seeded_users, seeded_posts, saves, alpha))
+        stage('comments', lambda: _seed_comments(
+            rng, seeded_users, seeded_posts, comments, alpha, reply_ratio
+        ))
+    stage('notifications', lambda: _seed_notifications(rng, seeded_users, notifications))
+    seeded_rooms = stage('chat_rooms', lambda: _seed_rooms(rng, seeded_users, rooms, alpha))
+    stage('messages', lambda: _seed_messages(rng, seeded_rooms, messages))
+    stage('counters', lambda: _refresh_counters(seeded_users, seeded_posts))
+    stage('trending', lambda: recompute_scores([post.pk for post in seeded_posts])['rows'])
+    return report
+
+
+def flush(prefix=DEFAULT_PREFIX):
+    """Delete a seeded dataset; returns the number of users removed"""
+    users = get_user_model().objects.filter(username__startswith=prefix)
+    count = users.count()
+    with transaction.atomic():
+        ChatRoom.objects.filter(participants__username__startswith=prefix).delete()
+        users.delete()
+    return count
@@ -2,7 +2,8 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from .models import ChatRoom, Message
-import json
+from core import fastjson
+from core.media_urls import MediaURLs
 
 User = get_user_model()
 
@@ -65,7 +66,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def receive(self, text_data):
         try:
-            data = json.loads(text_data)
+            data = fastjson.loads(text_data)
             message_type = data.get('type')
             
             if message_type == 'chat_message':
@@ -85,25 +86,25 @@ class ChatConsumer(AsyncWebsocketConsumer):
                                 'sender': {
                                     'id': str(message.sender.id),
                                     'username': message.sender.username,
-                                    'avatar': message.sender.avatar.url if message.sender.avatar else None
+                                    'avatar': MediaURLs().url(message.sender.avatar)
                                 },
                                 'created_at': message.created_at.isoformat(),
                                 'is_read': message.is_read
                             }
                         }
                     )
-        except json.JSONDecodeError:
+        except ValueError:
             pass
 
     async def chat_message(self, event):
         message = event['message']
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             'type': 'chat_message',
             'message': message
         }))
 
     async def user_status(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             'type': 'user_status',
             'user_id': event['user_id'],
             'status': event['status']
@@ -2,6 +2,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import ChatRoom, Message
+from core.media_urls import get_media_urls
 
 User = get_user_model()
 
@@ -13,9 +14,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'avatar_url']
 
     def get_avatar_url(self, obj):
-        if obj.avatar:
-            return obj.avatar.url
-        return None
+        return get_media_urls(self.context, relative=True).url(obj.avatar)
 
 class MessageSerializer(serializers.ModelSerializer):
     class Meta:
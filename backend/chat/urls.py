@@ -30,6 +30,10 @@ urlpatterns = [
     path('rooms/<uuid:room_pk>/messages/<uuid:pk>/mark-read/', views.MessageViewSet.as_view({
         'post': 'mark_read'
     }), name='message-mark-read'),
+
+    path('rooms/<uuid:room_pk>/messages/<uuid:pk>/attachment/', views.MessageViewSet.as_view({
+        'get': 'attachment'
+    }), name='message-attachment'),
     
     # Include the router URLs
     path('', include(router.urls)),
@@ -8,10 +8,13 @@ from django.core.exceptions import PermissionDenied
 from .models import ChatRoom, Message
 from .serializers import ChatRoomSerializer, MessageSerializer
 from users.models import User
+from core.media import serve_media
+from core.pagination import KeysetPagination
 
 class ChatRoomViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChatRoomSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         return ChatRoom.objects.filter(
@@ -92,6 +95,22 @@ class MessageViewSet(viewsets.ModelViewSet):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
+
+    def attachment(self, request, room_pk=None, pk=None):
+        """Serve a message attachment with Range support to room participants only"""
+        room = get_object_or_404(ChatRoom, id=room_pk)
+        if not room.participants.filter(id=request.user.id).exists():
+            raise PermissionDenied("You are not a participant of this chat room")
+
+        message = get_object_or_404(
+            Message.objects.only('id', 'attachment'), id=pk, room_id=room_pk
+        )
+        if not message.attachment:
+            return Response({
+                'success': False,
+                'message': 'This message has no attachment'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return serve_media(request, message.attachment.name, cache_control='private, max-age=3600')
     
     def perform_create(self, serializer):
         room = get_object_or_404(ChatRoom, id=self.kwargs.get('room_pk'))
@@ -0,0 +1,165 @@
+"""
+Audio analysis and streaming renditions.
+
+Runs in Celery after an AUDIO post is stored: the source is copied from
+storage to a temporary file and probed with ffprobe for duration, bitrate,
+channels and sample rate. Waveform peaks are computed with NumPy from a
+mono, downsampled ffmpeg decode read in chunks, and a bitrate-capped MP3
+rendition for streaming is encoded by ffmpeg straight from the file, so a
+track is never held in memory as a whole.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from pydub.utils import get_encoder_name, mediainfo
+
+logger = logging.getLogger(__name__)
+
+AUDIO_WAVEFORM_PEAKS = getattr(settings, 'AUDIO_WAVEFORM_PEAKS', 200)
+AUDIO_STREAM_BITRATE = getattr(settings, 'AUDIO_STREAM_BITRATE', 128000)
+# Sample rate of the decode the peaks are computed from; plenty for a waveform
+PEAKS_SAMPLE_RATE = 8000
+# Bytes of 16-bit PCM read from ffmpeg at a time
+PEAKS_CHUNK_BYTES = 1 << 20
+FULL_SCALE = float(1 << 15)
+
+
+def _reduce(maxima, buckets):
+    """Max-pool ``maxima`` down to ``buckets`` values"""
+    if maxima.size <= buckets:
+        return maxima
+    bucket_size = -(-maxima.size // buckets)
+    padded = np.zeros(bucket_size * buckets, dtype=np.float32)
+    padded[:maxima.size] = maxima
+    return padded.reshape(buckets, bucket_size).max(axis=1)
+
+
+def waveform_peaks(path, duration, buckets=AUDIO_WAVEFORM_PEAKS):
+    """
+    ``buckets`` peak amplitudes in ``[0, 1]`` of the audio at ``path``, from
+    a mono ``PEAKS_SAMPLE_RATE`` decode streamed from ffmpeg. Memory use is
+    bounded by the chunk size whatever the length of the track.
+    """
+    expected = max(1, int(duration * PEAKS_SAMPLE_RATE))
+    block = max(1, -(-expected // buckets))
+    command = [
+        get_encoder_name(), '-v', 'error', '-i', path,
+        '-vn', '-ac', '1', '-ar', str(PEAKS_SAMPLE_RATE), '-f', 's16le', '-',
+    ]
+    maxima = []
+    carry = np.empty(0, dtype=np.float32)
+    pending = b''
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+        while True:
+            data = process.stdout.read(PEAKS_CHUNK_BYTES)
+            if not data:
+                break
+            data = pending + data
+            # Keep an odd trailing byte for the next read
+            whole = len(data) - len(data) % 2
+            data, pending = data[:whole], data[whole:]
+            samples = np.abs(np.frombuffer(data, dtype='<i2').astype(np.float32))
+            samples = np.concatenate((carry, samples))
+            count = samples.size // block
+            if count:
+                maxima.append(samples[:count * block].reshape(count, block).max(axis=1))
+            carry = samples[count * block:]
+        if process.wait() != 0:
+            raise RuntimeError(f'ffmpeg could not decode {path}')
+    if carry.size:
+        maxima.append(carry.max(keepdims=True))
+    if not maxima:
+        return []
+
+    peaks = _reduce(np.concatenate(maxima), buckets)
+    return np.round(peaks / FULL_SCALE, 3).tolist()
+
+
+def _bitrate(path, info, duration):
+    """Container bitrate from ffprobe, estimated from the file size if missing"""
+    try:
+        bitrate = int(info.get('bit_rate') or 0)
+    except (TypeError, ValueError):
+        bitrate = 0
+    if not bitrate and duration:
+        bitrate = int(os.path.getsize(path) * 8 / duration)
+    return bitrate
+
+
+def _rendition_name(name):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return f'{directory}/renditions/{stem}_{AUDIO_STREAM_BITRATE // 1000}k.mp3'
+
+
+def _encode_rendition(source_path, rendition_path):
+    subprocess.run(
+        [
+            get_encoder_name(), '-v', 'error', '-y', '-i', source_path,
+            '-vn', '-codec:a', 'libmp3lame', '-b:a', f'{AUDIO_STREAM_BITRATE // 1000}k',
+            rendition_path,
+        ],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+
+
+def analyze(name, storage=None):
+    """
+    Analyze the audio stored at ``name`` and return its metadata document::
+
+        {'duration': 183.2, 'bitrate': 320000, 'channels': 2,
+         'sample_rate': 44100, 'peaks': [...], 'stream': 'posts/audio/...mp3'}
+    """
+    storage = storage or default_storage
+    extension = os.path.splitext(name)[1]
+    with tempfile.TemporaryDirectory() as workdir:
+        source_path = os.path.join(workdir, f'source{extension}')
+        with storage.open(name, 'rb') as source, open(source_path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+
+        info = mediainfo(source_path)
+        duration = float(info.get('duration') or 0)
+        bitrate = _bitrate(source_path, info, duration)
+
+        stream = None
+        if bitrate > AUDIO_STREAM_BITRATE or extension.lower() != '.mp3':
+            rendition_path = os.path.join(workdir, 'stream.mp3')
+            _encode_rendition(source_path, rendition_path)
+            rendition_name = _rendition_name(name)
+            if storage.exists(rendition_name):
+                storage.delete(rendition_name)
+            with open(rendition_path, 'rb') as rendition:
+                stream = storage.save(rendition_name, File(rendition))
+
+        metadata = {
+            'duration': round(duration, 3),
+            'bitrate': bitrate,
+            'channels': int(info.get('channels') or 0),
+            'sample_rate': int(info.get('sample_rate') or 0),
+            'peaks': waveform_peaks(source_path, duration),
+            'stream': stream,
+        }
+
+    logger.info(
+        "Analyzed audio %s: %ss, %s bps, %s channels",
+        name, metadata['duration'], metadata['bitrate'], metadata['channels']
+    )
+    return metadata
+
+
+def delete_rendition(metadata, storage=None):
+    """Remove the streaming rendition listed in a metadata document"""
+    storage = storage or default_storage
+    stream = (metadata or {}).get('stream')
+    if stream:
+        try:
+            storage.delete(stream)
+        except Exception as e:
+            logger.warning(f"Error deleting audio rendition {stream}: {e}")
@@ -0,0 +1,54 @@
+"""
+Versioned cache namespaces.
+
+Every namespace (e.g. ``search``) has a generation counter stored in the
+cache. Keys built with ``versioned_key`` embed the current generation of
+each namespace they depend on, so invalidating a namespace is a single counter bump: entries written
+under the old generation are never read again and simply age out by TTL.
+This replaces ``delete_pattern`` scans over the whole keyspace.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'ns:{name}:version'
+
+SEARCH = 'search'
+
+
+def _initial_version():
+    # Seed from the clock so a counter that was evicted never restarts at a
+    # generation whose entries might still be cached
+    return int(time.time() * 1000)
+
+
+def get_versions(*names):
+    """Return ``{name: generation}`` for the given namespaces in one round trip"""
+    keys = {VERSION_KEY.format(name=name): name for name in names}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, name in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _initial_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[name] = version
+    return versions
+
+
+def versioned_key(key, namespaces):
+    """Build a cache key bound to the current generation of each namespace"""
+    versions = get_versions(*namespaces)
+    stamp = ','.join(f'{name}.{versions[name]}' for name in namespaces)
+    return f'{key}@{stamp}'
+
+
+def bump(*names):
+    """Invalidate every entry cached under the given namespaces in O(1) each"""
+    for name in names:
+        key = VERSION_KEY.format(name=name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
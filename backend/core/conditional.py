@@ -0,0 +1,65 @@
+"""
+Conditional GET support for API views.
+
+Views compute a weak ``ETag`` (and optionally a ``Last-Modified`` time)
+from cheap version data such as ``updated_at``, counters and the viewer's
+flags, call ``not_modified()`` before serializing anything, and ``tag()``
+the full response otherwise. A matching ``If-None-Match`` (or, without one,
+an ``If-Modified-Since`` at or after ``last_modified``) is answered with an
+empty ``304 Not Modified``. Responses vary on ``Authorization`` because
+most payloads include viewer-specific fields.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """Weak ETag from the ``repr`` of ``parts``"""
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag):
+    # Weak comparison (RFC 9110 8.8.3.2) ignores the W/ prefix
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def is_not_modified(request, etag=None, last_modified=None):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        if etag is None:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    mtime = _timestamp(last_modified)
+    return since is not None and mtime is not None and mtime <= since
+
+
+def tag(response, etag=None, last_modified=None):
+    """Attach validators to a response"""
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    response['Cache-Control'] = CACHE_CONTROL
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """A ``304`` response when the client's copy is current, otherwise None"""
+    if not is_not_modified(request, etag, last_modified):
+        return None
+    return tag(HttpResponseNotModified(), etag, last_modified)
@@ -5,6 +5,8 @@ from enum import Enum
 from django.core.exceptions import ValidationError
 from rest_framework import status
 from django.core.cache import cache
+from rest_framework.response import Response
+from .cache import versioned_key
 from .utils.response import api_response, error_response
 from functools import wraps
 
@@ -19,21 +21,36 @@ class ErrorCode(Enum):
     AUTHENTICATION_ERROR = "AUTHENTICATION_ERROR"
     BAD_REQUEST = "BAD_REQUEST"
 
-def cache_response(timeout=300):
+def cache_response(timeout=300, namespaces=()):
     """
-    Cache the response of a view for a specified time
+    Cache the response of a view for a specified time.
+
+    ``namespaces`` lists the cache namespaces (see ``core.cache``) the
+    response depends on, or is a callable ``(view, request, *args, **kwargs)``
+    returning them. Bumping any of them invalidates the cached response.
     """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(view, request, *args, **kwargs):
+            if request.method != 'GET':
+                return func(view, request, *args, **kwargs)
+
+            names = namespaces(view, request, *args, **kwargs) if callable(namespaces) else namespaces
             # Generate cache key
-            cache_key = f"{func.__name__}:{request.path}:{request.user.id}"
+            cache_key = versioned_key(
+                f"{func.__name__}:{request.get_full_path()}:{request.user.id}",
+                tuple(names)
+            )
             
             # Try to get from cache
-            response = cache.get(cache_key)
-            if response is None:
-                response = func(view, request, *args, **kwargs)
-                cache.set(cache_key, response, timeout)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                data, status_code = cached
+                return Response(data, status=status_code)
+
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(cache_key, (response.data, response.status_code), timeout)
             return response
         return wrapper
     return decorator
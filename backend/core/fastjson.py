@@ -0,0 +1,68 @@
+"""
+Fast JSON encoding and decoding.
+
+Uses orjson when it is installed and the standard library otherwise.
+UUIDs, dates and datetimes (UTC as ``Z``), timedeltas, Decimals, lazy
+translation strings, sets and other iterables are encoded like DRF's
+``JSONEncoder`` does. orjson differs in a few edge cases: datetimes keep
+their microseconds, dict keys may be UUIDs or other non-string types (the
+stdlib encoder rejects those) and integers wider than 64 bits raise
+``TypeError``. Used by the DRF renderer/parser in ``core.renderers``, which
+falls back to DRF's encoder on ``TypeError``, and by the websocket consumers.
+"""
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils.functional import Promise
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib path is always available
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def _default(obj):
+    """Types orjson does not encode natively, handled like DRF's encoder"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        # numpy arrays and scalars
+        return obj.tolist()
+    if hasattr(obj, '__getitem__') and hasattr(obj, 'keys'):
+        return dict(obj)
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(obj):
+    """Encode ``obj`` as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(
+        obj, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def dumps_str(obj):
+    """Encode ``obj`` as a JSON string, e.g. for websocket text frames"""
+    return dumps(obj).decode('utf-8')
+
+
+def loads(data):
+    """Decode JSON from bytes or str; raises ``ValueError`` on invalid input"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
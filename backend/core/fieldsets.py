@@ -0,0 +1,180 @@
+"""
+Sparse fieldsets.
+
+``?fields=`` limits a response to the listed fields and ``?expand=`` names
+nested relations to render in full. Dotted names reach into nested
+serializers, e.g. ``?fields=id,title,image_url,author.username``. In a
+sparse response, a relation listed in the serializer's
+``Meta.expandable_fields`` is rendered as its primary key unless it is
+expanded or given subfields. Without ``?fields=`` serializers render their
+usual output.
+
+``project()`` pushes the same selection down to the queryset: only the
+columns the selected fields read are loaded (``.only()``) and only the
+relations that are rendered are joined (``select_related``). Serializers
+describe what their computed fields read with ``Meta.field_sources`` and
+the columns every row needs (e.g. for viewer state) with
+``Meta.required_columns``.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+CONTEXT_KEY = 'fieldset'
+
+# A relation rendered as its primary key
+COLLAPSED = 'collapsed'
+
+
+def parse(value):
+    """``'a,b.c'`` -> ``{'a': {}, 'b': {'c': {}}}``"""
+    tree = {}
+    for name in (value or '').split(','):
+        node = tree
+        for part in name.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class Fieldset:
+    """A field selection; ``fields`` is None when every field is wanted"""
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields or None
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        return cls(parse(params.get(FIELDS_PARAM)), parse(params.get(EXPAND_PARAM)))
+
+    @property
+    def sparse(self):
+        return self.fields is not None
+
+    def child(self, name, expandable=False):
+        """
+        How field ``name`` is rendered: None when it is not selected,
+        ``COLLAPSED`` for a relation shown as its primary key, otherwise the
+        fieldset of its nested serializer
+        """
+        if not self.sparse:
+            return Fieldset(expand=self.expand.get(name))
+        if name not in self.fields and name not in self.expand:
+            return None
+        subfields = self.fields.get(name)
+        if expandable and name not in self.expand and not subfields:
+            return COLLAPSED
+        return Fieldset(subfields, self.expand.get(name))
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin rendering only the selected fields. A top-level
+    serializer reads the fieldset from its context (see ``FieldsetViewMixin``);
+    nested ones get theirs from the parent.
+    """
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fieldset = fieldset
+
+    @property
+    def fieldset(self):
+        if self._fieldset is None:
+            parent = getattr(self, 'parent', None)
+            if isinstance(parent, serializers.ListSerializer):
+                parent = parent.parent
+            if parent is None:
+                self._fieldset = self.context.get(CONTEXT_KEY)
+        return self._fieldset or Fieldset()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.fieldset
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        selected = {}
+        for name, field in fields.items():
+            choice = fieldset.child(name, name in expandable)
+            if choice is None:
+                continue
+            if choice is COLLAPSED:
+                kwargs = {'source': field.source} if field.source not in (None, name) else {}
+                field = serializers.PrimaryKeyRelatedField(read_only=True, **kwargs)
+            elif isinstance(field, serializers.BaseSerializer):
+                field._fieldset = choice
+            selected[name] = field
+        return selected
+
+
+class FieldsetViewMixin:
+    """View mixin passing the ``?fields=``/``?expand=`` of GET requests to serializers"""
+
+    @cached_property
+    def fieldset(self):
+        if self.request.method != 'GET':
+            return Fieldset()
+        return Fieldset.from_request(self.request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context[CONTEXT_KEY] = self.fieldset
+        return context
+
+    def project(self, queryset, serializer_class=None, extra=()):
+        return project(
+            queryset, serializer_class or self.get_serializer_class(), self.fieldset, extra
+        )
+
+
+def _is_column(model, name):
+    try:
+        return model._meta.get_field(name).concrete
+    except FieldDoesNotExist:
+        return False
+
+
+def _projection(serializer, prefix=''):
+    """``(columns, joins)`` read by the fields of ``serializer``"""
+    meta = serializer.Meta
+    model = meta.model
+    field_sources = getattr(meta, 'field_sources', {})
+    columns = [model._meta.pk.name, *getattr(meta, 'required_columns', ())]
+    columns = [prefix + column for column in columns]
+    joins = []
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.ListSerializer):
+            continue
+        if isinstance(field, serializers.BaseSerializer):
+            relation = prefix + field.source
+            joins.append(relation)
+            if _is_column(model, field.source):
+                columns.append(relation)
+            nested_columns, nested_joins = _projection(field, relation + '__')
+            columns += nested_columns
+            joins += nested_joins
+            continue
+        for source in field_sources.get(name, (field.source,)):
+            if _is_column(model, source):
+                columns.append(prefix + source)
+    return columns, joins
+
+
+def project(queryset, serializer_class, fieldset, extra=()):
+    """
+    Load only the columns and joins ``serializer_class`` reads for
+    ``fieldset``, plus the ordering columns pagination needs and ``extra``.
+    Querysets of full (non-sparse) requests are returned unchanged.
+    """
+    if not fieldset.sparse:
+        return queryset
+    columns, joins = _projection(serializer_class(fieldset=fieldset))
+    model = queryset.model
+    ordering = [*queryset.query.order_by, *model._meta.ordering, *extra]
+    for field in ordering:
+        if isinstance(field, str) and _is_column(model, field.lstrip('-')):
+            columns.append(field.lstrip('-'))
+    return queryset.select_related(None).select_related(*joins).only(*dict.fromkeys(columns))
@@ -0,0 +1,148 @@
+"""
+Responsive image derivatives.
+
+Uploaded images are stored untouched and then processed off the request
+path by Celery: every source image gets fixed-width renditions in WebP and
+JPEG (EXIF and other metadata are never copied over) and a tiny inline
+LQIP placeholder. The result is a small JSON document stored next to the
+image field; serializers turn it into ``srcset`` strings with ``srcset()``.
+"""
+import base64
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANT_WIDTHS = getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 1080))
+AVATAR_VARIANT_WIDTHS = getattr(settings, 'AVATAR_VARIANT_WIDTHS', (64, 128, 256))
+LQIP_WIDTH = getattr(settings, 'IMAGE_LQIP_WIDTH', 16)
+
+# format name -> (Pillow format, file extension, save options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def _open(name, storage):
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image.load()
+    # Apply the EXIF orientation before the metadata is dropped
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    return image
+
+
+def _encode(image, fmt):
+    pil_format, _, options = VARIANT_FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    # No exif/icc arguments are passed, so no metadata is written
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def _resized(image, width):
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def placeholder(image):
+    """Base64 data URI of a tiny blurred-up preview"""
+    preview = _resized(image, LQIP_WIDTH)
+    data = _encode(preview, 'webp')
+    return 'data:image/webp;base64,' + base64.b64encode(data).decode()
+
+
+def normalize(name, max_size=1000, storage=None):
+    """
+    Re-encode an image in place as a metadata-free JPEG no larger than
+    ``max_size`` on either side. Returns the new storage name.
+    """
+    storage = storage or default_storage
+    image = _open(name, storage)
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    stem = os.path.splitext(name)[0]
+    new_name = storage.save(f'{stem}.jpg', ContentFile(_encode(image, 'jpeg')))
+    if new_name != name:
+        storage.delete(name)
+    return new_name
+
+
+def build_variants(name, widths=IMAGE_VARIANT_WIDTHS, storage=None):
+    """
+    Render every width in ``widths`` (capped at the source width) in each
+    variant format and return the variants document::
+
+        {'width': 1600, 'height': 900, 'placeholder': 'data:...',
+         'sizes': {'320': {'webp': 'posts/images/variants/ab_320.webp', ...}}}
+    """
+    storage = storage or default_storage
+    image = _open(name, storage)
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+
+    targets = sorted({min(width, image.width) for width in widths})
+    sizes = {}
+    for width in targets:
+        rendition = _resized(image, width)
+        paths = {}
+        for fmt, (_, extension, _) in VARIANT_FORMATS.items():
+            path = f'{directory}/variants/{stem}_{width}.{extension}'
+            if storage.exists(path):
+                storage.delete(path)
+            paths[fmt] = storage.save(path, ContentFile(_encode(rendition, fmt)))
+        sizes[str(width)] = paths
+
+    return {
+        'width': image.width,
+        'height': image.height,
+        'placeholder': placeholder(image),
+        'sizes': sizes,
+    }
+
+
+def delete_variants(variants, storage=None):
+    """Remove the files listed in a variants document"""
+    storage = storage or default_storage
+    for paths in (variants or {}).get('sizes', {}).values():
+        for path in paths.values():
+            try:
+                storage.delete(path)
+            except Exception as e:
+                logger.warning(f"Error deleting image variant {path}: {e}")
+
+
+def srcset(variants, build_url):
+    """
+    ``srcset`` map for a variants document, e.g.
+    ``{'webp': 'https://.../a_320.webp 320w, ...', 'jpeg': ..., 'placeholder': ...}``.
+    ``build_url`` turns a storage name into a URL. Returns None until the
+    variants have been generated.
+    """
+    if not variants or not variants.get('sizes'):
+        return None
+    widths = sorted(variants['sizes'], key=int)
+    result = {
+        fmt: ', '.join(
+            f"{build_url(variants['sizes'][width][fmt])} {width}w" for width in widths
+        )
+        for fmt in VARIANT_FORMATS
+    }
+    result.update({
+        'placeholder': variants.get('placeholder'),
+        'width': variants.get('width'),
+        'height': variants.get('height'),
+    })
+    return result
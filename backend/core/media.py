@@ -0,0 +1,164 @@
+"""
+Media serving with HTTP range support.
+
+``serve_media`` answers a GET/HEAD for a file in storage with ``ETag`` and
+``Last-Modified`` validators, ``304 Not Modified`` for conditional requests,
+and ``206 Partial Content`` for ``Range`` requests (honouring ``If-Range``),
+so players can seek without downloading the file from the start. The body
+is streamed from storage in bounded chunks.
+
+When a front proxy is configured, the response is handed off instead:
+``MEDIA_ACCEL_REDIRECT_PREFIX`` emits an nginx ``X-Accel-Redirect`` and
+``MEDIA_USE_SENDFILE`` emits ``X-Sendfile``; the proxy then does the byte
+serving. Callers are responsible for access checks before calling this.
+"""
+import mimetypes
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+MEDIA_STREAM_CHUNK_SIZE = getattr(settings, 'MEDIA_STREAM_CHUNK_SIZE', 64 * 1024)
+MEDIA_ACCEL_REDIRECT_PREFIX = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+MEDIA_USE_SENDFILE = getattr(settings, 'MEDIA_USE_SENDFILE', False)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _stat(name, storage):
+    size = storage.size(name)
+    try:
+        modified = storage.get_modified_time(name)
+    except (NotImplementedError, AttributeError):
+        modified = None
+    mtime = int(modified.timestamp()) if modified else None
+    etag = quote_etag(f'{mtime or 0:x}-{size:x}')
+    return size, mtime, etag
+
+
+def _parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single-range header, None when
+    the header should be ignored, or ``False`` when it is unsatisfiable.
+    Multi-range requests are answered with the full body.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if not length:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Weak validators never match If-Range
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and mtime is not None and mtime <= since
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and mtime is not None and mtime <= since
+
+
+def _stream(storage, name, start, length, chunk_size):
+    with storage.open(name, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _handoff(name, storage):
+    if MEDIA_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = f"{MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{name}"
+        return response
+    if MEDIA_USE_SENDFILE:
+        try:
+            path = storage.path(name)
+        except NotImplementedError:
+            # Remote storages have no local path to hand over
+            return None
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+        return response
+    return None
+
+
+def serve_media(request, name, storage=None, content_type=None, cache_control='public, max-age=86400'):
+    """Serve ``name`` from storage honouring Range, If-Range and conditional headers"""
+    storage = storage or default_storage
+    content_type = content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    response = _handoff(name, storage)
+    if response is not None:
+        # The proxy owns range handling and validators from here
+        response['Content-Type'] = content_type
+        response['Cache-Control'] = cache_control
+        return response
+
+    size, mtime, etag = _stat(name, storage)
+    validators = {'ETag': etag, 'Cache-Control': cache_control, 'Accept-Ranges': 'bytes'}
+    if mtime is not None:
+        validators['Last-Modified'] = http_date(mtime)
+
+    if _not_modified(request, etag, mtime):
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and size and _if_range_matches(request, etag, mtime):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            for header, value in validators.items():
+                response[header] = value
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = max(0, end - start + 1)
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        response = StreamingHttpResponse(
+            _stream(storage, name, start, length, MEDIA_STREAM_CHUNK_SIZE),
+            content_type=content_type
+        )
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    for header, value in validators.items():
+        response[header] = value
+    return response
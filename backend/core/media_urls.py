@@ -0,0 +1,128 @@
+"""
+Media URL resolution.
+
+Serializers turn stored file names into URLs through one ``MediaURLs`` per
+request (``get_media_urls(context)``) instead of asking the storage backend
+and ``build_absolute_uri`` for every field of every row:
+
+* with ``MEDIA_CDN_URL`` set, names are joined to that base URL;
+* for storages with a plain ``base_url`` (the local filesystem), names are
+  joined to it, made absolute against the request once;
+* otherwise (e.g. S3) the backend builds the URL, which for private buckets
+  means signing it. Those URLs are kept in a process-wide TTL cache keyed by
+  name for ``MEDIA_SIGNED_URL_TTL`` seconds, half the signature lifetime by
+  default, so a URL handed out from the cache stays valid for at least that
+  long after it is served.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
+
+CONTEXT_KEY = 'media_urls'
+RELATIVE_CONTEXT_KEY = 'media_urls_relative'
+
+MEDIA_CDN_URL = getattr(settings, 'MEDIA_CDN_URL', None)
+SIGNED_URL_TTL = getattr(
+    settings, 'MEDIA_SIGNED_URL_TTL', getattr(settings, 'AWS_QUERYSTRING_EXPIRE', 3600) // 2
+)
+SIGNED_URL_CACHE_SIZE = getattr(settings, 'MEDIA_SIGNED_URL_CACHE_SIZE', 10000)
+
+
+class TTLCache:
+    """Thread-safe LRU map whose entries expire ``ttl`` seconds after they are set"""
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_storage_urls = TTLCache(SIGNED_URL_TTL, SIGNED_URL_CACHE_SIZE)
+
+
+def storage_url(name, storage=default_storage):
+    """URL the storage backend builds for ``name``, cached for ``SIGNED_URL_TTL``"""
+    url = _storage_urls.get(name)
+    if url is None:
+        url = storage.url(name)
+        _storage_urls.set(name, url)
+    return url
+
+
+def _base_url(storage):
+    return MEDIA_CDN_URL or getattr(storage, 'base_url', None)
+
+
+def version():
+    """
+    Changes whenever cached storage URLs may have been re-signed, so
+    responses cached with media URLs (post cards) never outlive them
+    """
+    if _base_url(default_storage):
+        return None
+    return int(time.time() // SIGNED_URL_TTL)
+
+
+class MediaURLs:
+    """Builds media URLs for one request"""
+
+    def __init__(self, request=None, storage=default_storage):
+        self.storage = storage
+        base = _base_url(storage)
+        if base is not None:
+            if not base.endswith('/'):
+                base += '/'
+            if request is not None:
+                base = request.build_absolute_uri(base)
+        self.base = base
+
+    def url(self, file):
+        """URL of a stored file, given its name or a ``FieldFile``; None when empty"""
+        name = getattr(file, 'name', file)
+        if not name:
+            return None
+        if self.base is None:
+            return storage_url(name, self.storage)
+        return self.base + filepath_to_uri(name).lstrip('/')
+
+
+def get_media_urls(context, relative=False):
+    """
+    Return the ``MediaURLs`` stored in a serializer context, creating it.
+    ``relative`` returns one that does not make URLs absolute against the
+    request, for fields that have always served relative URLs.
+    """
+    key = RELATIVE_CONTEXT_KEY if relative else CONTEXT_KEY
+    urls = context.get(key)
+    if urls is None:
+        urls = MediaURLs(None if relative else context.get('request'))
+        context[key] = urls
+    return urls
@@ -0,0 +1,273 @@
+import base64
+import json
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple('Cursor', ['position', 'reverse', 'source'], defaults=(None,))
+
+
+def approximate_count(queryset):
+    """
+    Estimate the number of rows in a queryset from the Postgres planner
+    instead of running COUNT(*). Falls back to an exact count on backends
+    that cannot explain queries as JSON.
+    """
+    try:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception:
+        return queryset.count()
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _get_value(obj, field):
+    """Read an ordering value (including ``a__b`` lookups) from a row"""
+    for attr in field.split('__'):
+        obj = obj.get(attr) if isinstance(obj, dict) else getattr(obj, attr, None)
+        if obj is None:
+            break
+    return obj
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination shared by list endpoints.
+
+    Pages are addressed by an opaque cursor holding the ordering values of
+    the first/last row of the previous page, so every page costs the same
+    indexed range scan instead of a COUNT(*) plus an OFFSET. The ordering
+    comes from the queryset's ``order_by()`` (or the model's default
+    ordering), with the primary key appended as a tie-breaker, e.g.
+    ``(created_at, id)`` or ``(score, id)``.
+
+    Requests that still send ``?page=`` are served by ``PageNumberPagination``
+    so existing clients keep working. ``?include_total=true`` adds an
+    approximate ``count`` taken from the query planner.
+
+    Endpoints that serve pages from more than one source (the home timeline
+    and its fallback feed) set ``cursor_source``; it is stored in the cursors
+    they issue and a cursor is only accepted by the source that issued it.
+    """
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'include_total'
+    legacy_page_query_param = 'page'
+    default_ordering = ('-created_at', '-pk')
+    cursor_source = None
+
+    def __init__(self):
+        self.legacy_paginator = None
+        self.page = None
+        self.count = None
+
+    # Cursor encoding
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {'p': [_encode_value(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        if self.cursor_source:
+            payload['s'] = self.cursor_source
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return Cursor(position=None, reverse=False)
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return Cursor(
+                position=tuple(payload['p']),
+                reverse=bool(payload.get('r')),
+                source=payload.get('s')
+            )
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor')
+
+    # Request helpers
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def use_legacy_pagination(self, request):
+        return (
+            self.legacy_page_query_param in request.query_params
+            and self.cursor_query_param not in request.query_params
+        )
+
+    def get_ordering(self, queryset):
+        ordering = [
+            field for field in (queryset.query.order_by or queryset.model._meta.ordering)
+            if isinstance(field, str)
+        ] or list(self.default_ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            descending = ordering[-1].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return tuple(ordering)
+
+    def _keyset_filter(self, ordering, position, reverse):
+        condition = Q()
+        for index, field in enumerate(ordering):
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            clause = Q(**{f'{field.lstrip("-")}__{lookup}': position[index]})
+            for previous_field, previous_value in zip(ordering[:index], position[:index]):
+                clause &= Q(**{previous_field.lstrip('-'): previous_value})
+            condition |= clause
+        return condition
+
+    # Pagination
+
+    def begin(self, request):
+        """Bind the paginator to a request and return its decoded cursor"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        return self.decode_cursor(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.use_legacy_pagination(request):
+            self.legacy_paginator = PageNumberPagination()
+            self.legacy_paginator.page_size = self.get_page_size(request)
+            return self.legacy_paginator.paginate_queryset(queryset, request, view)
+
+        cursor = self.begin(request)
+        if cursor.position is not None and cursor.source != self.cursor_source:
+            raise NotFound('Invalid cursor')
+        self.ordering = self.get_ordering(queryset)
+
+        if request.query_params.get(self.total_query_param) == 'true':
+            self.count = approximate_count(queryset)
+
+        order_by = self.ordering
+        if cursor.reverse:
+            order_by = tuple(
+                field[1:] if field.startswith('-') else f'-{field}' for field in order_by
+            )
+        queryset = queryset.order_by(*order_by)
+        if cursor.position is not None:
+            if len(cursor.position) != len(self.ordering):
+                raise NotFound('Invalid cursor')
+            queryset = queryset.filter(
+                self._keyset_filter(self.ordering, cursor.position, cursor.reverse)
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        return self.paginate_rows(
+            rows, cursor, lambda row: tuple(_get_value(row, field) for field in self.ordering)
+        )
+
+    def paginate_rows(self, rows, cursor, key):
+        """
+        Finish a page from ``rows`` already fetched in cursor order with one
+        extra row of lookahead. ``key`` returns the cursor position of a row.
+        Endpoints that page over non-queryset sources call ``begin()`` first
+        and then hand their rows to this method.
+        """
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if cursor.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor.position is not None
+
+        self.next_position = key(rows[-1]) if rows and self.has_next else None
+        self.previous_position = key(rows[0]) if rows and self.has_previous else None
+        self.page = rows
+        return rows
+
+    # Links and responses
+
+    def _get_link(self, position, reverse=False):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.legacy_page_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
+
+    def get_next_link(self):
+        if self.legacy_paginator:
+            return self.legacy_paginator.get_next_link()
+        return self._get_link(self.next_position)
+
+    def get_previous_link(self):
+        if self.legacy_paginator:
+            return self.legacy_paginator.get_previous_link()
+        return self._get_link(self.previous_position, reverse=True)
+
+    def get_paginated_data(self, data):
+        """Pagination payload for views that wrap it in ``api_response``"""
+        if self.legacy_paginator:
+            page = self.legacy_paginator.page
+            return OrderedDict([
+                ('results', data),
+                ('count', page.paginator.count),
+                ('total_pages', page.paginator.num_pages),
+                ('current_page', page.number),
+                ('has_next', page.has_next()),
+                ('has_previous', page.has_previous()),
+            ])
+
+        payload = OrderedDict([
+            ('results', data),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('has_next', self.has_next),
+            ('has_previous', self.has_previous),
+        ])
+        if self.count is not None:
+            payload['count'] = self.count
+        return payload
+
+    def get_paginated_response(self, data):
+        if self.legacy_paginator:
+            return self.legacy_paginator.get_paginated_response(data)
+
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -121,6 +121,15 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
@@ -151,6 +160,50 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    # Recount only posts with new interactions, so trending stays fresh
+    'recompute-dirty-trending-scores': {
+        'task': 'posts.tasks.recompute_dirty_trending_scores',
+        'schedule': 10.0,
+    },
+    # Full pass to apply time decay to posts without new interactions
+    'update-trending-scores': {
+        'task': 'posts.tasks.update_trending_scores',
+        'schedule': 60.0 * 30,
+    },
+    # Buffered post views -> PostView / TrendingScore.view_count
+    'flush-post-views': {
+        'task': 'posts.tasks.flush_post_views',
+        'schedule': 30.0,
+    },
+    # Featured pool sampled by the highlights endpoint
+    'refresh-featured-pool': {
+        'task': 'posts.tasks.refresh_featured_pool',
+        'schedule': 60.0 * 5,
+    },
+}
+TRENDING_DIRTY_BATCH_SIZE = 500
+VIEWS_FLUSH_BATCH_SIZE = 1000
+
+# Highlights featured pool
+FEATURED_POOL_SIZE = 500
+FEATURED_POOL_DAYS = 30
+
+# Cached per-user / per-post interaction counters
+INTERACTION_STATS_TTL = 60 * 60 * 24
+
+# Bulk post import (posts.ingest)
+POST_IMPORT_BATCH_SIZE = 500
+POST_IMPORT_MAX_RECORDS = 5000
+# Remote media of imported posts larger than this is rejected
+POST_IMPORT_MAX_MEDIA_BYTES = 100 * 1024 * 1024
+
+# Home timeline (fan-out-on-write) settings
+TIMELINE_MAX_LENGTH = int(os.getenv('TIMELINE_MAX_LENGTH', 800))
+TIMELINE_FANOUT_THRESHOLD = int(os.getenv('TIMELINE_FANOUT_THRESHOLD', 10000))
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+TIMELINE_TTL = 60 * 60 * 24 * 7  # 7 days
+TIMELINE_EMPTY_TTL = 60 * 5  # 5 minutes
 
 # Static and Media settings
 STATIC_URL = '/static/'
@@ -177,6 +230,31 @@ MEDIA_SUBDIRS = {
 for dir_path in MEDIA_SUBDIRS.values():
     os.makedirs(dir_path, exist_ok=True)
 
+# Responsive image renditions (see core.images)
+IMAGE_VARIANT_WIDTHS = (320, 640, 1080)
+AVATAR_VARIANT_WIDTHS = (64, 128, 256)
+IMAGE_LQIP_WIDTH = 16
+
+# Audio post processing (see core.audio)
+AUDIO_WAVEFORM_PEAKS = 200
+AUDIO_STREAM_BITRATE = 128000
+
+# Media serving (see core.media). Set MEDIA_ACCEL_REDIRECT_PREFIX to an nginx
+# internal location, or MEDIA_USE_SENDFILE for Apache/lighttpd, to let the
+# front proxy serve the bytes
+MEDIA_STREAM_CHUNK_SIZE = 64 * 1024
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX') or None
+MEDIA_USE_SENDFILE = os.getenv('MEDIA_USE_SENDFILE', 'False') == 'True'
+
+# Media URLs in API responses (see core.media_urls). MEDIA_CDN_URL serves
+# stored files from a CDN; without it, URLs the storage backend has to sign
+# (private buckets) are cached per file for MEDIA_SIGNED_URL_TTL seconds,
+# which must stay below AWS_QUERYSTRING_EXPIRE
+MEDIA_CDN_URL = os.getenv('MEDIA_CDN_URL') or None
+AWS_QUERYSTRING_EXPIRE = int(os.getenv('AWS_QUERYSTRING_EXPIRE', 3600))
+MEDIA_SIGNED_URL_TTL = AWS_QUERYSTRING_EXPIRE // 2
+MEDIA_SIGNED_URL_CACHE_SIZE = 10000
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -0,0 +1,149 @@
+import base64
+import json
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from .pagination import Cursor, KeysetPagination
+
+factory = APIRequestFactory()
+
+
+def make_request(path='/items/', **params):
+    return Request(factory.get(path, params))
+
+
+def cursor_param(link):
+    return parse_qs(urlparse(link).query)['cursor'][0]
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+class KeysetCursorTests(SimpleTestCase):
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        encoded = paginator.encode_cursor(('2024-01-01T00:00:00+00:00', 'abc'), reverse=True)
+        cursor = paginator.decode_cursor(make_request(cursor=encoded))
+        self.assertEqual(
+            cursor, Cursor(position=('2024-01-01T00:00:00+00:00', 'abc'), reverse=True)
+        )
+
+    def test_cursor_source_round_trip(self):
+        paginator = KeysetPagination()
+        paginator.cursor_source = 'timeline'
+        encoded = paginator.encode_cursor((1.5, 'abc'))
+        cursor = KeysetPagination().decode_cursor(make_request(cursor=encoded))
+        self.assertEqual(cursor.source, 'timeline')
+        self.assertFalse(cursor.reverse)
+
+    def test_missing_cursor_is_the_first_page(self):
+        cursor = KeysetPagination().decode_cursor(make_request())
+        self.assertEqual(cursor, Cursor(position=None, reverse=False))
+
+    def test_malformed_cursor_is_not_found(self):
+        malformed = (
+            'not a cursor!', raw_cursor([1, 2]), raw_cursor({'x': 1}), raw_cursor({'p': 1})
+        )
+        for value in malformed:
+            with self.subTest(cursor=value), self.assertRaises(NotFound):
+                KeysetPagination().decode_cursor(make_request(cursor=value))
+
+    def test_page_size_is_clamped(self):
+        paginator = KeysetPagination()
+        cases = {'5': 5, '1000': paginator.max_page_size, '0': paginator.page_size,
+                 '-3': paginator.page_size, 'abc': paginator.page_size}
+        for value, expected in cases.items():
+            with self.subTest(page_size=value):
+                self.assertEqual(paginator.get_page_size(make_request(page_size=value)), expected)
+        self.assertEqual(paginator.get_page_size(make_request()), paginator.page_size)
+
+    def test_links_between_pages(self):
+        rows = [{'id': n} for n in range(1, 8)]
+        key = lambda row: (row['id'],)
+
+        first = KeysetPagination()
+        cursor = first.begin(make_request(page_size=3))
+        page = first.paginate_rows(rows[:4], cursor, key)
+        self.assertEqual(page, rows[:3])
+        self.assertIsNone(first.get_previous_link())
+        next_link = first.get_next_link()
+        self.assertEqual(first.decode_cursor(make_request(cursor=cursor_param(next_link))),
+                         Cursor(position=(3,), reverse=False))
+
+        second = KeysetPagination()
+        cursor = second.begin(make_request(page_size=3, cursor=cursor_param(next_link)))
+        page = second.paginate_rows(rows[3:7], cursor, key)
+        self.assertEqual(page, rows[3:6])
+        previous = second.decode_cursor(
+            make_request(cursor=cursor_param(second.get_previous_link()))
+        )
+        self.assertEqual(previous, Cursor(position=(4,), reverse=True))
+
+        # Paging backwards: rows come in reverse order and are flipped back
+        back = KeysetPagination()
+        cursor = back.begin(make_request(page_size=3, cursor=cursor_param(
+            second.get_previous_link()
+        )))
+        page = back.paginate_rows(list(reversed(rows[:3])), cursor, key)
+        self.assertEqual(page, rows[:3])
+        self.assertIsNone(back.get_previous_link())
+        self.assertIsNotNone(back.get_next_link())
+
+
+class KeysetQuerysetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'user{n}@example.com', username=f'user{n}')
+            for n in range(5)
+        ]
+        cls.queryset = User.objects.filter(pk__in=[user.pk for user in cls.users])\
+            .order_by('username')
+
+    def paginate(self, **params):
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(self.queryset, make_request(**params))
+        return paginator, [user.username for user in page]
+
+    def test_walks_every_row_once_forwards_and_back(self):
+        paginator, names = self.paginate(page_size=2)
+        pages = [names]
+        while paginator.get_next_link():
+            paginator, names = self.paginate(
+                page_size=2, cursor=cursor_param(paginator.get_next_link())
+            )
+            pages.append(names)
+        self.assertEqual(pages, [['user0', 'user1'], ['user2', 'user3'], ['user4']])
+
+        paginator, names = self.paginate(
+            page_size=2, cursor=cursor_param(paginator.get_previous_link())
+        )
+        self.assertEqual(names, ['user2', 'user3'])
+
+    def test_legacy_page_number(self):
+        paginator, names = self.paginate(page=2, page_size=2)
+        self.assertEqual(names, ['user2', 'user3'])
+        data = paginator.get_paginated_data([])
+        self.assertEqual((data['count'], data['current_page'], data['total_pages']), (5, 2, 3))
+
+    def test_include_total(self):
+        paginator, _ = self.paginate(page_size=2, include_total='true')
+        self.assertIsInstance(paginator.get_paginated_data([])['count'], int)
+
+    def test_cursor_of_another_length_is_not_found(self):
+        with self.assertRaises(NotFound):
+            self.paginate(cursor=KeysetPagination().encode_cursor(('user1',)))
+
+    def test_cursor_from_another_source_is_not_found(self):
+        issuer = KeysetPagination()
+        issuer.cursor_source = 'timeline'
+        with self.assertRaises(NotFound):
+            self.paginate(cursor=issuer.encode_cursor(('user1', str(self.users[1].pk))))
@@ -24,6 +24,7 @@ api_urlpatterns = [
     path('auth/', include('authentication.urls')),
     path('users/', include('users.urls')),
     path('posts/', include('posts.urls')),
+    path('comments/', include('posts.comment_urls')),
     path('chat/', include('chat.urls')),  # Note: 'chat.urls', not 'chat:urls'
     path('search/', include('search.urls')),
 ]
@@ -1,4 +1,4 @@
 from .response import api_response
-from .file_handlers import handle_uploaded_file
+from .file_handlers import handle_uploaded_file, store_upload, StoredUpload
 
-__all__ = ['api_response', 'handle_uploaded_file'] 
\ No newline at end of file
+__all__ = ['api_response', 'handle_uploaded_file', 'store_upload', 'StoredUpload'] 
\ No newline at end of file
@@ -1,26 +1,105 @@
+import hashlib
+import logging
+import mimetypes
 import os
+from collections import namedtuple
 from uuid import uuid4
-from django.conf import settings
 
-def handle_uploaded_file(file, directory='uploads'):
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+try:
+    import magic
+except ImportError:  # libmagic is not available on every host
+    magic = None
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the start of an upload to detect its real type
+SNIFF_BYTES = 2048
+
+StoredUpload = namedtuple('StoredUpload', ['path', 'size', 'sha256', 'content_type'])
+
+
+def sniff_content_type(file):
+    """
+    Detect the MIME type of an upload from its first bytes, falling back to
+    the type declared by the client (or guessed from the file name) when
+    libmagic is not installed.
+    """
+    declared = (
+        getattr(file, 'content_type', None)
+        or mimetypes.guess_type(getattr(file, 'name', None) or '')[0]
+        or 'application/octet-stream'
+    )
+    if magic is None:
+        return declared
+    file.seek(0)
+    head = file.read(SNIFF_BYTES)
+    file.seek(0)
+    return magic.from_buffer(head, mime=True) or declared
+
+
+class HashingFile(File):
+    """
+    Wraps an upload so the storage backend pulls it chunk by chunk while the
+    size and SHA-256 are computed on the way through. The file is never read
+    into memory as a whole, whichever of ``chunks()`` or ``read()`` the
+    backend uses.
+    """
+
+    def __init__(self, file, name=None):
+        super().__init__(file, name=name or file.name)
+        self.sha256 = hashlib.sha256()
+        self.bytes_written = 0
+
+    def _consume(self, data):
+        self.sha256.update(data)
+        self.bytes_written += len(data)
+        return data
+
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size):
+            yield self._consume(chunk)
+
+    def read(self, *args, **kwargs):
+        return self._consume(self.file.read(*args, **kwargs))
+
+
+def store_upload(file, directory='uploads', allowed_types=None, storage=None):
     """
-    Handle file upload and return the file path
+    Stream an uploaded file into storage under a unique name.
+
+    ``allowed_types`` is an optional tuple of MIME prefixes (e.g.
+    ``('image/',)``) checked against the sniffed type before anything is
+    written. Returns a ``StoredUpload`` with the storage path, size,
+    SHA-256 hex digest and sniffed content type.
     """
-    # Create directory if it doesn't exist
-    upload_path = os.path.join(settings.MEDIA_ROOT, directory)
-    os.makedirs(upload_path, exist_ok=True)
+    storage = storage or default_storage
+    content_type = sniff_content_type(file)
+    if allowed_types and not content_type.startswith(tuple(allowed_types)):
+        raise ValidationError(f'Unsupported file type: {content_type}')
 
     # Generate unique filename
-    ext = os.path.splitext(file.name)[1]
-    filename = f"{uuid4().hex}{ext}"
-    
-    # Full path for the file
-    filepath = os.path.join(upload_path, filename)
-    
-    # Write file
-    with open(filepath, 'wb+') as destination:
-        for chunk in file.chunks():
-            destination.write(chunk)
-    
-    # Return relative path from MEDIA_ROOT
-    return os.path.join(directory, filename) 
\ No newline at end of file
+    ext = os.path.splitext(file.name)[1].lower()
+    filename = f"{directory}/{uuid4().hex}{ext}"
+
+    file.seek(0)
+    stream = HashingFile(file, name=filename)
+    path = storage.save(filename, stream)
+    stored = StoredUpload(path, stream.bytes_written, stream.sha256.hexdigest(), content_type)
+    logger.info(
+        "Stored upload %s (%s bytes, %s, sha256=%s)",
+        stored.path, stored.size, stored.content_type, stored.sha256
+    )
+    return stored
+
+
+def handle_uploaded_file(file, directory='uploads', allowed_types=None):
+    """
+    Handle file upload and return the storage path
+    """
+    if not file:
+        return None
+    return store_upload(file, directory, allowed_types).path
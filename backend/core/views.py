@@ -1,10 +1,13 @@
 from rest_framework import viewsets
 from rest_framework.response import Response
+from . import conditional
+from .fieldsets import FieldsetViewMixin
 from .utils.response import api_response
 
-class BaseViewSet(viewsets.ModelViewSet):
+class BaseViewSet(FieldsetViewMixin, viewsets.ModelViewSet):
     """
-    Base ViewSet that includes common functionality and standardized responses
+    Base ViewSet that includes common functionality and standardized responses.
+    GET requests accept ``?fields=``/``?expand=`` (see ``core.fieldsets``).
     """
     
     @property
@@ -26,6 +29,28 @@ class BaseViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return api_response(data=serializer.data)
 
+    def get_validators(self, instance):
+        """
+        Return ``(etag, last_modified)`` for ``instance`` to answer conditional
+        GETs on retrieve (see ``core.conditional``), or None to always send
+        the full body. Override to opt in.
+        """
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_validators(instance)
+        if validators:
+            response = conditional.not_modified(request, *validators)
+            if response is not None:
+                return response
+
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        if validators:
+            conditional.tag(response, *validators)
+        return response
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
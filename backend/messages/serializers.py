@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import ChatRoom, Message
+from core.media_urls import get_media_urls
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -12,9 +13,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'avatar_url']
         
     def get_avatar_url(self, obj):
-        if hasattr(obj, 'avatar') and obj.avatar:
-            return obj.avatar.url
-        return None
+        return get_media_urls(self.context, relative=True).url(getattr(obj, 'avatar', None))
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
@@ -31,9 +30,7 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ['is_read', 'read_at']
         
     def get_attachment_url(self, obj):
-        if obj.attachment:
-            return obj.attachment.url
-        return None
+        return get_media_urls(self.context, relative=True).url(obj.attachment)
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     participants = UserSerializer(many=True, read_only=True)
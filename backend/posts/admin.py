@@ -6,12 +6,9 @@ class PostAdmin(admin.ModelAdmin):
     list_display = ('id', 'author', 'type', 'title', 'created_at', 'likes_count')
     list_filter = ('type', 'created_at')
     search_fields = ('title', 'description', 'author__username')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'likes_count', 'comments_count', 'shares_count')
     date_hierarchy = 'created_at'
 
-    def likes_count(self, obj):
-        return obj.likes.count()
-
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('id', 'author', 'post', 'content', 'created_at')
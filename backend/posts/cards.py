@@ -0,0 +1,115 @@
+"""
+Viewer-aware post card cache.
+
+A post "card" is the viewer-independent part of the ``PostSerializer``
+output. Cards are cached once per post version: the key embeds a digest of
+the row values a card is rendered from (post, counters, trending score and
+author), so every viewer shares the same entry and any edit simply produces
+a new key. Viewer-specific fields (``is_liked``, ``is_saved`` and
+``author.is_followed``) are never cached; they are overlaid per request from
+one batched membership lookup (see ``posts.viewer_state``).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+
+from core import media_urls
+from .viewer_state import ViewerState, get_viewer_state
+
+CARD_KEY = 'post_card:{post_id}:{digest}'
+CARD_TTL = getattr(settings, 'POST_CARD_TTL', 60 * 60)
+
+VIEWER_FIELDS = ('is_liked', 'is_saved')
+
+
+def _file_name(field):
+    return field.name if field else ''
+
+
+def card_version(post, host=''):
+    """Digest of everything a cached card depends on"""
+    author = post.author
+    try:
+        trending = post.trending_score
+    except ObjectDoesNotExist:
+        trending = None
+    parts = (
+        host,
+        # Cards embed media URLs, which may be signed and expire
+        media_urls.version(),
+        post.updated_at.isoformat(),
+        post.likes_count,
+        post.comments_count,
+        post.shares_count,
+        trending.last_calculated.isoformat() if trending else None,
+        # Variants are attached by a task without touching updated_at
+        sorted(post.image_variants.get('sizes', {})) if post.image_variants else None,
+        bool(post.audio_metadata),
+        author.username,
+        author.first_name,
+        author.last_name,
+        author.email,
+        author.bio,
+        _file_name(author.avatar),
+        bool(author.avatar_variants),
+    )
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def card_key(post, host=''):
+    return CARD_KEY.format(post_id=post.id, digest=card_version(post, host))
+
+
+def overlay(cards, posts, state):
+    """Fill in the viewer-specific fields of cached cards"""
+    state.resolve(
+        [post.id for post in posts],
+        [post.author_id for post in posts]
+    )
+    results = []
+    for post, card in zip(posts, cards):
+        card = dict(card)
+        card['is_liked'] = post.id in state.liked
+        card['is_saved'] = post.id in state.saved
+        if card.get('author') is not None:
+            card['author'] = dict(
+                card['author'], is_followed=post.author_id in state.followed
+            )
+        results.append(card)
+    return results
+
+
+def render_cards(posts, serializer_class, context):
+    """
+    Serialize ``posts`` through the shared card cache.
+    Only posts whose current version is not cached are serialized.
+    """
+    posts = list(posts)
+    request = context.get('request')
+    host = request.get_host() if request else ''
+    keys = [card_key(post, host) for post in posts]
+    cards = cache.get_many(keys)
+
+    missing = [(key, post) for key, post in zip(keys, posts) if key not in cards]
+    if missing:
+        # Render the full card with an anonymous viewer state; the real flags
+        # are overlaid below
+        data = serializer_class(
+            [post for _, post in missing], many=True,
+            context=dict(context, viewer_state=ViewerState(None), fieldset=None)
+        ).data
+        fresh = {}
+        for (key, _), card in zip(missing, data):
+            card = dict(card)
+            for field in VIEWER_FIELDS:
+                card.pop(field, None)
+            if card.get('author') is not None:
+                card['author'] = dict(card['author'])
+                card['author'].pop('is_followed', None)
+            fresh[key] = card
+        cache.set_many(fresh, CARD_TTL)
+        cards.update(fresh)
+
+    return overlay([cards[key] for key in keys], posts, get_viewer_state(context))
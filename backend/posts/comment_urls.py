@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import CommentViewSet
+
+# Only the thread views and likes are exposed here; comments are created,
+# edited and deleted through the post endpoints, which check authorship
+urlpatterns = [
+    path('<uuid:pk>/replies/', CommentViewSet.as_view({'get': 'replies'}), name='comment-replies'),
+    path('<uuid:pk>/thread/', CommentViewSet.as_view({'get': 'thread'}), name='comment-thread'),
+    path('<uuid:pk>/like/', CommentViewSet.as_view({'post': 'like'}), name='comment-like'),
+]
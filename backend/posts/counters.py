@@ -0,0 +1,43 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Post, Comment, PostInteraction
+
+COUNTER_FIELDS = ('likes_count', 'comments_count', 'shares_count')
+
+
+def adjust_counters(post_id, **deltas):
+    """
+    Atomically apply counter deltas to a post, e.g.
+    ``adjust_counters(post.id, likes_count=1)``. Counters never go below zero.
+    """
+    updates = {
+        field: Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items() if delta
+    }
+    if updates:
+        Post.objects.filter(pk=post_id).update(**updates)
+
+
+def actual_counts():
+    """Subquery expressions computing each counter of a post from its source rows"""
+    def count_of(queryset):
+        return Coalesce(
+            Subquery(
+                queryset.order_by().values('post_id')
+                    .annotate(total=Count('*')).values('total')
+            ),
+            Value(0)
+        )
+
+    return {
+        'likes_count': count_of(
+            Post.likes.through.objects.filter(post_id=OuterRef('pk'))
+        ),
+        'comments_count': count_of(
+            Comment.objects.filter(post_id=OuterRef('pk'))
+        ),
+        'shares_count': count_of(
+            PostInteraction.objects.filter(post_id=OuterRef('pk'), interaction_type='SHARE')
+        ),
+    }
@@ -0,0 +1,144 @@
+"""
+Featured post pool for the highlights endpoint.
+
+A periodic task stores the ids of recent, highly ranked posts in a Redis set
+(``featured:pool``) and the current "latest news" / "trending audio" picks
+in a hash (``featured:highlights``). Serving highlights is then one Redis
+round trip (HGETALL + SRANDMEMBER, O(1) in the pool size) followed by a
+single hydrate query, instead of ``ORDER BY random()`` over the whole table.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+FEATURED_POOL_KEY = 'featured:pool'
+HIGHLIGHTS_KEY = 'featured:highlights'
+
+FEATURED_POOL_SIZE = getattr(settings, 'FEATURED_POOL_SIZE', 500)
+FEATURED_POOL_DAYS = getattr(settings, 'FEATURED_POOL_DAYS', 30)
+
+CATEGORIES = ('latest_news', 'trending_audio')
+# Extra members sampled so the random pick can skip the other categories
+SAMPLE_SIZE = len(CATEGORIES) + 1
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _select_categories():
+    posts = Post.objects.order_by('-created_at')
+
+    latest_news = posts.filter(type='NEWS').values_list('id', flat=True).first()
+
+    trending_audio = posts.filter(type='AUDIO')\
+        .exclude(trending_score=None)\
+        .order_by('-trending_score__score', '-created_at')\
+        .values_list('id', flat=True).first()
+    if not trending_audio:
+        trending_audio = posts.filter(type='AUDIO').values_list('id', flat=True).first()
+
+    return {'latest_news': latest_news, 'trending_audio': trending_audio}
+
+
+def _select_pool():
+    since = timezone.now() - timedelta(days=FEATURED_POOL_DAYS)
+    ranked = Post.objects.order_by(
+        F('trending_score__score').desc(nulls_last=True), '-created_at'
+    )
+    pool = list(
+        ranked.filter(created_at__gte=since).values_list('id', flat=True)[:FEATURED_POOL_SIZE]
+    )
+    if not pool:
+        # Quiet periods: fall back to the most recent posts of any age
+        pool = list(ranked.values_list('id', flat=True)[:FEATURED_POOL_SIZE])
+    return pool
+
+
+def refresh_pool():
+    """Rebuild the featured pool and category picks; returns the pool size"""
+    categories = _select_categories()
+    pool = [str(post_id) for post_id in _select_pool()]
+
+    staging = f'{FEATURED_POOL_KEY}:staging'
+    pipe = _redis().pipeline()
+    pipe.delete(staging)
+    if pool:
+        pipe.sadd(staging, *pool)
+        pipe.rename(staging, FEATURED_POOL_KEY)
+    else:
+        pipe.delete(FEATURED_POOL_KEY)
+    pipe.delete(HIGHLIGHTS_KEY)
+    # refreshed_at marks the hash as present even when a category is empty
+    mapping = {'refreshed_at': timezone.now().isoformat()}
+    mapping.update({
+        category: str(post_id) for category, post_id in categories.items() if post_id
+    })
+    pipe.hset(HIGHLIGHTS_KEY, mapping=mapping)
+    pipe.execute()
+
+    logger.info("Refreshed featured pool with %s posts", len(pool))
+    return len(pool)
+
+
+def select_highlights():
+    """Return ``{category: post_id}`` for latest_news, trending_audio and featured_post"""
+    pipe = _redis().pipeline(transaction=False)
+    pipe.hgetall(HIGHLIGHTS_KEY)
+    pipe.srandmember(FEATURED_POOL_KEY, SAMPLE_SIZE)
+    picks, sample = pipe.execute()
+
+    if not picks:
+        refresh_pool()
+        pipe = _redis().pipeline(transaction=False)
+        pipe.hgetall(HIGHLIGHTS_KEY)
+        pipe.srandmember(FEATURED_POOL_KEY, SAMPLE_SIZE)
+        picks, sample = pipe.execute()
+
+    selected = {
+        category: picks[category.encode()].decode() if category.encode() in picks else None
+        for category in CATEGORIES
+    }
+    excluded = set(selected.values())
+    selected['featured_post'] = next(
+        (post_id.decode() for post_id in sample if post_id.decode() not in excluded),
+        None
+    )
+    return selected
+
+
+def add_post(post):
+    """Make a newly committed post eligible right away"""
+    post_id, is_news = str(post.id), post.type == 'NEWS'
+
+    def push():
+        conn = _redis()
+        conn.sadd(FEATURED_POOL_KEY, post_id)
+        # A missing hash is rebuilt in full on the next read
+        if is_news and conn.exists(HIGHLIGHTS_KEY):
+            conn.hset(HIGHLIGHTS_KEY, 'latest_news', post_id)
+
+    transaction.on_commit(push)
+
+
+def remove_post(post_id):
+    """Drop a deleted post from the pool; picks that used it are recomputed"""
+    post_id = str(post_id)
+
+    def drop():
+        conn = _redis()
+        conn.srem(FEATURED_POOL_KEY, post_id)
+        picks = conn.hgetall(HIGHLIGHTS_KEY)
+        if post_id.encode() in picks.values():
+            conn.delete(HIGHLIGHTS_KEY)
+
+    transaction.on_commit(drop)
@@ -0,0 +1,149 @@
+"""
+Buffered post view counting.
+
+Recording a view never touches the database. Every (post, user) pair is
+added to a pending set, which with the ``PostView`` upsert deduplicates
+exactly. A per-post HyperLogLog decides which impressions are first views
+and add one to an approximate pending counter (a Redis hash). ``flush_views`` periodically swaps those
+buffers out and writes them in bulk: ``PostView`` rows are upserted with
+``ignore_conflicts`` and ``TrendingScore.view_count`` is incremented with
+one UPDATE per batch.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from .models import Post, PostView, TrendingScore
+from .trending import DIRTY_POSTS_KEY
+
+logger = logging.getLogger(__name__)
+
+SEEN_KEY = 'views:seen:{post_id}'
+PENDING_VIEWS_KEY = 'views:pending'
+PENDING_COUNTS_KEY = 'views:pending_counts'
+FLUSHING_VIEWS_KEY = 'views:flushing'
+FLUSHING_COUNTS_KEY = 'views:flushing_counts'
+
+VIEWS_SEEN_TTL = getattr(settings, 'VIEWS_SEEN_TTL', 60 * 60 * 24 * 30)
+VIEWS_FLUSH_BATCH_SIZE = getattr(settings, 'VIEWS_FLUSH_BATCH_SIZE', 1000)
+MAX_VIEWS_PER_REQUEST = 100
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def record_views(user_id, post_ids):
+    """Buffer impressions of ``post_ids`` by ``user_id``; returns how many were new"""
+    post_ids = list(dict.fromkeys(str(post_id) for post_id in post_ids))
+    if not user_id or not post_ids:
+        return 0
+    user_id = str(user_id)
+    conn = _redis()
+
+    pipe = conn.pipeline(transaction=False)
+    # Every pair is queued: the set and the upsert dedupe exactly, while a
+    # HyperLogLog false negative would otherwise lose a real first view
+    pipe.sadd(PENDING_VIEWS_KEY, *[f'{post_id}:{user_id}' for post_id in post_ids])
+    for post_id in post_ids:
+        key = SEEN_KEY.format(post_id=post_id)
+        pipe.pfadd(key, user_id)
+        pipe.expire(key, VIEWS_SEEN_TTL)
+    added = pipe.execute()[1::2]
+
+    # Only the approximate counter is gated on the HyperLogLog
+    new = [post_id for post_id, changed in zip(post_ids, added) if changed]
+    if new:
+        pipe = conn.pipeline(transaction=False)
+        for post_id in new:
+            pipe.hincrby(PENDING_COUNTS_KEY, post_id, 1)
+        pipe.execute()
+    return len(new)
+
+
+def _swap(conn, pending, flushing):
+    """Move a pending buffer aside unless an earlier failed flush left one"""
+    if conn.exists(flushing):
+        return
+    try:
+        conn.rename(pending, flushing)
+    except ResponseError:
+        # Nothing buffered since the last flush
+        pass
+
+
+def _flush_pairs(conn):
+    written = 0
+    cursor = 0
+    existing = set()
+    while True:
+        cursor, members = conn.sscan(FLUSHING_VIEWS_KEY, cursor, count=VIEWS_FLUSH_BATCH_SIZE)
+        pairs = [member.decode().split(':', 1) for member in members]
+        post_ids = {post_id for post_id, _ in pairs}
+        if post_ids - existing:
+            existing |= {
+                str(post_id) for post_id in
+                Post.objects.filter(id__in=list(post_ids - existing)).values_list('id', flat=True)
+            }
+        rows = [
+            PostView(post_id=uuid.UUID(post_id), user_id=uuid.UUID(user_id))
+            for post_id, user_id in pairs if post_id in existing
+        ]
+        if rows:
+            PostView.objects.bulk_create(rows, ignore_conflicts=True)
+            written += len(rows)
+        if cursor == 0:
+            break
+    conn.delete(FLUSHING_VIEWS_KEY)
+    return written
+
+
+def _flush_counts(conn):
+    counts = {
+        post_id.decode(): int(count)
+        for post_id, count in conn.hgetall(FLUSHING_COUNTS_KEY).items()
+    }
+    items = list(counts.items())
+    for start in range(0, len(items), VIEWS_FLUSH_BATCH_SIZE):
+        batch = dict(items[start:start + VIEWS_FLUSH_BATCH_SIZE])
+        post_ids = list(
+            Post.objects.filter(id__in=list(batch)).values_list('id', flat=True)
+        )
+        if not post_ids:
+            continue
+        with transaction.atomic():
+            TrendingScore.objects.bulk_create(
+                [TrendingScore(post_id=post_id) for post_id in post_ids],
+                ignore_conflicts=True
+            )
+            TrendingScore.objects.filter(post_id__in=post_ids).update(
+                view_count=F('view_count') + Case(
+                    *[When(post_id=post_id, then=Value(batch[str(post_id)])) for post_id in post_ids],
+                    default=Value(0),
+                    output_field=IntegerField()
+                )
+            )
+        # Drop applied increments so a retried flush cannot count them twice
+        conn.hdel(FLUSHING_COUNTS_KEY, *batch)
+        # Views feed the trending formula
+        conn.sadd(DIRTY_POSTS_KEY, *[str(post_id) for post_id in post_ids])
+    conn.delete(FLUSHING_COUNTS_KEY)
+    return sum(counts.values())
+
+
+def flush_views():
+    """Write buffered views to PostView and TrendingScore.view_count"""
+    conn = _redis()
+    _swap(conn, PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY)
+    _swap(conn, PENDING_COUNTS_KEY, FLUSHING_COUNTS_KEY)
+    report = {'views': _flush_pairs(conn), 'counted': _flush_counts(conn)}
+    if report['views'] or report['counted']:
+        logger.info(
+            "Flushed %(views)s post views, %(counted)s view counter increments", report
+        )
+    return report
@@ -0,0 +1,205 @@
+"""
+Bulk post ingestion.
+
+Partner feeds are imported as JSONL, one post per line::
+
+    {"title": "...", "description": "...", "type": "NEWS",
+     "author": "newsdesk", "image": "https://partner.example/a.jpg"}
+
+Records are validated a batch at a time (authors are resolved with one
+query per batch) and every valid record of a batch is written with one
+``bulk_create`` for ``Post`` and one for ``TrendingScore`` inside a single
+transaction. Media references are either storage paths, attached as they
+are, or http(s) URLs that ``import_post_media`` downloads in Celery. Image
+renditions, audio analysis and timeline fan-out are queued after commit.
+Each batch returns a report with its timing and per-line errors.
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Post, TrendingScore
+from .serializers import PostImportSerializer
+from .tasks import (
+    fanout_post, generate_post_image_variants, import_post_media, process_audio_post
+)
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = getattr(settings, 'POST_IMPORT_BATCH_SIZE', 500)
+# Larger imports go through ``manage.py import_posts``
+MAX_IMPORT_RECORDS = getattr(settings, 'POST_IMPORT_MAX_RECORDS', 5000)
+MEDIA_FIELDS = ('image', 'audio_file')
+
+
+def is_remote(reference):
+    return reference.startswith(('http://', 'https://'))
+
+
+def parse_lines(lines, start=1):
+    """
+    Yield ``(line_number, record, error)`` for each non-blank JSONL line;
+    exactly one of ``record`` and ``error`` is set.
+    """
+    for number, line in enumerate(lines, start=start):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {e}'
+            continue
+        yield from parse_objects([record], start=number)
+
+
+def parse_objects(objects, start=1):
+    """Like ``parse_lines`` for records that are already decoded"""
+    for number, record in enumerate(objects, start=start):
+        if not isinstance(record, dict):
+            yield number, None, 'Each record must be a JSON object'
+            continue
+        yield number, record, None
+
+
+def batched(items, size=IMPORT_BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _resolve_authors(records, allow_author):
+    """Load every author named in a batch with one query"""
+    if not allow_author:
+        return {}
+    usernames = {
+        record['author'] for _, record, _ in records
+        if record and isinstance(record.get('author'), str)
+    }
+    return {
+        user.username: user
+        for user in get_user_model().objects.filter(username__in=usernames)
+    }
+
+
+def _enqueue_follow_up(posts, remote_media):
+    for post in posts:
+        post_id = str(post.id)
+        remote = remote_media.get(post.id)
+        if remote:
+            # Renditions and analysis run once the download has finished
+            import_post_media.delay(post_id, **remote)
+        else:
+            if post.image:
+                generate_post_image_variants.delay(post_id)
+            if post.audio_file:
+                process_audio_post.delay(post_id)
+        fanout_post.delay(post_id)
+
+
+def import_batch(records, default_author=None, allow_author=True, dry_run=False):
+    """
+    Validate and create one batch of parsed records (``parse_lines`` output).
+    ``default_author`` is used for records without an ``author``; when
+    ``allow_author`` is False it is used for every record. Returns the batch
+    report.
+    """
+    started = time.monotonic()
+    authors = _resolve_authors(records, allow_author)
+    errors = []
+    posts = []
+    remote_media = {}
+
+    for number, record, error in records:
+        if error:
+            errors.append({'line': number, 'errors': error})
+            continue
+        serializer = PostImportSerializer(data=record)
+        if not serializer.is_valid():
+            errors.append({'line': number, 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+
+        author = default_author
+        if allow_author and data.get('author'):
+            author = authors.get(data['author'])
+        if author is None:
+            errors.append({'line': number, 'errors': {'author': ['Unknown author']}})
+            continue
+
+        post = Post(
+            author=author,
+            type=data['type'],
+            title=data['title'],
+            description=data['description'],
+        )
+        remote = {}
+        for field in MEDIA_FIELDS:
+            reference = data.get(field)
+            if not reference:
+                continue
+            if is_remote(reference):
+                remote[field] = reference
+            else:
+                setattr(post, field, reference)
+        if remote:
+            remote_media[post.id] = remote
+        posts.append(post)
+
+    if posts and not dry_run:
+        with transaction.atomic():
+            Post.objects.bulk_create(posts, batch_size=IMPORT_BATCH_SIZE)
+            TrendingScore.objects.bulk_create(
+                [TrendingScore(post=post) for post in posts],
+                batch_size=IMPORT_BATCH_SIZE
+            )
+            transaction.on_commit(lambda: _enqueue_follow_up(posts, remote_media))
+
+    report = {
+        'first_line': records[0][0] if records else None,
+        'last_line': records[-1][0] if records else None,
+        'received': len(records),
+        'created': 0 if dry_run else len(posts),
+        'valid': len(posts),
+        'failed': len(errors),
+        'errors': errors,
+        'seconds': round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        "Imported posts from lines %(first_line)s-%(last_line)s: "
+        "%(created)s created, %(failed)s failed in %(seconds)ss", report
+    )
+    return report
+
+
+def import_records(records, default_author=None, allow_author=True,
+                   batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """Import parsed records batch by batch, yielding each batch report"""
+    for batch in batched(records, batch_size):
+        yield import_batch(batch, default_author, allow_author, dry_run)
+
+
+def import_lines(lines, **options):
+    """Import JSONL ``lines``; see ``import_records`` for the options"""
+    return import_records(parse_lines(lines), **options)
+
+
+def summarize(reports):
+    return {
+        'batches': len(reports),
+        'received': sum(report['received'] for report in reports),
+        'created': sum(report['created'] for report in reports),
+        'failed': sum(report['failed'] for report in reports),
+        'seconds': round(sum(report['seconds'] for report in reports), 3),
+    }
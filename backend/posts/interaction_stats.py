@@ -0,0 +1,112 @@
+"""
+Cached interaction counters.
+
+Per-user and per-post ``PostInteraction`` totals live in Redis hashes
+(``interactions:user:{id}`` and ``interactions:post:{id}``) with one field
+per interaction type plus ``total`` (and ``unique_users`` for posts).
+Creating or deleting an interaction increments the hashes after commit, but
+only when they are already warm, so a cold hash is never half filled. A
+cold read is answered with one conditional-aggregation query whose result
+then warms the hash; the TTL bounds any drift from races with that refill.
+"""
+import functools
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django_redis import get_redis_connection
+
+from .models import PostInteraction
+
+USER_KEY = 'interactions:user:{user_id}'
+POST_KEY = 'interactions:post:{post_id}'
+
+INTERACTION_STATS_TTL = getattr(settings, 'INTERACTION_STATS_TTL', 60 * 60 * 24)
+
+INTERACTION_TYPES = ('LIKE', 'SHARE', 'SAVE')
+
+# HINCRBY each field/delta pair of ARGV, but only if the hash already exists
+INCREMENT_IF_WARM = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+@functools.lru_cache(maxsize=None)
+def _increment_if_warm():
+    """``INCREMENT_IF_WARM`` registered once per process"""
+    return _redis().register_script(INCREMENT_IF_WARM)
+
+
+def _type_counts():
+    counts = {
+        interaction_type: Count('id', filter=Q(interaction_type=interaction_type))
+        for interaction_type in INTERACTION_TYPES
+    }
+    counts['total'] = Count('id')
+    return counts
+
+
+def _read(key, compute):
+    conn = _redis()
+    cached = conn.hgetall(key)
+    if cached:
+        return {field.decode(): int(value) for field, value in cached.items()}
+    stats = compute()
+    pipe = conn.pipeline(transaction=False)
+    pipe.hset(key, mapping=stats)
+    pipe.expire(key, INTERACTION_STATS_TTL)
+    pipe.execute()
+    return stats
+
+
+def user_stats(user_id):
+    """``{'LIKE': n, 'SHARE': n, 'SAVE': n, 'total': n}`` for a user"""
+    return _read(
+        USER_KEY.format(user_id=user_id),
+        lambda: PostInteraction.objects.filter(user_id=user_id).aggregate(**_type_counts())
+    )
+
+
+def post_stats(post_id):
+    """Per-type counts, ``total`` and ``unique_users`` for a post"""
+    return _read(
+        POST_KEY.format(post_id=post_id),
+        lambda: PostInteraction.objects.filter(post_id=post_id).aggregate(
+            unique_users=Count('user', distinct=True), **_type_counts()
+        )
+    )
+
+
+def _increment(user_id, post_id, interaction_type, delta, unique_delta):
+    script = _increment_if_warm()
+    script(keys=[USER_KEY.format(user_id=user_id)], args=[interaction_type, delta, 'total', delta])
+    post_args = [interaction_type, delta, 'total', delta]
+    if unique_delta:
+        post_args += ['unique_users', unique_delta]
+    script(keys=[POST_KEY.format(post_id=post_id)], args=post_args)
+
+
+def record(interaction, delta, first_or_last=False):
+    """
+    Count an interaction created (``delta=1``) or deleted (``delta=-1``) once
+    the surrounding transaction commits. ``first_or_last`` marks the user's
+    first or last interaction with the post, which moves ``unique_users``.
+    """
+    args = (
+        interaction.user_id,
+        interaction.post_id,
+        interaction.interaction_type,
+        delta,
+        delta if first_or_last else 0,
+    )
+    transaction.on_commit(lambda: _increment(*args))
@@ -0,0 +1,99 @@
+"""
+Idempotent like/unlike operations.
+
+Liking is a set/unset on the many-to-many through table: one conditional
+``INSERT ... ON CONFLICT DO NOTHING`` or one ``DELETE``, with ``RETURNING``
+telling us whether the row actually changed. The denormalized counter is
+only adjusted for rows that changed, so repeated taps and retries are free
+and never drift the count. Cost is constant regardless of how many likes a
+post already has.
+"""
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Post, Comment
+from .trending import mark_dirty
+
+MAX_BATCH_OPS = 200
+
+
+def _columns(through, target_field):
+    """Quoted table, target column and user column of a through table"""
+    opts = through._meta
+    qn = connection.ops.quote_name
+    return (
+        qn(opts.db_table),
+        qn(opts.get_field(target_field).column),
+        qn(opts.get_field('user').column),
+    )
+
+
+def _set_members(through, target_field, target_ids, user_id, liked):
+    """
+    Insert or delete ``(target, user)`` rows and return the target ids whose
+    membership actually changed.
+    """
+    if not target_ids:
+        return []
+    table, target_column, user_column = _columns(through, target_field)
+    target_ids = list(dict.fromkeys(str(target_id) for target_id in target_ids))
+    if liked:
+        sql = (
+            f'INSERT INTO {table} ({target_column}, {user_column}) '
+            f'SELECT target_id::uuid, %s FROM unnest(%s::text[]) AS target_id '
+            f'ON CONFLICT DO NOTHING RETURNING {target_column}'
+        )
+    else:
+        sql = (
+            f'DELETE FROM {table} WHERE {user_column} = %s '
+            f'AND {target_column} = ANY(%s::uuid[]) RETURNING {target_column}'
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, target_ids])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _adjust_likes(model, added, removed):
+    """Apply +1/-1 to ``likes_count`` of many rows in one UPDATE"""
+    changed = list(added) + list(removed)
+    if not changed:
+        return
+    delta = Case(
+        When(pk__in=list(added), then=Value(1)),
+        default=Value(-1),
+        output_field=IntegerField()
+    )
+    model.objects.filter(pk__in=changed).update(
+        likes_count=Greatest(F('likes_count') + delta, Value(0))
+    )
+
+
+def set_post_likes(user, likes=(), unlikes=()):
+    """
+    Like the posts in ``likes`` and unlike those in ``unlikes`` for ``user``.
+    Returns ``(liked, unliked)``: the post ids whose state actually changed.
+    Call inside ``transaction.atomic()``.
+    """
+    liked = _set_members(Post.likes.through, 'post', likes, user.id, True)
+    unliked = _set_members(Post.likes.through, 'post', unlikes, user.id, False)
+    _adjust_likes(Post, liked, unliked)
+    for post_id in liked + unliked:
+        mark_dirty(post_id)
+    return liked, unliked
+
+
+def set_post_like(user, post_id, liked):
+    """Set a single like; returns True if the state changed"""
+    changed = set_post_likes(
+        user, likes=[post_id] if liked else (), unlikes=() if liked else [post_id]
+    )
+    return bool(changed[0] or changed[1])
+
+
+def set_comment_like(user, comment_id, liked):
+    """Set a single comment like; returns True if the state changed"""
+    changed = _set_members(Comment.likes.through, 'comment', [comment_id], user.id, liked)
+    if changed:
+        _adjust_likes(Comment, changed if liked else [], [] if liked else changed)
+    return bool(changed)
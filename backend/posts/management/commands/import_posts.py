@@ -0,0 +1,77 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.ingest import IMPORT_BATCH_SIZE, import_lines, summarize
+
+
+class Command(BaseCommand):
+    help = 'Bulk import posts from a JSONL file (one post per line)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='JSONL file to import, or - for stdin'
+        )
+        parser.add_argument(
+            '--author',
+            help='Username used for records without an "author"'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Number of records validated and written per batch'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate records without writing'
+        )
+        parser.add_argument(
+            '--report',
+            help='Write the per-batch reports to this file as JSON'
+        )
+
+    def handle(self, *args, **options):
+        default_author = None
+        if options['author']:
+            try:
+                default_author = get_user_model().objects.get(username=options['author'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Unknown author {options['author']!r}")
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        reports = []
+        try:
+            for report in import_lines(
+                source,
+                default_author=default_author,
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run']
+            ):
+                reports.append(report)
+                self.stdout.write(
+                    f"Lines {report['first_line']}-{report['last_line']}: "
+                    f"{report['created']} created, {report['failed']} failed "
+                    f"in {report['seconds']}s"
+                )
+                for error in report['errors']:
+                    self.stderr.write(f"  line {error['line']}: {error['errors']}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        summary = summarize(reports)
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as handle:
+                json.dump({'summary': summary, 'batches': reports}, handle, indent=2, default=str)
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        count = summary['received'] - summary['failed'] if options['dry_run'] else summary['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} posts in {summary['batches']} batches "
+            f"({summary['failed']} failed, {summary['seconds']}s)"
+        ))
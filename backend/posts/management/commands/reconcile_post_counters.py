@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from posts.counters import COUNTER_FIELDS, actual_counts
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized post counters and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of posts checked per batch'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted posts without writing'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        actual = {f'actual_{field}': expression for field, expression in actual_counts().items()}
+        drift = Q()
+        for field in COUNTER_FIELDS:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+
+        checked = repaired = 0
+        last_pk = None
+        while True:
+            ids = Post.objects.order_by('pk')
+            if last_pk is not None:
+                ids = ids.filter(pk__gt=last_pk)
+            ids = list(ids.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            checked += len(ids)
+
+            drifted = list(
+                Post.objects.filter(pk__in=ids)
+                    .annotate(**actual)
+                    .filter(drift)
+                    .values_list('pk', flat=True)
+            )
+            if drifted and not dry_run:
+                # Recount inside the UPDATE so concurrent increments are not lost
+                Post.objects.filter(pk__in=drifted).update(**actual_counts())
+            repaired += len(drifted)
+
+        verb = 'Found' if dry_run else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {repaired} drifted posts out of {checked} checked'
+        ))
@@ -0,0 +1,55 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    PostInteraction = apps.get_model("posts", "PostInteraction")
+
+    def count_of(queryset):
+        return Coalesce(
+            Subquery(
+                queryset.order_by()
+                .values("post_id")
+                .annotate(total=Count("*"))
+                .values("total")
+            ),
+            Value(0),
+        )
+
+    Post.objects.update(
+        likes_count=count_of(Post.likes.through.objects.filter(post_id=OuterRef("pk"))),
+        comments_count=count_of(Comment.objects.filter(post_id=OuterRef("pk"))),
+        shares_count=count_of(
+            PostInteraction.objects.filter(
+                post_id=OuterRef("pk"), interaction_type="SHARE"
+            )
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="shares_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0006_comment_threads"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="postinteraction",
+            index=models.Index(
+                fields=["user", "interaction_type", "-created_at"],
+                name="interaction_user_type_idx",
+            ),
+        ),
+    ]
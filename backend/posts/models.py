@@ -4,6 +4,8 @@ from django.core.files.storage import default_storage
 from django.contrib.auth.models import User
 from django.conf import settings
 
+from .threads import assign_path
+
 class Post(models.Model):
     POST_TYPES = (
         ('NEWS', 'News'),
@@ -27,6 +29,11 @@ class Post(models.Model):
         null=True,
         blank=True
     )
+    # Responsive renditions of ``image``, filled in by core.images via Celery
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Duration, bitrate, waveform peaks and streaming rendition of
+    # ``audio_file``, filled in by core.audio via Celery
+    audio_metadata = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     likes = models.ManyToManyField(
@@ -34,6 +41,11 @@ class Post(models.Model):
         related_name='liked_posts',
         blank=True
     )
+
+    # Denormalized counters, kept current with F() updates (see posts.counters)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    shares_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         ordering = ['-created_at']
@@ -51,6 +63,37 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    likes = models.ManyToManyField(
+        'users.User',
+        related_name='liked_comments',
+        blank=True
+    )
+    likes_count = models.PositiveIntegerField(default=0)
+
+    # Threading: ``path`` is the parent's path plus a fixed-width, time-ordered
+    # segment for this comment, so a subtree is one index range scan on
+    # (post, path) and ordering by path yields depth-first thread order.
+    # See posts.threads.
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='replies'
+    )
+    path = models.CharField(max_length=640, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+            models.Index(fields=['parent', 'path'], name='comment_parent_path_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.path:
+            assign_path(self)
+        super().save(*args, **kwargs)
 
 class PostInteraction(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -67,6 +110,13 @@ class PostInteraction(models.Model):
 
     class Meta:
         unique_together = ('user', 'post', 'interaction_type')
+        indexes = [
+            # Per-user listings such as saved posts, newest first
+            models.Index(
+                fields=['user', 'interaction_type', '-created_at'],
+                name='interaction_user_type_idx'
+            ),
+        ]
 
 class TrendingScore(models.Model):
     post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='trending_score')
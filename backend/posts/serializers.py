@@ -1,15 +1,31 @@
 from rest_framework import serializers
 from .models import Post, Comment, TrendingScore, PostInteraction
 from users.serializers import UserSerializer
+from .viewer_state import ViewerStateListSerializer, get_viewer_state
 from django.conf import settings
+from django.core.files.storage import default_storage
+from core import images
+from core.fieldsets import SparseFieldsMixin
+from core.media_urls import get_media_urls
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     is_author = serializers.SerializerMethodField()
     
     class Meta:
         model = Comment
-        fields = ('id', 'author', 'content', 'created_at', 'is_author')
+        fields = (
+            'id', 'author', 'content', 'created_at', 'likes_count', 'is_author',
+            'parent', 'depth'
+        )
+        read_only_fields = ('likes_count', 'parent', 'depth')
+        list_serializer_class = ViewerStateListSerializer
+        expandable_fields = ('author',)
+        # Thread nesting and reply previews read these on every row
+        required_columns = ('author', 'post', 'parent', 'path', 'depth')
+
+    def get_viewer_ids(self, instances):
+        return [], [comment.author_id for comment in instances]
 
     def get_is_author(self, obj):
         """
@@ -18,71 +34,105 @@ class CommentSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return obj.author.id == request.user.id  # Compare IDs instead of objects
+            return obj.author_id == request.user.id  # Compare IDs instead of objects
         return False
 
-class TrendingScoreSerializer(serializers.ModelSerializer):
+class TrendingScoreSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TrendingScore
         fields = ('score', 'view_count', 'like_count', 'comment_count', 'share_count')
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    is_liked = serializers.BooleanField(read_only=True, default=False)
-    is_saved = serializers.BooleanField(read_only=True, default=False)
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
+    is_liked = serializers.SerializerMethodField()
+    is_saved = serializers.SerializerMethodField()
     trending_data = TrendingScoreSerializer(source='trending_score', read_only=True)
     image_url = serializers.SerializerMethodField()
     audio_url = serializers.SerializerMethodField()
     cover_image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    audio_info = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = [
             'id', 'type', 'title', 'description', 
-            'image', 'image_url', 'cover_image_url',
-            'audio_file', 'audio_url',
+            'image', 'image_url', 'cover_image_url', 'image_srcset',
+            'audio_file', 'audio_url', 'audio_info',
             'author', 'created_at', 'updated_at',
-            'comments_count', 'likes_count', 'is_liked', 
+            'comments_count', 'likes_count', 'shares_count', 'is_liked', 
             'is_saved', 'trending_data'
         ]
         read_only_fields = (
             'id', 'author', 'image_url', 'audio_url', 'cover_image_url',
-            'created_at', 'updated_at', 'comments_count', 'likes_count',
-            'is_liked', 'is_saved', 'trending_data'
+            'image_srcset', 'audio_info', 'created_at', 'updated_at', 'comments_count', 'likes_count',
+            'shares_count', 'is_liked', 'is_saved', 'trending_data'
         )
+        list_serializer_class = ViewerStateListSerializer
+        expandable_fields = ('author',)
+        # Model columns read by computed fields (see core.fieldsets)
+        field_sources = {
+            'image_url': ('type', 'image'),
+            'cover_image_url': ('type', 'image'),
+            'image_srcset': ('image_variants',),
+            'audio_info': ('audio_metadata',),
+            'audio_url': ('audio_file',),
+        }
+        required_columns = ('author',)
+
+    def get_viewer_ids(self, instances):
+        return [post.id for post in instances], [post.author_id for post in instances]
+
+    def get_is_liked(self, obj):
+        return get_viewer_state(self.context).is_liked(obj.id)
+
+    def get_is_saved(self, obj):
+        return get_viewer_state(self.context).is_saved(obj.id)
 
     def get_image_url(self, obj):
         """Return image URL only for NEWS posts"""
-        request = self.context.get('request')
-        if obj.type == 'NEWS' and obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url) if request else obj.image.url
+        if obj.type == 'NEWS':
+            return get_media_urls(self.context).url(obj.image)
         return None
 
     def get_cover_image_url(self, obj):
         """Return image URL for AUDIO posts as cover image"""
-        request = self.context.get('request')
-        if obj.type == 'AUDIO' and obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url) if request else obj.image.url
+        if obj.type == 'AUDIO':
+            return get_media_urls(self.context).url(obj.image)
         return None
 
+    def get_image_srcset(self, obj):
+        """Responsive renditions of the post image, once they are generated"""
+        return images.srcset(obj.image_variants, get_media_urls(self.context).url)
+
+    def get_audio_info(self, obj):
+        """Duration, format details, waveform peaks and streaming URL of the audio"""
+        metadata = obj.audio_metadata
+        if not metadata:
+            return None
+        stream_url = get_media_urls(self.context).url(metadata.get('stream'))
+        return {
+            'duration': metadata.get('duration'),
+            'bitrate': metadata.get('bitrate'),
+            'channels': metadata.get('channels'),
+            'sample_rate': metadata.get('sample_rate'),
+            'peaks': metadata.get('peaks', []),
+            'stream_url': stream_url,
+        }
+
     def get_audio_url(self, obj):
-        request = self.context.get('request')
-        if obj.audio_file and hasattr(obj.audio_file, 'url'):
-            return request.build_absolute_uri(obj.audio_file.url) if request else obj.audio_file.url
-        return None
+        return get_media_urls(self.context).url(obj.audio_file)
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Remove the raw image path if we have the URL
-        if data['type'] == 'NEWS' and data['image_url']:
+        if data.get('image_url') and instance.type == 'NEWS':
             data.pop('image', None)
             data.pop('cover_image_url', None)  # Remove cover_image_url for NEWS posts
-        elif data['type'] == 'AUDIO' and data['cover_image_url']:
+        elif data.get('cover_image_url') and instance.type == 'AUDIO':
             data.pop('image', None)
             data.pop('image_url', None)  # Remove image_url for AUDIO posts
-        if data['audio_url']:
+        if data.get('audio_url'):
             data.pop('audio_file', None)
         return data
 
@@ -119,4 +169,34 @@ class PostInteractionSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data) 
\ No newline at end of file
+        return super().create(validated_data) 
+
+
+class PostImportSerializer(serializers.Serializer):
+    """One record of a bulk post import (see posts.ingest)"""
+    type = serializers.ChoiceField(choices=Post.POST_TYPES, default='NEWS')
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    author = serializers.CharField(required=False, allow_blank=True)
+    # Storage paths under the post media directories, or http(s) URLs
+    image = serializers.CharField(required=False, allow_blank=True, max_length=2000)
+    audio_file = serializers.CharField(required=False, allow_blank=True, max_length=2000)
+
+    def _validate_reference(self, value, directory):
+        if value and not value.startswith(('http://', 'https://')):
+            if not value.startswith(directory) or '..' in value.split('/'):
+                raise serializers.ValidationError(f'Storage paths must be under {directory}')
+            if not default_storage.exists(value):
+                raise serializers.ValidationError('File not found in storage')
+        return value
+
+    def validate_image(self, value):
+        return self._validate_reference(value, 'posts/images/')
+
+    def validate_audio_file(self, value):
+        return self._validate_reference(value, 'posts/audio/')
+
+    def validate(self, data):
+        if data['type'] == 'AUDIO' and not (data.get('image') and data.get('audio_file')):
+            raise serializers.ValidationError('Audio posts need an image and an audio_file')
+        return data
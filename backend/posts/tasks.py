@@ -1,39 +1,185 @@
 from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
-from .models import Post, TrendingScore
-from django.db.models import Count
+from .models import Post
 
 @shared_task
 def update_trending_scores():
     """Update trending scores for all posts periodically"""
+    from .trending import recompute_scores
+
     time_window = timezone.now() - timedelta(days=7)
-    posts = Post.objects.filter(
-        created_at__gte=time_window
-    ).select_related('trending_score')
-
-    for post in posts:
-        try:
-            trending_score = post.trending_score
-        except TrendingScore.DoesNotExist:
-            trending_score = TrendingScore.objects.create(post=post)
-
-        # Update counts
-        trending_score.like_count = post.likes.count()
-        trending_score.comment_count = post.comments.count()
-        trending_score.share_count = post.postinteraction_set.filter(
-            interaction_type='SHARE'
-        ).count()
-
-        # Calculate score
-        time_diff = timezone.now() - post.created_at
-        hours_since_posted = time_diff.total_seconds() / 3600
-
-        score = (
-            trending_score.like_count * 1.5 +
-            trending_score.comment_count * 2.0 +
-            trending_score.share_count * 2.5
-        ) / (hours_since_posted + 2) ** 1.8
-
-        trending_score.score = score
-        trending_score.save() 
\ No newline at end of file
+    return recompute_scores(since=time_window)
+
+
+@shared_task
+def recompute_dirty_trending_scores():
+    """Recompute trending scores for posts that had interactions recently"""
+    from .trending import recompute_dirty
+
+    return recompute_dirty()
+
+
+@shared_task
+def fanout_post(post_id):
+    """Push a newly created post into its author's followers' timelines"""
+    from . import timeline
+
+    try:
+        post = Post.objects.only('id', 'author_id', 'created_at').get(id=post_id)
+    except Post.DoesNotExist:
+        return 0
+    return timeline.fanout_post(post)
+
+
+@shared_task
+def remove_post_from_timelines(post_id, author_id):
+    """Remove a deleted post from follower timelines"""
+    from . import timeline
+
+    timeline.remove_post(post_id, author_id)
+
+
+@shared_task
+def sync_timeline_follow(user_id, author_id, following=True):
+    """Backfill or evict an author's posts after a follow/unfollow"""
+    from . import timeline
+
+    if following:
+        timeline.backfill_author(user_id, author_id)
+    else:
+        timeline.evict_author(user_id, author_id)
+
+
+@shared_task
+def refresh_featured_pool():
+    """Rebuild the featured post pool used by highlights"""
+    from . import featured
+
+    return featured.refresh_pool()
+
+
+@shared_task
+def generate_post_image_variants(post_id):
+    """Render responsive, metadata-free renditions of a post's image"""
+    from core import images
+
+    try:
+        post = Post.objects.only('id', 'image').get(id=post_id)
+    except Post.DoesNotExist:
+        return 0
+    if not post.image:
+        return 0
+
+    name = post.image.name
+    variants = images.build_variants(name, images.IMAGE_VARIANT_WIDTHS)
+    # Only attach them if the image was not replaced in the meantime
+    if not Post.objects.filter(id=post_id, image=name).update(image_variants=variants):
+        images.delete_variants(variants)
+        return 0
+    return len(variants['sizes'])
+
+
+@shared_task
+def process_audio_post(post_id):
+    """Extract audio metadata and waveform peaks and render a streaming copy"""
+    from core import audio
+
+    try:
+        post = Post.objects.only('id', 'audio_file').get(id=post_id)
+    except Post.DoesNotExist:
+        return None
+    if not post.audio_file:
+        return None
+
+    name = post.audio_file.name
+    metadata = audio.analyze(name)
+    # Only attach it if the audio was not replaced in the meantime
+    if not Post.objects.filter(id=post_id, audio_file=name).update(audio_metadata=metadata):
+        audio.delete_rendition(metadata)
+        return None
+    return metadata['duration']
+
+
+@shared_task
+def flush_post_views():
+    """Write buffered post views to the database"""
+    from .impressions import flush_views
+
+    return flush_views()
+
+
+def _check_public_url(url):
+    """Refuse URLs whose host resolves to a private, loopback or link-local address"""
+    import ipaddress
+    import socket
+    from urllib.parse import urlparse
+
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError(f'Unsupported media URL: {url}')
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    for *_, sockaddr in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP):
+        address = ipaddress.ip_address(sockaddr[0])
+        if not address.is_global:
+            raise ValueError(f'Media URL resolves to a non-public address: {url}')
+
+
+@shared_task
+def import_post_media(post_id, image=None, audio_file=None):
+    """Download the remote media of an imported post into storage"""
+    import os
+    import tempfile
+    from urllib.parse import urlparse
+
+    import requests
+    from django.conf import settings
+    from django.core.files import File
+    from django.core.files.storage import default_storage
+    from core.utils import store_upload
+
+    max_bytes = getattr(settings, 'POST_IMPORT_MAX_MEDIA_BYTES', 100 * 1024 * 1024)
+
+    targets = (
+        ('image', image, 'posts/images', ('image/',)),
+        ('audio_file', audio_file, 'posts/audio', ('audio/',)),
+    )
+    stored = {}
+    try:
+        for field, url, directory, allowed_types in targets:
+            if not url:
+                continue
+            _check_public_url(url)
+            with tempfile.TemporaryFile() as buffer:
+                # Redirects are not followed: they could lead to internal hosts
+                with requests.get(url, stream=True, timeout=30, allow_redirects=False) as response:
+                    response.raise_for_status()
+                    if response.is_redirect:
+                        raise ValueError(f'Media URL redirects elsewhere: {url}')
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise ValueError(f'Media at {url} exceeds {max_bytes} bytes')
+                        buffer.write(chunk)
+                name = os.path.basename(urlparse(url).path) or field
+                media = File(buffer, name=name)
+                # Declared type, checked when libmagic cannot sniff the bytes
+                media.content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+                stored[field] = store_upload(media, directory, allowed_types).path
+    except Exception:
+        # Do not leave half of the post's media behind
+        for path in stored.values():
+            default_storage.delete(path)
+        raise
+
+    if not stored or not Post.objects.filter(id=post_id).update(**stored):
+        for path in stored.values():
+            default_storage.delete(path)
+        return None
+
+    if 'image' in stored:
+        generate_post_image_variants(post_id)
+    if 'audio_file' in stored:
+        process_audio_post(post_id)
+    return stored
@@ -1,3 +1,212 @@
+import uuid
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+
+from users.models import User
+from . import likes, timeline
+from .counters import actual_counts
+from .models import Post, TrendingScore
+
+
+def make_user(name):
+    return User.objects.create_user(
+        email=f'{name}@example.com', username=name, password='test-pass'
+    )
+
+
+def make_posts(author, count):
+    return [
+        Post.objects.create(author=author, type='NEWS', title=f'Post {n}', description='Body')
+        for n in range(count)
+    ]
+
+
+class PostLikeTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user('author')
+        self.user = make_user('liker')
+        self.posts = make_posts(self.author, 4)
+        self.post = self.posts[0]
+
+    def assertCountersAccurate(self, posts):
+        rows = Post.objects.filter(pk__in=[post.pk for post in posts])\
+            .annotate(actual_likes=actual_counts()['likes_count'])
+        for row in rows:
+            self.assertEqual(row.likes_count, row.actual_likes, f'likes_count drifted on {row.pk}')
+
+    def likes_count(self, post):
+        return Post.objects.values_list('likes_count', flat=True).get(pk=post.pk)
+
+    def test_liking_twice_counts_once(self):
+        self.assertTrue(likes.set_post_like(self.user, self.post.id, True))
+        self.assertFalse(likes.set_post_like(self.user, self.post.id, True))
+        self.assertEqual(self.likes_count(self.post), 1)
+        self.assertCountersAccurate([self.post])
+
+    def test_unliking_twice_counts_once(self):
+        likes.set_post_like(self.user, self.post.id, True)
+        self.assertTrue(likes.set_post_like(self.user, self.post.id, False))
+        self.assertFalse(likes.set_post_like(self.user, self.post.id, False))
+        self.assertEqual(self.likes_count(self.post), 0)
+        self.assertCountersAccurate([self.post])
+
+    def test_unliking_an_unliked_post_does_not_go_negative(self):
+        self.assertFalse(likes.set_post_like(self.user, self.post.id, False))
+        self.assertEqual(self.likes_count(self.post), 0)
+
+    def test_mixed_batch(self):
+        already_liked, to_unlike, not_liked, to_like = self.posts
+        likes.set_post_likes(self.user, likes=[already_liked.id, to_unlike.id])
+        missing = uuid.uuid4()
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/posts/likes/batch/', {'operations': [
+            {'post_id': str(already_liked.id), 'liked': True},
+            {'post_id': str(to_unlike.id), 'liked': False},
+            {'post_id': str(not_liked.id), 'liked': False},
+            {'post_id': str(to_like.id), 'liked': False},
+            {'post_id': str(to_like.id), 'liked': True},
+            {'post_id': str(missing), 'liked': True},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['liked'], [str(to_like.id)])
+        self.assertEqual(data['unliked'], [str(to_unlike.id)])
+        self.assertCountEqual(data['unchanged'], [str(already_liked.id), str(not_liked.id)])
+        self.assertEqual(data['not_found'], [str(missing)])
+        self.assertEqual(
+            [self.likes_count(post) for post in self.posts], [1, 0, 0, 1]
+        )
+        self.assertCountersAccurate(self.posts)
+
+        # Replaying the same batch changes nothing
+        response = client.post('/api/posts/likes/batch/', {'operations': [
+            {'post_id': str(to_like.id), 'liked': True},
+            {'post_id': str(to_unlike.id), 'liked': False},
+        ]}, format='json')
+        data = response.json()['data']
+        self.assertEqual((data['liked'], data['unliked']), ([], []))
+        self.assertCountersAccurate(self.posts)
+
+    def test_invalid_liked_value_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            f'/api/posts/{self.post.id}/like/', {'liked': 'maybe'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.likes_count(self.post), 0)
+
+
+class TimelineTests(TestCase):
+
+    def setUp(self):
+        self.viewer = make_user('viewer')
+        self.author = make_user('followed')
+        self.redis = get_redis_connection('default')
+        self.addCleanup(
+            self.redis.delete,
+            timeline.timeline_key(self.viewer.id),
+            timeline.empty_timeline_key(self.viewer.id)
+        )
+
+    def follow_tied_posts(self, count):
+        """Posts by a followed author that all share one timestamp"""
+        self.viewer.following.add(self.author)
+        posts = make_posts(self.author, count)
+        Post.objects.filter(pk__in=[post.pk for post in posts]).update(created_at=timezone.now())
+        return {str(post.pk) for post in posts}
+
+    def read_all(self, limit):
+        seen, before = [], None
+        while True:
+            entries, _ = timeline.read_timeline(self.viewer, before=before, limit=limit)
+            if not entries:
+                return seen
+            seen += [post_id for post_id, _ in entries]
+            last_id, last_score = entries[-1]
+            before = (last_score, last_id)
+
+    def test_ties_across_pages_are_not_skipped(self):
+        post_ids = self.follow_tied_posts(5)
+        seen = self.read_all(limit=2)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), post_ids)
+
+    def test_ties_across_pages_when_rebuilding(self):
+        post_ids = self.follow_tied_posts(5)
+        # A cold timeline serves the first page from the rebuild itself
+        self.redis.delete(timeline.timeline_key(self.viewer.id))
+        first, _ = timeline.read_timeline(self.viewer, limit=2)
+        self.redis.delete(timeline.timeline_key(self.viewer.id))
+        last_id, last_score = first[-1]
+        rest, _ = timeline.read_timeline(self.viewer, before=(last_score, last_id), limit=10)
+        seen = [post_id for post_id, _ in first + rest]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), post_ids)
+
+    def test_reverse_paging_returns_the_previous_page(self):
+        self.follow_tied_posts(4)
+        first, _ = timeline.read_timeline(self.viewer, limit=2)
+        last_id, last_score = first[-1]
+        second, _ = timeline.read_timeline(self.viewer, before=(last_score, last_id), limit=2)
+
+        first_id, first_score = second[0]
+        previous, _ = timeline.read_timeline(
+            self.viewer, after=(first_score, first_id), limit=2
+        )
+        self.assertEqual(previous, list(reversed(first)))
+
+    def test_empty_timeline_is_not_rebuilt_on_every_read(self):
+        self.assertEqual(timeline.read_timeline(self.viewer), ([], 0))
+        self.assertTrue(self.redis.exists(timeline.empty_timeline_key(self.viewer.id)))
+        with mock.patch.object(timeline, 'rebuild_timeline') as rebuild:
+            self.assertEqual(timeline.read_timeline(self.viewer), ([], 0))
+        rebuild.assert_not_called()
+
+    def test_following_clears_the_empty_marker(self):
+        timeline.read_timeline(self.viewer)
+        self.viewer.following.add(self.author)
+        post_ids = {str(post.pk) for post in make_posts(self.author, 2)}
+        timeline.backfill_author(self.viewer.id, self.author.id)
+        entries, total = timeline.read_timeline(self.viewer)
+        self.assertEqual({post_id for post_id, _ in entries}, post_ids)
+        self.assertEqual(total, 2)
+
+    def test_empty_timeline_falls_back_to_paginated_trending_feed(self):
+        posts = make_posts(make_user('stranger'), 3)
+        for rank, post in enumerate(posts):
+            TrendingScore.objects.create(post=post, score=10 - rank)
+
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        first = client.get('/api/posts/feed/', {'page_size': 2})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json()['results']), 2)
+        self.assertIsNotNone(first.json()['next'])
+
+        second = client.get(first.json()['next'])
+        self.assertEqual(second.status_code, 200)
+        seen = [post['id'] for post in first.json()['results'] + second.json()['results']]
+        self.assertEqual(seen, [str(post.pk) for post in posts])
+
+    def test_timeline_cursor_is_rejected_by_the_fallback_feed(self):
+        self.follow_tied_posts(3)
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        first = client.get('/api/posts/feed/', {'page_size': 2})
+        self.assertEqual(first.status_code, 200)
 
-# Create your tests here.
+        # The timeline empties, so the timeline cursor reaches the fallback
+        self.viewer.following.clear()
+        Post.objects.filter(author=self.author).delete()
+        self.redis.delete(timeline.timeline_key(self.viewer.id))
+        response = client.get(first.json()['next'])
+        self.assertEqual(response.status_code, 404)
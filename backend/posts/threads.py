@@ -0,0 +1,113 @@
+"""
+Materialized-path comment threads.
+
+Every comment stores ``path``: its parent's path followed by a fixed-width
+segment built from its creation time (microseconds, hex) and id. Because
+segments are fixed width and time ordered:
+
+* a comment's whole subtree is ``post = X AND path >= P AND path < P || '~'``,
+  a single range scan on the (post, path) index;
+* ordering by ``path`` gives depth-first thread order with siblings oldest
+  first;
+* ``depth`` is simply ``len(path) / SEGMENT_LENGTH - 1``.
+"""
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+SEGMENT_LENGTH = 19
+# Sorts after every character used in a path
+PATH_UPPER_BOUND = '~'
+MAX_DEPTH = 32
+COMMENT_REPLY_PREVIEW = getattr(settings, 'COMMENT_REPLY_PREVIEW', 3)
+MAX_REPLY_PREVIEW = 20
+
+
+def path_segment(created_at, comment_id):
+    micros = int(created_at.timestamp() * 1_000_000)
+    return f'{micros:013x}{comment_id.hex[:6]}'
+
+
+def assign_path(comment):
+    """Fill in ``path`` and ``depth`` of an unsaved comment"""
+    parent = comment.parent
+    # Replies below the maximum depth are attached to the deepest allowed level
+    while parent is not None and parent.depth >= MAX_DEPTH - 1:
+        parent = parent.parent
+    comment.parent = parent
+    segment = path_segment(comment.created_at or timezone.now(), comment.id)
+    comment.path = (parent.path if parent else '') + segment
+    comment.depth = parent.depth + 1 if parent else 0
+
+
+def subtree(queryset, post_id, path):
+    """A comment and all of its descendants in thread order, in one range query"""
+    return queryset.filter(
+        post_id=post_id,
+        path__gte=path,
+        path__lt=path + PATH_UPPER_BOUND
+    ).order_by('path')
+
+
+def root_path(comment):
+    return comment.path[:SEGMENT_LENGTH]
+
+
+def first_replies(queryset, parent_ids, limit):
+    """The first ``limit`` direct replies of each parent, in one query"""
+    if not parent_ids or limit <= 0:
+        return []
+    return list(
+        queryset.filter(parent_id__in=list(parent_ids))
+            .annotate(position=Window(
+                expression=RowNumber(),
+                partition_by=[F('parent_id')],
+                order_by=F('path').asc()
+            ))
+            .filter(position__lte=limit)
+            .order_by('path')
+    )
+
+
+def with_reply_previews(roots, queryset, limit, serialize):
+    """
+    Serialize ``roots`` with the first ``limit`` replies of each nested under
+    ``replies`` and a ``has_more_replies`` flag. ``serialize`` turns a list of
+    comments into a list of dicts; it is called once for roots and replies.
+    """
+    roots = list(roots)
+    # One extra reply per root tells whether there are more to load
+    replies = first_replies(queryset, [root.id for root in roots], limit + 1)
+    more = {reply.parent_id for reply in replies if reply.position > limit}
+    replies = [reply for reply in replies if reply.position <= limit]
+
+    data = serialize(roots + replies)
+    nodes = []
+    by_id = {}
+    for root, item in zip(roots, data):
+        node = dict(item, replies=[], has_more_replies=root.id in more)
+        by_id[root.id] = node
+        nodes.append(node)
+    for reply, item in zip(replies, data[len(roots):]):
+        by_id[reply.parent_id]['replies'].append(dict(item, replies=[]))
+    return nodes
+
+
+def nest(comments, serialize):
+    """
+    Nest comments given in path order into ``replies`` lists. Comments whose
+    parent is not in ``comments`` are returned at the top level.
+    """
+    comments = list(comments)
+    nodes = {}
+    top = []
+    for comment, item in zip(comments, serialize(comments)):
+        node = dict(item, replies=[])
+        nodes[comment.id] = node
+        parent = nodes.get(comment.parent_id)
+        if parent is not None:
+            parent['replies'].append(node)
+        else:
+            top.append(node)
+    return top
@@ -0,0 +1,247 @@
+"""
+Home timeline store.
+
+Every user has a bounded sorted set in Redis (``timeline:<user_id>``) holding
+the ids of posts from the authors they follow, scored at write time. Posts are
+pushed into follower timelines by the ``fanout_post`` task when they are
+created (fan-out-on-write). Authors with very large follower counts are not
+fanned out; their posts are merged into the timeline at read time instead
+(fan-out-on-read).
+
+Redis does not keep empty sorted sets, so a rebuild that finds no posts
+stores a short-lived ``timeline:<user_id>:empty`` marker instead; until it
+expires the timeline reads as empty without going back to the database.
+"""
+import logging
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django_redis import get_redis_connection
+
+from users.models import User
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_KEY = 'timeline:{user_id}'
+# Marks the pagination cursors issued for timeline pages
+CURSOR_SOURCE = 'timeline'
+TIMELINE_EMPTY_KEY = 'timeline:{user_id}:empty'
+FANOUT_ON_READ_AUTHORS_KEY = 'timeline:fanout_on_read_authors'
+
+TIMELINE_MAX_LENGTH = getattr(settings, 'TIMELINE_MAX_LENGTH', 800)
+TIMELINE_FANOUT_THRESHOLD = getattr(settings, 'TIMELINE_FANOUT_THRESHOLD', 10000)
+TIMELINE_FANOUT_BATCH_SIZE = getattr(settings, 'TIMELINE_FANOUT_BATCH_SIZE', 1000)
+TIMELINE_TTL = getattr(settings, 'TIMELINE_TTL', 60 * 60 * 24 * 7)
+TIMELINE_EMPTY_TTL = getattr(settings, 'TIMELINE_EMPTY_TTL', 60 * 5)
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def timeline_key(user_id):
+    return TIMELINE_KEY.format(user_id=user_id)
+
+
+def empty_timeline_key(user_id):
+    return TIMELINE_EMPTY_KEY.format(user_id=user_id)
+
+
+def post_score(post):
+    """Rank used for timeline entries, computed once at write time"""
+    return post.created_at.timestamp()
+
+
+def _push(pipe, user_id, entries):
+    """Queue a bounded insert of ``{post_id: score}`` entries for one user"""
+    key = timeline_key(user_id)
+    pipe.zadd(key, entries)
+    pipe.zremrangebyrank(key, 0, -(TIMELINE_MAX_LENGTH + 1))
+    pipe.expire(key, TIMELINE_TTL)
+
+
+def is_fanout_on_read_author(author_id):
+    return bool(_redis().sismember(FANOUT_ON_READ_AUTHORS_KEY, str(author_id)))
+
+
+def fanout_post(post):
+    """
+    Push a post into the timeline of every follower of its author.
+    Returns the number of timelines written, or 0 when the author is
+    served by fan-out-on-read.
+    """
+    conn = _redis()
+    followers = User.objects.filter(following=post.author_id).values_list('id', flat=True)
+
+    if followers.count() > TIMELINE_FANOUT_THRESHOLD:
+        conn.sadd(FANOUT_ON_READ_AUTHORS_KEY, str(post.author_id))
+        return 0
+    conn.srem(FANOUT_ON_READ_AUTHORS_KEY, str(post.author_id))
+
+    entries = {str(post.id): post_score(post)}
+    written = 0
+    pipe = conn.pipeline(transaction=False)
+    for follower_id in followers.iterator(chunk_size=TIMELINE_FANOUT_BATCH_SIZE):
+        _push(pipe, follower_id, entries)
+        written += 1
+        if written % TIMELINE_FANOUT_BATCH_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+    return written
+
+
+def remove_post(post_id, author_id):
+    """Remove a deleted post from the timelines it was pushed to"""
+    conn = _redis()
+    followers = User.objects.filter(following=author_id).values_list('id', flat=True)
+    pipe = conn.pipeline(transaction=False)
+    for count, follower_id in enumerate(
+        followers.iterator(chunk_size=TIMELINE_FANOUT_BATCH_SIZE), start=1
+    ):
+        pipe.zrem(timeline_key(follower_id), str(post_id))
+        if count % TIMELINE_FANOUT_BATCH_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+
+
+def backfill_author(user_id, author_id):
+    """Copy an author's recent posts into a user's timeline after a follow"""
+    if is_fanout_on_read_author(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id)\
+        .only('id', 'created_at')\
+        .order_by('-created_at')[:TIMELINE_MAX_LENGTH]
+    entries = {str(post.id): post_score(post) for post in posts}
+    if not entries:
+        return
+    key = timeline_key(user_id)
+    if not _redis().exists(key):
+        # Leave cold timelines alone; they are rebuilt in full on first read,
+        # which a stale empty marker would otherwise prevent
+        _redis().delete(empty_timeline_key(user_id))
+        return
+    pipe = _redis().pipeline(transaction=False)
+    _push(pipe, user_id, entries)
+    pipe.execute()
+
+
+def evict_author(user_id, author_id):
+    """Drop an author's posts from a user's timeline after an unfollow"""
+    post_ids = [
+        str(post_id) for post_id in
+        Post.objects.filter(author_id=author_id)
+            .order_by('-created_at')
+            .values_list('id', flat=True)[:TIMELINE_MAX_LENGTH]
+    ]
+    if post_ids:
+        _redis().zrem(timeline_key(user_id), *post_ids)
+
+
+def rebuild_timeline(user):
+    """Fan-out-on-read rebuild used when a timeline is missing or expired"""
+    posts = Post.objects.filter(author__in=user.following.all())\
+        .only('id', 'created_at')\
+        .order_by('-created_at')[:TIMELINE_MAX_LENGTH]
+    entries = {str(post.id): post_score(post) for post in posts}
+    if entries:
+        pipe = _redis().pipeline(transaction=False)
+        _push(pipe, user.id, entries)
+        pipe.execute()
+    else:
+        _redis().set(empty_timeline_key(user.id), 1, ex=TIMELINE_EMPTY_TTL)
+    return entries
+
+
+def _in_bounds(entry, before, after):
+    """Whether ``(post_id, score)`` lies strictly between two ``(score, post_id)`` positions"""
+    position = (entry[1], entry[0])
+    return (before is None or position < before) and (after is None or position > after)
+
+
+def _beyond(position, lookup):
+    """Posts strictly past ``position`` in ``(created_at, id)`` order; ``lookup`` is lt or gt"""
+    score, post_id = position
+    created_at = datetime.fromtimestamp(score, tz=dt_timezone.utc)
+    return (
+        Q(**{f'created_at__{lookup}': created_at})
+        | Q(created_at=created_at, **{f'id__{lookup}': post_id})
+    )
+
+
+def _fanout_on_read_entries(user, before, after, limit):
+    """Recent posts from followed authors that are not fanned out on write"""
+    author_ids = _redis().smembers(FANOUT_ON_READ_AUTHORS_KEY)
+    if not author_ids:
+        return []
+    followed = user.following.filter(
+        id__in=[uuid.UUID(author_id.decode()) for author_id in author_ids]
+    ).values_list('id', flat=True)
+    posts = Post.objects.filter(author_id__in=list(followed)).only('id', 'created_at')
+    if before is not None:
+        posts = posts.filter(_beyond(before, 'lt'))
+    if after is not None:
+        posts = posts.filter(_beyond(after, 'gt'))
+    ordering = ('created_at', 'id') if after is not None else ('-created_at', '-id')
+    posts = posts.order_by(*ordering)[:limit]
+    return [(str(post.id), post_score(post)) for post in posts]
+
+
+def read_timeline(user, before=None, after=None, offset=0, limit=10):
+    """
+    Return ``(entries, total)`` for one page of a user's home timeline.
+
+    ``before`` and ``after`` are ``(score, post_id)`` cursor positions.
+    ``entries`` is a list of ``(post_id, score)`` pairs ordered by
+    ``(score, post_id)``: descending and strictly below ``before`` or, when
+    paging backwards, ascending and strictly above ``after``. Posts sharing
+    the cursor's score are kept or dropped by their id, so none is skipped
+    at a page boundary. ``total`` is the size of the stored timeline.
+    """
+    conn = _redis()
+    key = timeline_key(user.id)
+    window = offset + limit
+    pipe = conn.pipeline(transaction=False)
+    pipe.exists(key)
+    pipe.exists(empty_timeline_key(user.id))
+    pipe.zcard(key)
+    if after is not None:
+        # Entries tied with the cursor, then those strictly after it
+        pipe.zrangebyscore(key, after[0], after[0], withscores=True)
+        pipe.zrangebyscore(key, f'({after[0]}', '+inf', start=0, num=window, withscores=True)
+    elif before is not None:
+        pipe.zrevrangebyscore(key, before[0], before[0], withscores=True)
+        pipe.zrevrangebyscore(key, f'({before[0]}', '-inf', start=0, num=window, withscores=True)
+    else:
+        pipe.zrevrangebyscore(key, '+inf', '-inf', start=0, num=window, withscores=True)
+    exists, empty, total, *ranges = pipe.execute()
+
+    if exists:
+        entries = [
+            entry for entry in (
+                (post_id.decode(), score) for found in ranges for post_id, score in found
+            )
+            if _in_bounds(entry, before, after)
+        ]
+    elif empty:
+        entries = []
+    else:
+        rebuilt = rebuild_timeline(user)
+        total = len(rebuilt)
+        entries = [entry for entry in rebuilt.items() if _in_bounds(entry, before, after)]
+
+    pulled = _fanout_on_read_entries(user, before, after, window)
+    seen = {post_id for post_id, _ in entries}
+    entries.extend(entry for entry in pulled if entry[0] not in seen)
+    entries.sort(key=lambda entry: (entry[1], entry[0]), reverse=after is None)
+
+    return entries[offset:window], total
+
+
+def hydrate(queryset, post_ids):
+    """Load posts for ``post_ids`` in one query, preserving timeline order"""
+    ids = [uuid.UUID(str(post_id)) for post_id in post_ids]
+    posts = {post.id: post for post in queryset.filter(id__in=ids)}
+    return [posts[post_id] for post_id in ids if post_id in posts]
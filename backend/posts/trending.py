@@ -0,0 +1,184 @@
+"""
+Set-based trending score computation.
+
+Counts for a chunk of posts are gathered with one grouped aggregation per
+source table, the time-decay formula is applied to the whole chunk at once
+with NumPy, and the results are written back with ``bulk_update``.
+
+Interactions do not recount anything in the request path; they only add the
+post id to a Redis "dirty" set via ``mark_dirty``. A frequent worker drains
+that set with ``recompute_dirty`` so only posts that changed are recounted.
+"""
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .models import Post, Comment, PostInteraction, TrendingScore
+
+logger = logging.getLogger(__name__)
+
+VIEW_WEIGHT = 0.1
+LIKE_WEIGHT = 1.5
+COMMENT_WEIGHT = 2.0
+SHARE_WEIGHT = 2.5
+DECAY_OFFSET_HOURS = 2
+DECAY_EXPONENT = 1.8
+
+DEFAULT_CHUNK_SIZE = 1000
+
+DIRTY_POSTS_KEY = 'trending:dirty_posts'
+DIRTY_BATCH_SIZE = getattr(settings, 'TRENDING_DIRTY_BATCH_SIZE', 500)
+
+
+def decayed_scores(like_counts, comment_counts, share_counts, hours_since_posted,
+                   view_counts=None):
+    """Apply the trending formula to equally sized arrays of counts"""
+    if view_counts is None:
+        view_counts = np.zeros(len(like_counts))
+    engagement = (
+        np.asarray(view_counts, dtype=np.float64) * VIEW_WEIGHT +
+        np.asarray(like_counts, dtype=np.float64) * LIKE_WEIGHT +
+        np.asarray(comment_counts, dtype=np.float64) * COMMENT_WEIGHT +
+        np.asarray(share_counts, dtype=np.float64) * SHARE_WEIGHT
+    )
+    hours = np.asarray(hours_since_posted, dtype=np.float64)
+    return engagement / (hours + DECAY_OFFSET_HOURS) ** DECAY_EXPONENT
+
+
+def _grouped_counts(queryset, post_ids):
+    return dict(
+        queryset.filter(post_id__in=post_ids)
+            .order_by()
+            .values('post_id')
+            .annotate(total=Count('*'))
+            .values_list('post_id', 'total')
+    )
+
+
+def _recompute_chunk(post_ids, now):
+    # Create any missing TrendingScore rows in one statement
+    missing = Post.objects.filter(pk__in=post_ids, trending_score__isnull=True)\
+        .values_list('pk', flat=True)
+    TrendingScore.objects.bulk_create(
+        [TrendingScore(post_id=post_id) for post_id in missing],
+        ignore_conflicts=True
+    )
+
+    rows = list(
+        TrendingScore.objects.filter(post_id__in=post_ids)
+            .values_list('id', 'post_id', 'post__created_at', 'view_count')
+    )
+    if not rows:
+        return 0
+
+    likes = _grouped_counts(Post.likes.through.objects, post_ids)
+    comments = _grouped_counts(Comment.objects, post_ids)
+    shares = _grouped_counts(
+        PostInteraction.objects.filter(interaction_type='SHARE'), post_ids
+    )
+
+    like_counts = [likes.get(post_id, 0) for _, post_id, _, _ in rows]
+    comment_counts = [comments.get(post_id, 0) for _, post_id, _, _ in rows]
+    share_counts = [shares.get(post_id, 0) for _, post_id, _, _ in rows]
+    # view_count is maintained by the buffered view flush (posts.impressions)
+    view_counts = [view_count for _, _, _, view_count in rows]
+    hours = [(now - created_at).total_seconds() / 3600 for _, _, created_at, _ in rows]
+    scores = decayed_scores(like_counts, comment_counts, share_counts, hours, view_counts)
+
+    updated = [
+        TrendingScore(
+            id=score_id,
+            post_id=post_id,
+            like_count=like_counts[index],
+            comment_count=comment_counts[index],
+            share_count=share_counts[index],
+            score=float(scores[index]),
+            last_calculated=now
+        )
+        for index, (score_id, post_id, _, _) in enumerate(rows)
+    ]
+    with transaction.atomic():
+        TrendingScore.objects.bulk_update(
+            updated,
+            ['like_count', 'comment_count', 'share_count', 'score', 'last_calculated']
+        )
+    return len(updated)
+
+
+def recompute_scores(post_ids=None, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recompute trending scores for ``post_ids`` or for every post created
+    after ``since``. Returns a report with the row count, duration and rate.
+    """
+    started = time.monotonic()
+    now = timezone.now()
+    total = 0
+
+    if post_ids is not None:
+        post_ids = list(post_ids)
+        for start in range(0, len(post_ids), chunk_size):
+            total += _recompute_chunk(post_ids[start:start + chunk_size], now)
+    else:
+        posts = Post.objects.order_by('pk')
+        if since is not None:
+            posts = posts.filter(created_at__gte=since)
+        last_pk = None
+        while True:
+            chunk = posts if last_pk is None else posts.filter(pk__gt=last_pk)
+            chunk_ids = list(chunk.values_list('pk', flat=True)[:chunk_size])
+            if not chunk_ids:
+                break
+            last_pk = chunk_ids[-1]
+            total += _recompute_chunk(chunk_ids, now)
+
+    duration = time.monotonic() - started
+    report = {
+        'rows': total,
+        'duration_seconds': round(duration, 3),
+        'rows_per_second': round(total / duration, 1) if duration else float(total),
+    }
+    logger.info(
+        "Recomputed %(rows)s trending scores in %(duration_seconds)ss "
+        "(%(rows_per_second)s rows/sec)", report
+    )
+    return report
+
+
+def mark_dirty(post_id):
+    """Flag a post for recomputation once the current transaction commits"""
+    post_id = str(post_id)
+    transaction.on_commit(
+        lambda: get_redis_connection('default').sadd(DIRTY_POSTS_KEY, post_id)
+    )
+
+
+def recompute_dirty(batch_size=DIRTY_BATCH_SIZE, max_batches=None):
+    """
+    Drain the dirty set in batches and recompute just those posts.
+    Popped ids are put back if a batch fails so they are retried.
+    """
+    conn = get_redis_connection('default')
+    rows = batches = 0
+    started = time.monotonic()
+    while max_batches is None or batches < max_batches:
+        popped = conn.spop(DIRTY_POSTS_KEY, batch_size)
+        if not popped:
+            break
+        post_ids = [post_id.decode() for post_id in popped]
+        try:
+            rows += recompute_scores(post_ids=post_ids, chunk_size=batch_size)['rows']
+        except Exception:
+            conn.sadd(DIRTY_POSTS_KEY, *post_ids)
+            raise
+        batches += 1
+
+    duration = time.monotonic() - started
+    if rows:
+        logger.info("Recomputed %s dirty trending scores in %.3fs", rows, duration)
+    return {'rows': rows, 'batches': batches, 'duration_seconds': round(duration, 3)}
@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet
+from .views import PostInteractionViewSet, PostViewSet
 
 router = DefaultRouter()
+# Registered first so the prefix is not taken for a post id
+router.register('interactions', PostInteractionViewSet, basename='post-interactions')
 router.register('', PostViewSet, basename='posts')
 
 urlpatterns = [
@@ -0,0 +1,93 @@
+"""
+Batched viewer state.
+
+``ViewerState`` answers "has the viewer liked / saved this post" and "does
+the viewer follow this user" for a whole page at once, with one query per
+relation instead of a correlated ``Exists`` subquery per row. List
+serializers resolve the page up front (see ``ViewerStateListSerializer``)
+and field methods read the result from the serializer context, so every
+endpoint gets correct viewer flags at a constant query cost.
+"""
+from rest_framework import serializers
+
+from users.models import User
+from .models import Post, PostInteraction
+
+CONTEXT_KEY = 'viewer_state'
+
+
+class ViewerState:
+    """Liked, saved and followed id sets of one viewer"""
+
+    def __init__(self, user):
+        self.user = user if user is not None and user.is_authenticated else None
+        self.liked = set()
+        self.saved = set()
+        self.followed = set()
+        self._posts = set()
+        self._users = set()
+
+    def resolve(self, post_ids=(), user_ids=()):
+        """Load state for ids not seen yet; one query per relation"""
+        post_ids = {post_id for post_id in post_ids if post_id not in self._posts}
+        user_ids = {user_id for user_id in user_ids if user_id not in self._users}
+        self._posts |= post_ids
+        self._users |= user_ids
+        if self.user is None:
+            return self
+
+        if post_ids:
+            self.liked.update(
+                Post.likes.through.objects.filter(
+                    user_id=self.user.id, post_id__in=post_ids
+                ).values_list('post_id', flat=True)
+            )
+            self.saved.update(
+                PostInteraction.objects.filter(
+                    user_id=self.user.id, interaction_type='SAVE', post_id__in=post_ids
+                ).values_list('post_id', flat=True)
+            )
+        if user_ids:
+            self.followed.update(
+                User.following.through.objects.filter(
+                    from_user_id=self.user.id, to_user_id__in=user_ids
+                ).values_list('to_user_id', flat=True)
+            )
+        return self
+
+    def is_liked(self, post_id):
+        self.resolve(post_ids=[post_id])
+        return post_id in self.liked
+
+    def is_saved(self, post_id):
+        self.resolve(post_ids=[post_id])
+        return post_id in self.saved
+
+    def is_followed(self, user_id):
+        self.resolve(user_ids=[user_id])
+        return user_id in self.followed
+
+
+def get_viewer_state(context):
+    """Return the ``ViewerState`` stored in a serializer context, creating it"""
+    state = context.get(CONTEXT_KEY)
+    if state is None:
+        request = context.get('request')
+        state = ViewerState(getattr(request, 'user', None))
+        context[CONTEXT_KEY] = state
+    return state
+
+
+class ViewerStateListSerializer(serializers.ListSerializer):
+    """
+    Resolves the viewer state of a whole page before its rows are
+    serialized. The child serializer declares what to resolve through
+    ``get_viewer_ids(instances)`` returning ``(post_ids, user_ids)``.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, 'all') else data
+        instances = list(iterable)
+        post_ids, user_ids = self.child.get_viewer_ids(instances)
+        get_viewer_state(self.context).resolve(post_ids, user_ids)
+        return super().to_representation(instances)
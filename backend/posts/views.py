@@ -2,83 +2,183 @@ from django.shortcuts import render, get_object_or_404
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.core.exceptions import ValidationError
-from django.db.models import F, Count, ExpressionWrapper, FloatField, Case, When, Exists, OuterRef, Q
+from django.db.models import F, ExpressionWrapper, FloatField, Case, When, Q
 from django.utils import timezone
+from django.utils.functional import cached_property
 from datetime import timedelta
-from django.core.cache import cache
 from django.core.files.storage import default_storage
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
+import itertools
 import json
-from rest_framework.exceptions import PermissionDenied
-from django.db import models
+import logging
+import uuid
+from rest_framework.exceptions import NotFound, PermissionDenied
 
 from .models import Post, Comment, PostInteraction, TrendingScore
 from .serializers import PostSerializer, CommentSerializer, PostInteractionSerializer
 from users.serializers import UserSerializer
 # from chat.models import ChatRoom, Message
-from core.decorators import handle_exceptions, cache_response
+from core.decorators import handle_exceptions
+from core import audio, conditional, images
+from core.media import serve_media
+from core.renderers import FastJSONParser
 from core.utils import handle_uploaded_file
 from core.views import BaseViewSet
+from core.pagination import KeysetPagination
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from django.db import transaction
+from . import cards, featured, impressions, ingest, interaction_stats, likes, threads, timeline
+from .viewer_state import CONTEXT_KEY as VIEWER_STATE_KEY, ViewerState
+from .tasks import (
+    fanout_post, remove_post_from_timelines, generate_post_image_variants,
+    process_audio_post
+)
+from .counters import adjust_counters
+from .trending import mark_dirty
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ('true', '1', 'yes'):
+        return True
+    if str(value).lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f'Invalid boolean: {value!r}')
+
+
+def _reply_preview_size(request):
+    try:
+        size = int(request.query_params.get('replies', threads.COMMENT_REPLY_PREVIEW))
+    except ValueError:
+        size = threads.COMMENT_REPLY_PREVIEW
+    return max(0, min(size, threads.MAX_REPLY_PREVIEW))
+
+
+def _delete_comment_thread(comment):
+    """Delete a comment with all of its replies and update the post's comment count"""
+    with transaction.atomic():
+        removed = threads.subtree(Comment.objects.all(), comment.post_id, comment.path).count()
+        comment.delete()
+        adjust_counters(comment.post_id, comments_count=-removed)
+        mark_dirty(comment.post_id)
+
 
 class PostViewSet(BaseViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
-    parser_classes = (MultiPartParser, FormParser, JSONParser)
+    parser_classes = (MultiPartParser, FormParser, FastJSONParser)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['type', 'author']
     ordering_fields = ['created_at', 'likes_count', 'comments_count']
+    pagination_class = KeysetPagination
     model_name = 'post'
+    # Read-only actions whose queryset is narrowed to the requested fields
+    projected_actions = (
+        'list', 'retrieve', 'feed', 'trending', 'my_posts', 'user_posts', 'highlights'
+    )
 
     def get_permissions(self):
         """
         Override to set custom permissions per action
         """
-        if self.action in ['list', 'retrieve', 'feed', 'trending']:
+        if self.action in ['list', 'retrieve', 'feed', 'trending', 'audio_stream']:
             permission_classes = [AllowAny]
+        elif self.action == 'bulk_import':
+            permission_classes = [IsAdminUser]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
+        # Like/comment counts are denormalized columns on Post and viewer
+        # flags are resolved per page by the serializer (posts.viewer_state),
+        # so no per-row subqueries or relation prefetching are needed here
         queryset = Post.objects.select_related('author', 'trending_score')\
-            .prefetch_related('likes', 'comments')\
-            .annotate(
-                likes_count=Count('likes', distinct=True),
-                comments_count=Count('comments', distinct=True)
-            ).order_by('-created_at')  # Add default ordering
-        
-        if self.request.user.is_authenticated:
-            queryset = queryset.annotate(
-                is_liked=Exists(
-                    Post.likes.through.objects.filter(
-                        post_id=OuterRef('pk'),
-                        user_id=self.request.user.id
-                    )
-                )
-            )
-        else:
-            # For unauthenticated users, set is_liked to False
-            queryset = queryset.annotate(
-                is_liked=Case(
-                    When(pk__isnull=False, then=False),
-                    default=False,
-                    output_field=models.BooleanField(),
-                )
-            )
+            .order_by('-created_at')  # Add default ordering
         
         following = self.request.query_params.get('following', None)
         if following == 'true' and self.request.user.is_authenticated:
             queryset = queryset.filter(author__in=self.request.user.following.all())
-            
+
+        if self.action in self.projected_actions:
+            queryset = self.project(queryset, extra=self.ordering_fields)
         return queryset
 
+    @cached_property
+    def viewer_state(self):
+        """One viewer state per request, shared by ETags and serializers"""
+        return ViewerState(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context[VIEWER_STATE_KEY] = self.viewer_state
+        return context
+
+    def posts_etag(self, posts, *extra):
+        """Weak ETag of ``posts`` as the viewer sees them, without serializing them"""
+        state = self.viewer_state.resolve(
+            [post.id for post in posts], [post.author_id for post in posts]
+        )
+        host = self.request.get_host()
+        return conditional.make_etag(
+            state.user.id if state.user else None,
+            [
+                (
+                    cards.card_version(post, host),
+                    post.id in state.liked,
+                    post.id in state.saved,
+                    post.author_id in state.followed,
+                )
+                for post in posts
+            ],
+            *extra
+        )
+
+    def get_validators(self, post):
+        if self.fieldset.sparse:
+            # The version fields behind the ETag are not loaded for sparse requests
+            return None
+        # No Last-Modified: counters change through F() updates that leave
+        # updated_at alone, so only the ETag (which includes them) is reliable
+        return self.posts_etag([post]), None
+
+    def conditional_posts_response(self, posts, respond, *extra):
+        """
+        Answer ``304`` when the client's ETag matches ``posts`` (plus ``extra``
+        page state); otherwise serialize them and build the response with
+        ``respond(results)``.
+        """
+        posts = list(posts)
+        if self.fieldset.sparse:
+            # Projected rows lack the card version fields, so sparse pages
+            # are tagged by their serialized content instead
+            results = self.serialize_posts(posts)
+            etag = conditional.make_etag(results, *extra)
+            response = conditional.not_modified(self.request, etag)
+            return response or conditional.tag(respond(results), etag)
+
+        etag = self.posts_etag(posts, *extra)
+        response = conditional.not_modified(self.request, etag)
+        if response is None:
+            response = conditional.tag(respond(self.serialize_posts(posts)), etag)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Views are buffered in Redis and flushed to the database in bulk
+        if response.status_code == status.HTTP_200_OK and request.user.is_authenticated:
+            post_id = uuid.UUID(str(self.kwargs[self.lookup_url_kwarg or self.lookup_field]))
+            impressions.record_views(request.user.id, [post_id])
+        return response
+
     def create(self, request, *args, **kwargs):
         try:
             serializer = self.get_serializer(data=request.data)
@@ -117,15 +217,10 @@ class PostViewSet(BaseViewSet):
             audio_file = self.request.FILES.get('audio_file')
             post_type = self.request.data.get('type')
 
-            # Debug logging
-            print("Creating post:", {
-                'type': post_type,
-                'title': self.request.data.get('title'),
-                'has_image': bool(image),
-                'has_audio': bool(audio_file),
-                'data': dict(self.request.data),
-                'user': self.request.user.id  # Log the user ID
-            })
+            logger.debug(
+                "Creating %s post for user %s (image: %s, audio: %s)",
+                post_type, self.request.user.id, bool(image), bool(audio_file)
+            )
 
             # Handle media files
             image_path = None
@@ -133,20 +228,21 @@ class PostViewSet(BaseViewSet):
 
             if image:
                 try:
-                    if not image.content_type.startswith('image/'):
-                        raise ValidationError('Invalid image file type')
-                    image_path = handle_uploaded_file(image, 'posts/images')
+                    # Streamed to storage; the type is sniffed from the file itself
+                    image_path = handle_uploaded_file(
+                        image, 'posts/images', allowed_types=('image/',)
+                    )
                 except Exception as e:
-                    print("Image processing error:", str(e))
+                    logger.exception("Image processing error")
                     raise ValidationError(f'Error processing image: {str(e)}')
 
             if audio_file:
                 try:
-                    if not audio_file.content_type.startswith('audio/'):
-                        raise ValidationError('Invalid audio file type')
-                    audio_path = handle_uploaded_file(audio_file, 'posts/audio')
+                    audio_path = handle_uploaded_file(
+                        audio_file, 'posts/audio', allowed_types=('audio/',)
+                    )
                 except Exception as e:
-                    print("Audio processing error:", str(e))
+                    logger.exception("Audio processing error")
                     if image_path:
                         default_storage.delete(image_path)
                     raise ValidationError(f'Error processing audio: {str(e)}')
@@ -160,11 +256,26 @@ class PostViewSet(BaseViewSet):
             
             # Create trending score
             TrendingScore.objects.create(post=post)
+
+            featured.add_post(post)
+
+            # Responsive image renditions and audio analysis run off the
+            # request path
+            if post.image:
+                transaction.on_commit(
+                    lambda: generate_post_image_variants.delay(str(post.id))
+                )
+            if post.audio_file:
+                transaction.on_commit(lambda: process_audio_post.delay(str(post.id)))
+
+            # Push the post into follower timelines once it is committed
+            post_id = str(post.id)
+            transaction.on_commit(lambda: fanout_post.delay(post_id))
             
             return post
 
         except Exception as e:
-            print("Final error in perform_create:", str(e))
+            logger.exception("Error creating post")
             # Cleanup any uploaded files
             if image_path:
                 default_storage.delete(image_path)
@@ -183,144 +294,285 @@ class PostViewSet(BaseViewSet):
         if image:
             if instance.image:
                 default_storage.delete(instance.image.name)
-            image_path = handle_uploaded_file(image, 'posts/images')
-            serializer.save(image=image_path)
+                images.delete_variants(instance.image_variants)
+            image_path = handle_uploaded_file(
+                image, 'posts/images', allowed_types=('image/',)
+            )
+            serializer.save(image=image_path, image_variants={})
+            post_id = str(instance.id)
+            transaction.on_commit(lambda: generate_post_image_variants.delay(post_id))
 
         # Handle audio update
         if audio_file:
             if instance.audio_file:
                 default_storage.delete(instance.audio_file.name)
-            audio_path = handle_uploaded_file(audio_file, 'posts/audio')
-            serializer.save(audio_file=audio_path)
+                audio.delete_rendition(instance.audio_metadata)
+            audio_path = handle_uploaded_file(
+                audio_file, 'posts/audio', allowed_types=('audio/',)
+            )
+            serializer.save(audio_file=audio_path, audio_metadata={})
+            post_id = str(instance.id)
+            transaction.on_commit(lambda: process_audio_post.delay(post_id))
 
         serializer.save()
-        self._invalidate_post_caches(instance.id)
 
     @handle_exceptions
     def perform_destroy(self, instance):
         """Delete post and associated media"""
         if instance.image:
             default_storage.delete(instance.image.name)
+            images.delete_variants(instance.image_variants)
         if instance.audio_file:
             default_storage.delete(instance.audio_file.name)
+            audio.delete_rendition(instance.audio_metadata)
             
-        self._invalidate_post_caches(instance.id)
+        post_id, author_id = str(instance.id), str(instance.author_id)
         instance.delete()
+        featured.remove_post(post_id)
+        transaction.on_commit(
+            lambda: remove_post_from_timelines.delay(post_id, author_id)
+        )
 
     @action(detail=False, methods=['get'])
-    @method_decorator(cache_page(300))  # Cache for 5 minutes
     def feed(self, request):
         """Enhanced personalized feed with support for unauthenticated users"""
-        try:
-            # Get base queryset
-            queryset = self.get_queryset()
-            feed_posts = None
-
-            if request.user.is_authenticated:
-                # First try: Get posts from followed users (higher weight)
-                following_posts = queryset.filter(
-                    author__in=request.user.following.all()
-                ).annotate(
-                    relevance_score=ExpressionWrapper(
-                        (F('trending_score__score') * 1.5) +
-                        (F('likes_count') * 0.5) +
-                        (F('comments_count') * 0.3) +
-                        Case(
-                            When(created_at__gte=timezone.now() - timedelta(days=1), then=10),
-                            When(created_at__gte=timezone.now() - timedelta(days=7), then=5),
-                            default=1,
-                            output_field=FloatField(),
-                        ),
-                        output_field=FloatField()
-                    )
-                )
-                
-                if following_posts.exists():
-                    feed_posts = following_posts.order_by('-relevance_score', '-created_at')
-            
-            if not feed_posts or not feed_posts.exists():
-                # Second try: Get trending posts
-                trending_posts = queryset.filter(
-                    trending_score__score__gt=0
-                ).annotate(
-                    relevance_score=ExpressionWrapper(
-                        (F('trending_score__score') * 1.0) +
-                        (F('likes_count') * 0.3) +
-                        (F('comments_count') * 0.2) +
-                        Case(
-                            When(created_at__gte=timezone.now() - timedelta(days=1), then=5),
-                            When(created_at__gte=timezone.now() - timedelta(days=7), then=3),
-                            default=1,
-                            output_field=FloatField(),
-                        ),
-                        output_field=FloatField()
-                    )
-                )
-                
-                if trending_posts.exists():
-                    feed_posts = trending_posts.order_by('-relevance_score', '-created_at')
-                else:
-                    # Final fallback: Get most recent posts
-                    feed_posts = queryset.order_by('-created_at')
-
-            # Paginate results
-            page = self.paginate_queryset(feed_posts)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
+        # Get base queryset
+        queryset = self.get_queryset()
+
+        if request.user.is_authenticated:
+            # First try: Read the precomputed home timeline
+            response = self._timeline_feed(request, queryset)
+            if response is not None:
+                return response
+
+        # Second try: Get trending posts
+        trending_posts = queryset.filter(
+            trending_score__score__gt=0
+        ).annotate(
+            relevance_score=ExpressionWrapper(
+                (F('trending_score__score') * 1.0) +
+                (F('likes_count') * 0.3) +
+                (F('comments_count') * 0.2) +
+                Case(
+                    When(created_at__gte=timezone.now() - timedelta(days=1), then=5),
+                    When(created_at__gte=timezone.now() - timedelta(days=7), then=3),
+                    default=1,
+                    output_field=FloatField(),
+                ),
+                output_field=FloatField()
+            )
+        )
+        
+        if trending_posts.exists():
+            feed_posts = trending_posts.order_by('-relevance_score', '-created_at')
+        else:
+            # Final fallback: Get most recent posts
+            feed_posts = queryset.order_by('-created_at')
 
-            serializer = self.get_serializer(feed_posts, many=True)
-            return Response({
-                'success': True,
-                'data': {
-                    'results': serializer.data,
-                    'count': len(serializer.data)
-                }
-            })
-        except Exception as e:
-            print(f"Feed Error: {str(e)}")  # Debug log
-            # Ultimate fallback: Get any recent posts
+        # Paginate results
+        page = self.paginate_queryset(feed_posts)
+        if page is not None:
+            return self.conditional_posts_response(
+                page,
+                self.get_paginated_response,
+                self.paginator.get_paginated_data([])
+            )
+
+        results = self.serialize_posts(feed_posts)
+        return Response({
+            'success': True,
+            'data': {
+                'results': results,
+                'count': len(results)
+            }
+        })
+
+    @action(detail=True, methods=['post'])
+    def like(self, request, pk=None):
+        """
+        Like/unlike a post. Send ``liked`` to set the state idempotently;
+        without it the current state is toggled.
+        """
+        post = self.get_object()
+        user = request.user
+        desired = request.data.get('liked')
+        if desired is not None:
             try:
-                fallback_posts = self.get_queryset().order_by('-created_at')[:10]
-                serializer = self.get_serializer(fallback_posts, many=True)
-                return Response({
-                    'success': True,
-                    'data': {
-                        'results': serializer.data,
-                        'count': len(serializer.data)
-                    }
-                })
-            except Exception as inner_e:
+                desired = _parse_bool(desired)
+            except ValueError as e:
                 return Response({
                     'success': False,
-                    'error': str(inner_e)
+                    'error': str(e)
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['post'])
-    def like(self, request, pk=None):
-     """Like/unlike a post"""
-     post = self.get_object()
-     user = request.user
-    
-     if user in post.likes.all():
-        post.likes.remove(user)
-        return Response({
-            'success': True, 
-            'message': 'Post unliked',
-            'liked': False
-        })
-     else:
-        post.likes.add(user)
+        with transaction.atomic():
+            if desired is None:
+                # Unlike if a like exists, otherwise like: at most two
+                # single-row statements, never a scan of the post's likers
+                liked = not likes.set_post_like(user, post.id, False)
+                changed = liked and likes.set_post_like(user, post.id, True)
+            else:
+                liked = desired
+                changed = likes.set_post_like(user, post.id, liked)
+
         # Create notification if post is not by the liker
-        if post.author != user:
+        if liked and changed and post.author_id != user.id:
             post.author.create_like_notification(
                 liker=user,
                 post=post
             )
         return Response({
-            'success': True, 
-            'message': 'Post liked',
-            'liked': True
+            'success': True,
+            'message': 'Post liked' if liked else 'Post unliked',
+            'liked': liked
+        })
+
+    @action(detail=True, methods=['get'], url_path='audio')
+    def audio_stream(self, request, pk=None):
+        """
+        Serve the post's audio with Range/If-Range support so players can
+        seek. ``?rendition=stream`` serves the bitrate-capped rendition.
+        """
+        post = get_object_or_404(
+            Post.objects.only('id', 'audio_file', 'audio_metadata'), pk=pk
+        )
+        name = post.audio_file.name if post.audio_file else None
+        if request.query_params.get('rendition') == 'stream':
+            name = (post.audio_metadata or {}).get('stream') or name
+        if not name:
+            return Response({
+                'success': False,
+                'error': 'This post has no audio'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return serve_media(request, name)
+
+    @action(detail=False, methods=['post'], url_path='views')
+    def record_views(self, request):
+        """Record impressions of the posts a client displayed: ``{"post_ids": [...]}``"""
+        post_ids = request.data.get('post_ids')
+        if not isinstance(post_ids, list) or not post_ids:
+            return Response({
+                'success': False,
+                'error': 'post_ids must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            post_ids = [
+                uuid.UUID(str(post_id))
+                for post_id in post_ids[:impressions.MAX_VIEWS_PER_REQUEST]
+            ]
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'Invalid post id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        recorded = impressions.record_views(request.user.id, post_ids)
+        return Response({
+            'success': True,
+            'data': {'recorded': recorded}
+        })
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Bulk import posts from an uploaded JSONL ``file`` or a JSON ``posts``
+        list. Records without an ``author`` are attributed to the caller.
+        """
+        upload = request.FILES.get('file')
+        if upload:
+            records = ingest.parse_lines(upload)
+        elif isinstance(request.data.get('posts'), list):
+            records = ingest.parse_objects(request.data['posts'])
+        else:
+            return Response({
+                'success': False,
+                'error': 'Send a JSONL file or a posts list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        records = list(itertools.islice(records, ingest.MAX_IMPORT_RECORDS + 1))
+        if len(records) > ingest.MAX_IMPORT_RECORDS:
+            return Response({
+                'success': False,
+                'error': f'At most {ingest.MAX_IMPORT_RECORDS} posts per request; '
+                         'use manage.py import_posts for larger imports'
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        try:
+            dry_run = _parse_bool(request.query_params.get('dry_run', False))
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reports = list(ingest.import_records(
+            records,
+            default_author=request.user,
+            dry_run=dry_run
+        ))
+        return Response({
+            'success': True,
+            'data': {
+                'summary': ingest.summarize(reports),
+                'batches': reports
+            }
+        })
+
+    @action(detail=False, methods=['post'], url_path='likes/batch')
+    def batch_like(self, request):
+        """
+        Apply many like/unlike operations in one transaction, e.g. queued by
+        an offline client: ``{"operations": [{"post_id": ..., "liked": true}]}``.
+        The last operation for a post wins.
+        """
+        operations = request.data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response({
+                'success': False,
+                'error': 'operations must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > likes.MAX_BATCH_OPS:
+            return Response({
+                'success': False,
+                'error': f'At most {likes.MAX_BATCH_OPS} operations per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        desired = {}
+        for index, operation in enumerate(operations):
+            try:
+                post_id = uuid.UUID(str(operation['post_id']))
+                desired[post_id] = _parse_bool(operation['liked'])
+            except (KeyError, TypeError, ValueError):
+                return Response({
+                    'success': False,
+                    'error': f'Invalid operation at index {index}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Lock the posts so none is deleted before the likes are written
+            existing = set(
+                Post.objects.filter(id__in=list(desired)).order_by('id')
+                    .select_for_update(no_key=True).values_list('id', flat=True)
+            )
+            liked, unliked = likes.set_post_likes(
+                request.user,
+                likes=[post_id for post_id in existing if desired[post_id]],
+                unlikes=[post_id for post_id in existing if not desired[post_id]]
+            )
+
+        for post in Post.objects.filter(id__in=liked)\
+                .exclude(author_id=request.user.id).select_related('author'):
+            post.author.create_like_notification(liker=request.user, post=post)
+
+        changed = set(liked) | set(unliked)
+        return Response({
+            'success': True,
+            'data': {
+                'liked': [str(post_id) for post_id in liked],
+                'unliked': [str(post_id) for post_id in unliked],
+                'unchanged': [str(post_id) for post_id in existing - changed],
+                'not_found': [str(post_id) for post_id in desired if post_id not in existing]
+            }
         })
 
     @action(detail=True, methods=['get', 'post'], url_path='comments')
@@ -330,20 +582,27 @@ class PostViewSet(BaseViewSet):
             post = self.get_object()
             
             if request.method == 'GET':
-                # Allow anyone to view comments
-                comments = Comment.objects.filter(post=post)\
-                    .select_related('author')\
-                    .order_by('-created_at')
-
-                serializer = CommentSerializer(
+                # Allow anyone to view comments: a page of top-level comments,
+                # newest first, each with a preview of its first replies
+                comments = self.project(
+                    Comment.objects.select_related('author'), CommentSerializer
+                )
+                roots = comments.filter(post=post, parent__isnull=True).order_by('-path')
+                page = self.paginate_queryset(roots)
+                data = threads.with_reply_previews(
+                    page,
                     comments,
-                    many=True,
-                    context={'request': request}
+                    _reply_preview_size(request),
+                    lambda rows: CommentSerializer(
+                        rows, many=True, context=self.get_serializer_context()
+                    ).data
                 )
-                
+                pagination = self.paginator.get_paginated_data(data)
+
                 return Response({
                     'success': True,
-                    'data': serializer.data
+                    'data': pagination.pop('results'),
+                    'pagination': pagination
                 })
             else:  # POST
                 # Require authentication for posting comments
@@ -361,12 +620,26 @@ class PostViewSet(BaseViewSet):
                         'error': 'Content is required'
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
+                parent = None
+                parent_id = request.data.get('parent_id')
+                if parent_id:
+                    parent = Comment.objects.filter(id=parent_id, post=post).first()
+                    if parent is None:
+                        return Response({
+                            'success': False,
+                            'error': 'Parent comment not found'
+                        }, status=status.HTTP_404_NOT_FOUND)
+
                 # Create the comment
-                comment = Comment.objects.create(
-                    post=post,
-                    author=request.user,
-                    content=content
-                )
+                with transaction.atomic():
+                    comment = Comment.objects.create(
+                        post=post,
+                        author=request.user,
+                        content=content,
+                        parent=parent
+                    )
+                    adjust_counters(post.id, comments_count=1)
+                    mark_dirty(post.id)
                 
                 # Return the serialized comment
                 serializer = CommentSerializer(
@@ -443,8 +716,7 @@ class PostViewSet(BaseViewSet):
     #         interaction_type='SHARE'
     #     )
 
-    #     self._update_trending_score(post)
-    #     self._invalidate_post_caches(post.id)
+    #     mark_dirty(post.id)
 
     #     return Response({
     #         'success': True,
@@ -464,7 +736,7 @@ class PostViewSet(BaseViewSet):
         ).values_list('interaction_type', flat=True)
         
         return Response({
-            'is_liked': request.user in post.likes.all(),
+            'is_liked': post.likes.filter(id=request.user.id).exists(),
             'has_commented': post.comments.filter(author=request.user).exists(),
             'interactions': list(interactions)
         })
@@ -475,30 +747,27 @@ class PostViewSet(BaseViewSet):
         try:
             # Get all NEWS posts, ordered by created_at as a fallback
             posts = self.get_queryset().filter(type='NEWS').order_by('-created_at')
-            print(f"Found {posts.count()} NEWS posts")  # Debug log
             
             # Try to get posts with trending scores first
             trending_posts = posts.exclude(trending_score=None)\
                 .order_by('-trending_score__score')[:10]
-            print(f"Found {trending_posts.count()} trending posts")  # Debug log
             
             # If no trending posts, get recent posts
             if not trending_posts.exists():
-                print("No trending posts found, using recent posts")  # Debug log
+                logger.debug("No trending posts found, using recent posts")
                 trending_posts = posts[:10]
             
-            serializer = self.get_serializer(trending_posts, many=True)
+            results = self.serialize_posts(trending_posts)
             response_data = {
                 'success': True,
                 'data': {
-                    'results': serializer.data,
-                    'count': len(serializer.data)
+                    'results': results,
+                    'count': len(results)
                 }
             }
-            print(f"Returning {len(serializer.data)} posts")  # Debug log
             return Response(response_data)
         except Exception as e:
-            print(f"Error in trending endpoint: {str(e)}")  # Debug log
+            logger.exception("Error in trending endpoint")
             return Response({
                 'success': False,
                 'error': str(e)
@@ -595,7 +864,7 @@ class PostViewSet(BaseViewSet):
                     'error': 'You can only delete your own comments'
                 }, status=status.HTTP_403_FORBIDDEN)
 
-            comment.delete()
+            _delete_comment_thread(comment)
             
             return Response({
                 'success': True,
@@ -612,42 +881,93 @@ class PostViewSet(BaseViewSet):
                 'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
-    def _update_trending_score(self, post):
-        """Update post's trending score"""
-        try:
-            trending_score = post.trending_score
-        except TrendingScore.DoesNotExist:
-            trending_score = TrendingScore.objects.create(post=post)
-
-        # Update counts
-        trending_score.like_count = post.likes.count()
-        trending_score.comment_count = post.comments.count()
-        trending_score.share_count = PostInteraction.objects.filter(
-            post=post,
-            interaction_type='SHARE'
-        ).count()
-
-        # Calculate score based on time decay
-        time_diff = timezone.now() - post.created_at
-        hours_since_posted = time_diff.total_seconds() / 3600
-
-        # Enhanced trending score formula
-        score = (
-            trending_score.like_count * 1.5 +
-            trending_score.comment_count * 2.0 +
-            trending_score.share_count * 2.5
-        ) / (hours_since_posted + 2) ** 1.8
-
-        trending_score.score = score
-        trending_score.save()
-
-    def _invalidate_post_caches(self, post_id=None):
-        """Invalidate relevant caches"""
-        if post_id:
-            cache.delete(f'post:{post_id}')
-        cache.delete_pattern('*feed*')
-        cache.delete_pattern('*trending*')
-        cache.delete('trending_posts')
+    def _timeline_feed(self, request, queryset):
+        """
+        Serve one page of the user's home timeline, or None when it is empty
+        or the cursor belongs to the fallback feed. Cursor requests page on
+        the timeline score; legacy ``?page=`` requests use an offset into the
+        sorted set.
+        """
+        paginator = self.paginator
+        if paginator.use_legacy_pagination(request):
+            page_size = paginator.get_page_size(request)
+            try:
+                page_number = max(int(request.query_params.get('page', 1)), 1)
+            except ValueError:
+                page_number = 1
+            entries, total = timeline.read_timeline(
+                request.user,
+                offset=(page_number - 1) * page_size,
+                limit=page_size
+            )
+            if not total:
+                return None
+            posts = timeline.hydrate(queryset, [post_id for post_id, _ in entries])
+            return self.conditional_posts_response(
+                posts,
+                lambda results: self._timeline_response(
+                    request, results, total, page_number, page_size
+                ),
+                total, page_number, page_size
+            )
+
+        cursor = paginator.begin(request)
+        position = None
+        if cursor.position is not None:
+            if cursor.source != timeline.CURSOR_SOURCE:
+                return None
+            if len(cursor.position) != 2 or not isinstance(cursor.position[0], (int, float)):
+                raise NotFound('Invalid cursor')
+            position = tuple(cursor.position)
+        entries, total = timeline.read_timeline(
+            request.user,
+            before=None if cursor.reverse else position,
+            after=position if cursor.reverse else None,
+            limit=paginator.page_size + 1
+        )
+        if not total:
+            return None
+        paginator.cursor_source = timeline.CURSOR_SOURCE
+        entries = paginator.paginate_rows(
+            entries, cursor, key=lambda entry: (entry[1], entry[0])
+        )
+        if request.query_params.get(paginator.total_query_param) == 'true':
+            paginator.count = total
+        posts = timeline.hydrate(queryset, [post_id for post_id, _ in entries])
+        return self.conditional_posts_response(
+            posts,
+            paginator.get_paginated_response,
+            # Links and counts of the page, without results
+            paginator.get_paginated_data([])
+        )
+
+    def _timeline_response(self, request, results, total, page_number, page_size):
+        """Paginated response for a home timeline page, shaped like PageNumberPagination"""
+        url = request.build_absolute_uri()
+        next_url = None
+        if page_number * page_size < total:
+            next_url = replace_query_param(url, 'page', page_number + 1)
+        previous_url = None
+        if page_number > 1:
+            previous_url = (
+                remove_query_param(url, 'page') if page_number == 2
+                else replace_query_param(url, 'page', page_number - 1)
+            )
+        return Response({
+            'count': total,
+            'next': next_url,
+            'previous': previous_url,
+            'results': results
+        })
+
+    def serialize_posts(self, posts):
+        """Serialize posts through the shared card cache with viewer overlays"""
+        if self.fieldset.sparse:
+            # Cards hold the full representation; sparse pages are cheap to render
+            return self.get_serializer(posts, many=True).data
+        return cards.render_cards(
+            posts, self.get_serializer_class(), self.get_serializer_context()
+        )
 
     @action(detail=False, methods=['GET'])
     def user_posts(self, request):
@@ -672,15 +992,14 @@ class PostViewSet(BaseViewSet):
             # Apply pagination
             page = self.paginate_queryset(queryset)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
+                return self.get_paginated_response(self.serialize_posts(page))
 
-            serializer = self.get_serializer(queryset, many=True)
+            results = self.serialize_posts(queryset)
             return Response({
                 'success': True,
                 'data': {
-                    'results': serializer.data,
-                    'count': len(serializer.data)
+                    'results': results,
+                    'count': len(results)
                 }
             })
 
@@ -691,41 +1010,28 @@ class PostViewSet(BaseViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['GET'])
-    @method_decorator(cache_page(300))  # Cache for 5 minutes
     def highlights(self, request):
         """Get highlights: latest news, trending audio, and a random post"""
         try:
-            # Get latest news post
-            latest_news = self.get_queryset().filter(type='NEWS').order_by('-created_at').first()
-            
-            # Get trending audio post
-            trending_audio = self.get_queryset().filter(type='AUDIO')\
-                .exclude(trending_score=None)\
-                .order_by('-trending_score__score', '-created_at').first()
-            
-            # If no trending audio, get latest audio
-            if not trending_audio:
-                trending_audio = self.get_queryset().filter(type='AUDIO')\
-                    .order_by('-created_at').first()
-            
-            # Get a random post (excluding the ones already selected)
-            excluded_ids = [p.id for p in [latest_news, trending_audio] if p]
-            random_post = self.get_queryset().exclude(id__in=excluded_ids)\
-                .order_by('?').first()
-            
-            # Serialize the posts
-            serializer = self.get_serializer([
-                post for post in [latest_news, trending_audio, random_post] 
-                if post is not None
-            ], many=True)
-            
+            # Category picks and the random featured post come from the
+            # precomputed pool; the posts are then loaded in one query
+            selected = featured.select_highlights()
+
+            ids = [post_id for post_id in selected.values() if post_id]
+            posts = {
+                post.id: post for post in self.get_queryset().filter(id__in=ids)
+            }
+            rendered = {
+                str(post_id): card
+                for post_id, card in zip(posts, self.serialize_posts(posts.values()))
+            }
+
             # Format response with categories
             response_data = {
                 'success': True,
                 'data': {
-                    'latest_news': serializer.data[0] if latest_news else None,
-                    'trending_audio': serializer.data[1] if trending_audio else None,
-                    'featured_post': serializer.data[2] if random_post else None
+                    category: rendered.get(post_id)
+                    for category, post_id in selected.items()
                 }
             }
             
@@ -741,6 +1047,7 @@ class CommentViewSet(BaseViewSet):
     queryset = Comment.objects.select_related('author', 'post').order_by('-created_at')
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     model_name = 'comment'
 
     def get_serializer_context(self):
@@ -750,14 +1057,24 @@ class CommentViewSet(BaseViewSet):
         return context
 
     def get_queryset(self):
-        return Comment.objects.select_related('author', 'post').order_by('-created_at')
+        queryset = Comment.objects.select_related('author', 'post').order_by('-created_at')
+        if self.action in ('list', 'retrieve', 'post_comments'):
+            queryset = self.project(queryset)
+        return queryset
 
     def perform_create(self, serializer):
         """Create a new comment"""
-        comment = serializer.save(author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            adjust_counters(comment.post_id, comments_count=1)
+            mark_dirty(comment.post_id)
         # Return the serialized comment with context
         return self.get_serializer(comment, context={'request': self.request}).data
 
+    def perform_destroy(self, instance):
+        """Delete a comment with its replies and update its post's comment count"""
+        _delete_comment_thread(instance)
+
     @action(detail=True, methods=['PUT'])
     def edit(self, request, pk=None):
         """Edit a comment"""
@@ -789,12 +1106,8 @@ class CommentViewSet(BaseViewSet):
         if comment.author != request.user:
             raise PermissionDenied("You can't delete this comment")
             
-        comment.delete()
-        
-        # Update post's comment count
-        post = comment.post
-        post.comments_count = F('comments_count') - 1
-        post.save()
+        # Delete and update post's comment count
+        self.perform_destroy(comment)
         
         return Response({
             'success': True,
@@ -803,37 +1116,52 @@ class CommentViewSet(BaseViewSet):
 
     @action(detail=True, methods=['POST'])
     def like(self, request, pk=None):
-        """Like/Unlike a comment"""
+        """Like/Unlike a comment; send ``liked`` to set the state idempotently"""
         comment = self.get_object()
-        
-        if request.user in comment.likes.all():
-            comment.likes.remove(request.user)
-            liked = False
-        else:
-            comment.likes.add(request.user)
-            liked = True
+        desired = request.data.get('liked')
+        if desired is not None:
+            try:
+                desired = _parse_bool(desired)
+            except ValueError as e:
+                return Response({
+                    'success': False,
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if desired is None:
+                liked = not likes.set_comment_like(request.user, comment.id, False)
+                if liked:
+                    likes.set_comment_like(request.user, comment.id, True)
+            else:
+                liked = desired
+                likes.set_comment_like(request.user, comment.id, liked)
+            likes_count = Comment.objects.filter(pk=comment.pk)\
+                .values_list('likes_count', flat=True).first()
             
         return Response({
             'success': True,
             'data': {
                 'liked': liked,
-                'likes_count': comment.likes.count()
+                'likes_count': likes_count
             }
         })
 
     @action(detail=True, methods=['get'])
     def replies(self, request, pk=None):
-        """Get replies to a comment"""
+        """Get a cursor-paginated page of a comment's direct replies, oldest first"""
         comment = self.get_object()
-        replies = comment.replies.select_related('author').order_by('-created_at')
+        comments = self.project(Comment.objects.select_related('author'))
+        replies = comments.filter(parent=comment).order_by('path')
         
         page = self.paginate_queryset(replies)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(replies, many=True)
-        return Response(serializer.data)
+        data = threads.with_reply_previews(
+            page,
+            comments,
+            _reply_preview_size(request),
+            lambda rows: self.get_serializer(rows, many=True).data
+        )
+        return self.get_paginated_response(data)
 
     @action(detail=True, methods=['post'])
     def reply(self, request, pk=None):
@@ -842,39 +1170,37 @@ class CommentViewSet(BaseViewSet):
         serializer = self.get_serializer(data=request.data)
         
         if serializer.is_valid():
-            reply = serializer.save(
-                author=request.user,
-                parent_comment=parent_comment,
-                post=parent_comment.post
-            )
+            with transaction.atomic():
+                reply = serializer.save(
+                    author=request.user,
+                    parent=parent_comment,
+                    post=parent_comment.post
+                )
+                adjust_counters(parent_comment.post_id, comments_count=1)
             
-            # Update post's trending score
-            post_viewset = PostViewSet()
-            post_viewset._update_trending_score(parent_comment.post)
+            # Queue the post's trending score for recomputation
+            mark_dirty(parent_comment.post_id)
             
             return Response(self.get_serializer(reply).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['get'])
     def thread(self, request, pk=None):
-        """Get full comment thread including parent and all replies"""
+        """Get the full thread a comment belongs to, nested, in one query"""
         comment = self.get_object()
         
-        # If this is a reply, get its parent comment
-        if comment.parent_comment:
-            parent = comment.parent_comment
-        else:
-            parent = comment
-            
-        # Get all replies in thread
-        replies = parent.replies.select_related('author').order_by('created_at')
-        
-        thread_data = {
-            'parent': self.get_serializer(parent).data,
-            'replies': self.get_serializer(replies, many=True).data
-        }
+        # The whole thread under the top-level comment is one path range
+        comments = threads.subtree(
+            self.project(Comment.objects.select_related('author')),
+            comment.post_id,
+            threads.root_path(comment)
+        )
+        tree = threads.nest(comments, lambda rows: self.get_serializer(rows, many=True).data)
         
-        return Response(thread_data)
+        return Response({
+            'success': True,
+            'data': tree[0] if tree else None
+        })
 
     @action(detail=False, methods=['GET'])
     def post_comments(self, request):
@@ -887,11 +1213,7 @@ class CommentViewSet(BaseViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         comments = self.get_queryset().filter(post_id=post_id)
-        serializer = self.get_serializer(
-            comments, 
-            many=True,
-            context={'request': request}
-        )
+        serializer = self.get_serializer(comments, many=True)
         
         return Response({
             'success': True,
@@ -902,6 +1224,7 @@ class PostInteractionViewSet(BaseViewSet):
     queryset = PostInteraction.objects.select_related('user', 'post')
     serializer_class = PostInteractionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     model_name = 'postinteraction'
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['post', 'interaction_type']
@@ -912,72 +1235,67 @@ class PostInteractionViewSet(BaseViewSet):
     def perform_create(self, serializer):
         """Create a new interaction"""
         # Check if interaction already exists
-        existing = PostInteraction.objects.filter(
+        existing = set(PostInteraction.objects.filter(
             user=self.request.user,
-            post=serializer.validated_data['post'],
-            interaction_type=serializer.validated_data['interaction_type']
-        ).first()
+            post=serializer.validated_data['post']
+        ).values_list('interaction_type', flat=True))
         
-        if existing:
+        if serializer.validated_data['interaction_type'] in existing:
             raise ValidationError('Interaction already exists')
             
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            interaction = serializer.save(user=self.request.user)
+            if interaction.interaction_type == 'SHARE':
+                adjust_counters(interaction.post_id, shares_count=1)
+            interaction_stats.record(interaction, 1, first_or_last=not existing)
         
-        # Update post's trending score
-        post = serializer.validated_data['post']
-        post_viewset = PostViewSet()
-        post_viewset._update_trending_score(post)
+        # Queue the post's trending score for recomputation
+        mark_dirty(interaction.post_id)
 
     def perform_destroy(self, instance):
         """Remove an interaction"""
         if instance.user != self.request.user:
             raise ValidationError("Cannot delete another user's interaction")
             
-        post = instance.post
-        instance.delete()
+        post_id = instance.post_id
+        with transaction.atomic():
+            instance.delete()
+            if instance.interaction_type == 'SHARE':
+                adjust_counters(post_id, shares_count=-1)
+            remaining = PostInteraction.objects.filter(
+                user_id=instance.user_id, post_id=post_id
+            ).exists()
+            interaction_stats.record(instance, -1, first_or_last=not remaining)
         
-        # Update post's trending score
-        post_viewset = PostViewSet()
-        post_viewset._update_trending_score(post)
+        # Queue the post's trending score for recomputation
+        mark_dirty(post_id)
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get interaction statistics for the current user"""
+        counts = interaction_stats.user_stats(request.user.id)
         stats = {
-            'likes_given': PostInteraction.objects.filter(
-                user=request.user,
-                interaction_type='LIKE'
-            ).count(),
-            'posts_shared': PostInteraction.objects.filter(
-                user=request.user,
-                interaction_type='SHARE'
-            ).count(),
-            'posts_saved': PostInteraction.objects.filter(
-                user=request.user,
-                interaction_type='SAVE'
-            ).count(),
-            'total_interactions': PostInteraction.objects.filter(
-                user=request.user
-            ).count(),
+            'likes_given': counts.get('LIKE', 0),
+            'posts_shared': counts.get('SHARE', 0),
+            'posts_saved': counts.get('SAVE', 0),
+            'total_interactions': counts.get('total', 0),
         }
         return Response(stats)
 
     @action(detail=False, methods=['get'])
     def saved_posts(self, request):
-        """Get all posts saved by the current user"""
+        """Get posts saved by the current user, most recently saved first"""
+        # Keyset pages over the (user, interaction_type, -created_at) index,
+        # joining each page's posts in the same query
         saved_interactions = self.get_queryset().filter(
             interaction_type='SAVE'
-        ).select_related('post', 'post__author')
-        
-        posts = [interaction.post for interaction in saved_interactions]
+        ).select_related('post', 'post__author', 'post__trending_score')\
+            .order_by('-created_at')
         
-        page = self.paginate_queryset(posts)
-        if page is not None:
-            serializer = PostSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-            
-        serializer = PostSerializer(posts, many=True, context={'request': request})
-        return Response(serializer.data)
+        page = self.paginate_queryset(saved_interactions)
+        posts = [interaction.post for interaction in page]
+        data = cards.render_cards(posts, PostSerializer, self.get_serializer_context())
+        return self.get_paginated_response(data)
 
     @action(detail=False, methods=['get'])
     def recent(self, request):
@@ -995,25 +1313,15 @@ class PostInteractionViewSet(BaseViewSet):
         interaction = self.get_object()
         post = interaction.post
         
-        # Get interaction counts by type
-        interaction_counts = PostInteraction.objects\
-            .filter(post=post)\
-            .values('interaction_type')\
-            .annotate(count=Count('id'))
-            
+        counts = interaction_stats.post_stats(post.id)
         stats = {
-            item['interaction_type']: item['count'] 
-            for item in interaction_counts
+            interaction_type: counts[interaction_type]
+            for interaction_type in interaction_stats.INTERACTION_TYPES
+            if counts.get(interaction_type)
         }
-        
-        # Add additional stats
         stats.update({
-            'total_interactions': sum(stats.values()),
-            'unique_users': PostInteraction.objects\
-                .filter(post=post)\
-                .values('user')\
-                .distinct()\
-                .count()
+            'total_interactions': counts.get('total', 0),
+            'unique_users': counts.get('unique_users', 0)
         })
         
         return Response(stats)
\ No newline at end of file
@@ -5,13 +5,14 @@ from rest_framework.permissions import IsAuthenticated
 from django.contrib.postgres.search import (
     SearchVector, SearchQuery, SearchRank, TrigramSimilarity
 )
-from django.db.models import Q, F, Value, Case, When, Exists, OuterRef
+from django.db.models import Q, F, Value, Case, When
 from django.db.models.functions import Greatest, Lower
-from posts.models import Post, PostInteraction
+from posts.models import Post
 from users.models import User
 from posts.serializers import PostSerializer
 from users.serializers import UserSerializer
 from django.core.cache import cache
+from core import cache as cache_ns
 from .models import SearchLog, SearchQuery
 from django.utils import timezone
 from datetime import timedelta
@@ -46,9 +47,6 @@ class SearchViewSet(ViewSet):
                 TrigramSimilarity('last_name', query)
             )
             
-            # Get current user's following
-            user_following = self.request.user.following.all()
-            
             users = User.objects.exclude(
                 id=self.request.user.id  # Exclude current user
             ).annotate(
@@ -75,10 +73,6 @@ class SearchViewSet(ViewSet):
                     F('exact_match'),
                     F('contains_score'),
                     F('similarity')
-                ),
-                # Following status
-                is_followed=Exists(
-                    user_following.filter(id=OuterRef('id'))
                 )
             ).select_related(
                 'profile'
@@ -100,38 +94,15 @@ class SearchViewSet(ViewSet):
             return []
 
     def _prepare_post_queryset(self, queryset):
-        """Common method to prepare post queryset with user interactions"""
-        user = self.request.user
-        
-        # Prefetch related data
-        queryset = queryset.select_related(
+        """Common method to prepare post queryset for serialization"""
+        # Viewer flags (is_liked / is_saved / is_followed) are resolved for
+        # the whole page by the serializer, so only joins are needed here
+        return queryset.select_related(
             'author',
-            'author__profile'
-        ).prefetch_related(
-            'comments',
-            'interactions'  # Use interactions instead of likes
-        )
-
-        # Annotate user interactions
-        queryset = queryset.annotate(
-            is_liked=Exists(
-                PostInteraction.objects.filter(
-                    user=user,
-                    post_id=OuterRef('id'),
-                    interaction_type='LIKE'
-                )
-            ),
-            is_saved=Exists(
-                PostInteraction.objects.filter(
-                    user=user,
-                    post_id=OuterRef('id'),
-                    interaction_type='SAVE'
-                )
-            )
+            'author__profile',
+            'trending_score'
         )
 
-        return queryset
-
     def _search_posts(self, query):
         """Enhanced post search with user interactions"""
         try:
@@ -139,12 +110,6 @@ class SearchViewSet(ViewSet):
             title_similarity = TrigramSimilarity('title', query)
             desc_similarity = TrigramSimilarity('description', query)
             
-            # Get current user's interactions
-            user_interactions = PostInteraction.objects.filter(
-                user=self.request.user,
-                interaction_type='LIKE'
-            )
-            
             posts = Post.objects.annotate(
                 exact_match=Case(
                     When(title__iexact=query, then=Value(1.0)),
@@ -163,14 +128,10 @@ class SearchViewSet(ViewSet):
                     F('exact_match'),
                     F('contains_score'),
                     F('similarity')
-                ),
-                is_liked=Exists(
-                    user_interactions.filter(
-                        post_id=OuterRef('id')
-                    )
                 )
             ).select_related(
-                'author'
+                'author',
+                'trending_score'
             ).filter(
                 Q(relevance__gt=0.2)
             ).order_by('-relevance', '-created_at')[:20]
@@ -286,7 +247,7 @@ class SearchViewSet(ViewSet):
     def trending_searches(self, request):
         """Get trending searches from the last 7 days"""
         # Try to get from cache first
-        cache_key = 'trending_searches'
+        cache_key = cache_ns.versioned_key('trending_searches', (cache_ns.SEARCH,))
         trending = cache.get(cache_key)
         
         if not trending:
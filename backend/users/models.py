@@ -79,6 +79,8 @@ class User(AbstractUser):
         null=True,
         blank=True
     )
+    # Responsive renditions of ``avatar``, filled in by core.images via Celery
+    avatar_variants = models.JSONField(default=dict, blank=True)
     following = models.ManyToManyField(
         'self', 
         symmetrical=False,
@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from .models import User, UserProfile,Notification
 from django.conf import settings
+from core import images
+from core.fieldsets import SparseFieldsMixin
+from core.media_urls import get_media_urls
+from posts.viewer_state import ViewerStateListSerializer, get_viewer_state
 
 class UserProfileSerializer(serializers.ModelSerializer):
     avatar_url = serializers.SerializerMethodField()
@@ -55,9 +59,8 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
 
     def get_avatar_url(self, obj):
-        if obj.avatar:
-            return obj.avatar.url
-        return None
+        # Relative, like the FieldFile URL it replaces
+        return get_media_urls(self.context, relative=True).url(obj.avatar)
 
     def get_full_name(self, obj):
         return obj.get_full_name()
@@ -115,9 +118,10 @@ class UserProfileDetailSerializer(UserProfileSerializer):
         }
 
 # Keep existing serializers
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     avatar = serializers.SerializerMethodField()
-    is_followed = serializers.BooleanField(read_only=True)
+    avatar_srcset = serializers.SerializerMethodField()
+    is_followed = serializers.SerializerMethodField()
     posts_count = serializers.IntegerField(read_only=True)
     followers_count = serializers.IntegerField(read_only=True)
     following_count = serializers.IntegerField(read_only=True)
@@ -126,17 +130,27 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'id', 'username', 'first_name', 'last_name', 
-            'email', 'bio', 'avatar', 'is_followed',
+            'email', 'bio', 'avatar', 'avatar_srcset', 'is_followed',
             'posts_count', 'followers_count', 'following_count'
         ]
+        list_serializer_class = ViewerStateListSerializer
+        # Model columns read by computed fields (see core.fieldsets)
+        field_sources = {
+            'avatar': ('avatar',),
+            'avatar_srcset': ('avatar_variants',),
+        }
+
+    def get_viewer_ids(self, instances):
+        return [], [user.id for user in instances]
+
+    def get_is_followed(self, obj):
+        return get_viewer_state(self.context).is_followed(obj.id)
 
     def get_avatar(self, obj):
-        request = self.context.get('request')
-        if obj.avatar and hasattr(obj.avatar, 'url'):
-            if request:
-                return request.build_absolute_uri(obj.avatar.url)
-            return obj.avatar.url  # Return relative URL if no request
-        return None
+        return get_media_urls(self.context).url(obj.avatar)
+
+    def get_avatar_srcset(self, obj):
+        return images.srcset(obj.avatar_variants, get_media_urls(self.context).url)
 
 class UserCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -151,7 +165,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
 class UserPublicProfileSerializer(serializers.ModelSerializer):
     follower_count = serializers.SerializerMethodField()
     following_count = serializers.SerializerMethodField()
-    is_followed = serializers.BooleanField(read_only=True)
+    is_followed = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -161,6 +175,13 @@ class UserPublicProfileSerializer(serializers.ModelSerializer):
             'following_count'
         ]
         read_only_fields = fields
+        list_serializer_class = ViewerStateListSerializer
+
+    def get_viewer_ids(self, instances):
+        return [], [user.id for user in instances]
+
+    def get_is_followed(self, obj):
+        return get_viewer_state(self.context).is_followed(obj.id)
 
     def get_follower_count(self, obj):
         return obj.followers.count()
@@ -179,3 +200,10 @@ class NotificationSerializer(serializers.ModelSerializer):
             'redirect_url', 'created_at', 'read_at', 'is_read',
             'is_recent'
         ]
+        list_serializer_class = ViewerStateListSerializer
+
+    def get_viewer_ids(self, instances):
+        return [], [
+            notification.sender_id for notification in instances
+            if notification.sender_id
+        ]
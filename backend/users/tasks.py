@@ -0,0 +1,26 @@
+from celery import shared_task
+from django.db import transaction
+
+from .models import User
+
+
+@shared_task
+def process_avatar(user_id, name):
+    """Normalize an uploaded avatar and render its responsive renditions"""
+    from core import images
+
+    if not User.objects.filter(id=user_id, avatar=name).exists():
+        # Replaced or removed before we got to it
+        return None
+
+    normalized = images.normalize(name, max_size=1000)
+    variants = images.build_variants(normalized, images.AVATAR_VARIANT_WIDTHS)
+    with transaction.atomic():
+        updated = User.objects.filter(id=user_id, avatar=name).update(
+            avatar=normalized,
+            avatar_variants=variants
+        )
+    if not updated:
+        images.delete_variants(variants)
+        return None
+    return normalized
@@ -6,25 +6,31 @@ from django.shortcuts import get_object_or_404
 from .models import User, UserProfile,Notification
 from .serializers import UserSerializer, UserCreateSerializer, UserProfileSerializer, UserPublicProfileSerializer,NotificationSerializer
 from core.decorators import handle_exceptions, paginate_response
+from core.fieldsets import FieldsetViewMixin
 from core.utils.response import api_response, error_response, ErrorCode
 from rest_framework.decorators import api_view, permission_classes, parser_classes, authentication_classes
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-from PIL import Image
-from io import BytesIO
+from django.core.exceptions import ValidationError
 import logging
 from rest_framework.authentication import BasicAuthentication
-from django.core.paginator import Paginator
-from django.db.models import Exists, OuterRef, Q
+from django.db.models import Q
+from core.pagination import KeysetPagination
+from django.db import transaction
+from posts.tasks import sync_timeline_follow
+from core import conditional, images
+from core.media_urls import MediaURLs
+from core.utils import store_upload
+from .tasks import process_avatar
 
 logger = logging.getLogger(__name__)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(FieldsetViewMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_permissions(self):
         if self.action in ['send_verification_otp', 'verify_email_otp']:
@@ -35,7 +41,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @paginate_response
     def list(self, request, *args, **kwargs):
         """Get list of all users"""
-        return self.get_queryset()
+        return self.project(self.get_queryset())
 
     @handle_exceptions
     def create(self, request, *args, **kwargs):
@@ -125,6 +131,10 @@ class UserViewSet(viewsets.ModelViewSet):
 
         # Add to following
         request.user.following.add(user_to_follow)
+        follower_id, author_id = str(request.user.id), str(user_to_follow.id)
+        transaction.on_commit(
+            lambda: sync_timeline_follow.delay(follower_id, author_id, True)
+        )
         
         # Create notification
         user_to_follow.create_follow_notification(request.user)
@@ -156,6 +166,10 @@ class UserViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             request.user.following.remove(user_to_unfollow)
+            follower_id, author_id = str(request.user.id), str(user_to_unfollow.id)
+            transaction.on_commit(
+                lambda: sync_timeline_follow.delay(follower_id, author_id, False)
+            )
             
             return Response({
                 'success': True,
@@ -173,40 +187,21 @@ class UserViewSet(viewsets.ModelViewSet):
     def followers(self, request):
         """Get list of followers"""
         try:
-            page_size = int(request.query_params.get('page_size', 10))
-            page = int(request.query_params.get('page', 1))
-            
-            followers = User.objects.filter(following=request.user).annotate(
-                is_followed=Exists(
-                    request.user.following.filter(
-                        id=OuterRef('id')
-                    )
-                )
-            )
-            
-            paginator = Paginator(followers, page_size)
-            current_page = paginator.page(page)
+            followers = self.project(User.objects.filter(following=request.user))
             
-            serializer = UserSerializer(current_page.object_list, many=True, context={'request': request})
+            page = self.paginate_queryset(followers)
+            serializer = UserSerializer(page, many=True, context=self.get_serializer_context())
             
             return api_response(
                 success=True,
                 message="Followers retrieved successfully",
-                data={
-                    'results': serializer.data,
-                    'count': followers.count(),
-                    'total_pages': paginator.num_pages,
-                    'current_page': page,
-                    'has_next': current_page.has_next(),
-                    'has_previous': current_page.has_previous()
-                }
+                data=self.paginator.get_paginated_data(serializer.data)
             )
         except Exception as e:
             logger.error(f"Error fetching followers: {str(e)}")
             return api_response(
                 success=False,
                 message="Failed to fetch followers",
-                error_code=ErrorCode.API_ERROR,
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
@@ -215,37 +210,21 @@ class UserViewSet(viewsets.ModelViewSet):
     def following(self, request):
         """Get list of users being followed"""
         try:
-            page_size = int(request.query_params.get('page_size', 10))
-            page = int(request.query_params.get('page', 1))
-            
-            following = request.user.following.all()
-            # For following list, all users are followed by definition
-            for user in following:
-                user.is_followed = True
+            following = self.project(request.user.following.all())
             
-            paginator = Paginator(following, page_size)
-            current_page = paginator.page(page)
-            
-            serializer = UserSerializer(current_page.object_list, many=True, context={'request': request})
+            page = self.paginate_queryset(following)
+            serializer = UserSerializer(page, many=True, context=self.get_serializer_context())
             
             return api_response(
                 success=True,
                 message="Following list retrieved successfully",
-                data={
-                    'results': serializer.data,
-                    'count': following.count(),
-                    'total_pages': paginator.num_pages,
-                    'current_page': page,
-                    'has_next': current_page.has_next(),
-                    'has_previous': current_page.has_previous()
-                }
+                data=self.paginator.get_paginated_data(serializer.data)
             )
         except Exception as e:
             logger.error(f"Error fetching following: {str(e)}")
             return api_response(
                 success=False,
                 message="Failed to fetch following list",
-                error_code=ErrorCode.API_ERROR,
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
@@ -282,12 +261,12 @@ class UserViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
-        users = User.objects.filter(
+        users = self.project(User.objects.filter(
             Q(username__icontains=query) |
             Q(email__icontains=query) |
             Q(first_name__icontains=query) |
             Q(last_name__icontains=query)
-        )
+        ))
         serializer = self.get_serializer(users, many=True)
         return api_response(
             message="Search results",
@@ -300,14 +279,16 @@ class UserViewSet(viewsets.ModelViewSet):
         """Get user suggestions"""
         try:
             # Your existing suggestion logic
-            suggestions = User.objects.exclude(
+            suggestions = self.project(User.objects.all()).exclude(
                 id=request.user.id
             ).exclude(
                 followers=request.user
             ).order_by('?')[:5]  # Random 5 users
             
             # Use UserSerializer with proper context
-            serializer = UserSerializer(suggestions, many=True, context={'request': request})
+            serializer = UserSerializer(
+                suggestions, many=True, context=self.get_serializer_context()
+            )
             
             return Response({
                 'success': True,
@@ -424,13 +405,6 @@ def update_avatar(request):
                 ErrorCode.REQUIRED_FIELD
             )
 
-        # Validate file type
-        if not avatar.content_type.startswith('image/'):
-            return error_response(
-                "Invalid file type. Please upload an image", 
-                ErrorCode.INVALID_IMAGE
-            )
-
         # Validate file size (5MB max)
         if avatar.size > 5 * 1024 * 1024:
             return error_response(
@@ -438,75 +412,45 @@ def update_avatar(request):
                 ErrorCode.FILE_TOO_LARGE
             )
 
-        # Process and optimize the image
+        # Store the upload as-is; resizing, EXIF stripping and responsive
+        # renditions happen in the process_avatar task
         try:
-            img = Image.open(avatar)
-            
-            # Convert to RGB if necessary
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Resize if too large (max 1000x1000)
-            if img.height > 1000 or img.width > 1000:
-                output_size = (1000, 1000)
-                img.thumbnail(output_size)
-            
-            # Save to BytesIO
-            img_io = BytesIO()
-            img.save(img_io, format='JPEG', quality=85)
-            img_io.seek(0)
-
-            # Generate unique filename with timestamp
-            from django.utils import timezone
-            import os
-            
-            # Create user-specific directory path
-            user_directory = f'avatars/{request.user.id}'
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            file_extension = os.path.splitext(avatar.name)[1].lower()
-            if not file_extension:
-                file_extension = '.jpg'
-            
-            file_name = f'{user_directory}/{timestamp}{file_extension}'
-
-            # Ensure the directory exists
-            full_path = os.path.join(default_storage.location, user_directory)
-            os.makedirs(full_path, exist_ok=True)
-            
-            # Delete old avatar if exists
-            if request.user.avatar:
-                try:
-                    default_storage.delete(request.user.avatar.name)
-                except Exception as e:
-                    logger.warning(f"Error deleting old avatar: {e}")
-            
-            # Save new avatar
-            saved_path = default_storage.save(
-                file_name, 
-                ContentFile(img_io.getvalue())
-            )
-            
-            # Update user's avatar field
-            request.user.avatar = saved_path
-            request.user.save()
-            
-            # Get the full URL
-            avatar_url = default_storage.url(saved_path)
-            
-            return Response({
-                'success': True,
-                'data': {
-                    'avatar_url': avatar_url
-                },
-                'message': 'Avatar updated successfully'
-            })
-            
-        except Exception as e:
-            logger.error(f"Error processing image: {e}")
+            saved_path = store_upload(
+                avatar,
+                f'avatars/{request.user.id}',
+                allowed_types=('image/',)
+            ).path
+        except ValidationError:
             return error_response(
-                "Error processing image", 
+                "Invalid file type. Please upload an image", 
                 ErrorCode.INVALID_IMAGE
             )
+
+        # Delete old avatar if exists
+        if request.user.avatar:
+            try:
+                default_storage.delete(request.user.avatar.name)
+            except Exception as e:
+                logger.warning(f"Error deleting old avatar: {e}")
+            images.delete_variants(request.user.avatar_variants)
+
+        # Update user's avatar field
+        request.user.avatar = saved_path
+        request.user.avatar_variants = {}
+        request.user.save()
+        user_id = str(request.user.id)
+        transaction.on_commit(lambda: process_avatar.delay(user_id, saved_path))
+
+        # Get the full URL
+        avatar_url = MediaURLs().url(saved_path)
+
+        return Response({
+            'success': True,
+            'data': {
+                'avatar_url': avatar_url
+            },
+            'message': 'Avatar updated successfully'
+        })
             
     except Exception as e:
         logger.error(f"Error updating avatar: {e}")
@@ -581,7 +525,7 @@ def get_user_profile_view(request, user_id):
     
     try:
         # Get the requested user
-        user = get_object_or_404(User, id=user_id)
+        user = get_object_or_404(User.objects.select_related('profile'), id=user_id)
         logger.info(f"Found user: {user.username}")
         
         # Base user data
@@ -592,7 +536,7 @@ def get_user_profile_view(request, user_id):
             'first_name': user.first_name,
             'last_name': user.last_name,
             'bio': user.bio,
-            'avatar': user.avatar.url if user.avatar else None,
+            'avatar': MediaURLs().url(user.avatar),
             'social_links': user.social_links,
             'account_privacy': user.account_privacy,
             'is_verified': user.is_verified,
@@ -615,13 +559,20 @@ def get_user_profile_view(request, user_id):
             'is_followed': request.user.following.filter(id=user.id).exists() if request.user.id != user.id else None
         }
             
+        # The payload is built from a few cheap lookups, so hash it directly
+        # and skip rendering and transfer when the client's copy is current
+        etag = conditional.make_etag(data)
+        response = conditional.not_modified(request, etag)
+        if response is not None:
+            return response
+            
         logger.info(f"Successfully retrieved profile for user: {user.username}")
         
-        return api_response(
+        return conditional.tag(api_response(
             success=True,
             message="User profile retrieved successfully",
             data=data
-        )
+        ), etag)
         
     except User.DoesNotExist:
         logger.error(f"User not found with id: {user_id}")
@@ -656,6 +607,7 @@ def search_users(request):
         id=request.user.id
     )[:10]
 
+    media_urls = MediaURLs()
     data = []
     for user in users:
         user_data = {
@@ -663,7 +615,7 @@ def search_users(request):
             'username': user.username,
             'first_name': user.first_name,
             'last_name': user.last_name,
-            'avatar': user.avatar.url if user.avatar else None
+            'avatar': media_urls.url(user.avatar)
         }
         data.append(user_data)
 
@@ -675,6 +627,7 @@ def search_users(request):
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         queryset = self.request.user.notifications.all()
@@ -694,27 +647,14 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @handle_exceptions
     def list(self, request):
         """Get all notifications"""
-        page_size = int(request.query_params.get('page_size', 10))
-        page = int(request.query_params.get('page', 1))
-        
-        notifications = self.get_queryset()
-        
-        paginator = Paginator(notifications, page_size)
-        current_page = paginator.page(page)
-        
-        serializer = self.get_serializer(current_page.object_list, many=True)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
         
+        data = self.paginator.get_paginated_data(serializer.data)
+        data['unread_count'] = request.user.get_unread_notifications_count()
         return api_response(
             message="Notifications retrieved successfully",
-            data={
-                'results': serializer.data,
-                'count': notifications.count(),
-                'total_pages': paginator.num_pages,
-                'current_page': page,
-                'has_next': current_page.has_next(),
-                'has_previous': current_page.has_previous(),
-                'unread_count': request.user.get_unread_notifications_count()
-            }
+            data=data
         )
 
     @action(detail=False, methods=['POST'])
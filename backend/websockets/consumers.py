@@ -5,6 +5,7 @@ from chat.models import ChatRoom, Message, UserPresence, MessageReaction
 from posts.models import Post
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from core import fastjson
 
 User = get_user_model()
 
@@ -42,7 +43,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
     async def receive(self, text_data):
-        data = json.loads(text_data)
+        data = fastjson.loads(text_data)
         message_type = data.get('type')
 
         if message_type == 'message':
@@ -155,13 +156,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     # Message handlers
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             'type': 'message',
             'data': event['message']
         }))
 
     async def typing_status(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             'type': 'typing',
             'data': {
                 'user': event['user'],
@@ -171,7 +172,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
 
     async def message_edited(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             'type': 'edit',
             'data': {
                 'message_id': event['message_id'],
@@ -181,7 +182,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
 
     async def message_deleted(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             'type': 'delete',
             'data': {
                 'message_id': event['message_id'],
@@ -190,7 +191,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         }))
 
     async def message_reaction(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=fastjson.dumps_str({
             'type': 'reaction',
             'data': {
                 'message_id': event['message_id'],